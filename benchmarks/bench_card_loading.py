@@ -0,0 +1,100 @@
+"""Startup time and resident memory of loading the expanded card database.
+
+Each loader runs in a fresh interpreter so the memory numbers don't mix.
+Run with: python -m benchmarks.bench_card_loading
+"""
+import json
+import subprocess
+import sys
+import time
+
+from src.core import (
+    read_card_file, build_card_database, load_card_snapshot,
+    save_card_snapshot, CardRuleset
+)
+from .helpers import get_expanded_database_file, legacy_build
+
+
+def legacy_load(filename: str):
+    """Two parses of the file: the categorized copies and the raw view."""
+    with open(filename, "r") as f:
+        categorized = legacy_build(json.load(f))
+    with open(filename, "r") as f:
+        raw = json.load(f)
+    return categorized, raw
+
+
+def shared_load(filename: str):
+    raw = read_card_file(filename)
+    return build_card_database(raw), raw
+
+
+def snapshot_load(filename: str):
+    snapshot = load_card_snapshot(get_snapshot_file(filename), filename)
+    return snapshot["legal"], snapshot["raw"]
+
+
+def get_snapshot_file(filename: str) -> str:
+    return filename.replace(".json", ".pickle")
+
+
+def write_snapshot(filename: str):
+    raw = read_card_file(filename)
+    pokemon, trainers, energies, count = build_card_database(raw)
+    legal_cards = {
+        "pokemon": pokemon,
+        "trainers": trainers,
+        "energies": energies,
+        "count": count
+    }
+    save_card_snapshot(
+        get_snapshot_file(filename), filename, [], raw, legal_cards,
+        CardRuleset(legal_cards)
+    )
+
+
+LOADERS = {"old": legacy_load, "new": shared_load, "snapshot": snapshot_load}
+
+
+def get_rss_mb() -> float:
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure(loader: str, filename: str):
+    baseline = get_rss_mb()
+    start = time.perf_counter()
+    result = LOADERS[loader](filename)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "time": elapsed,
+        "rss_mb": get_rss_mb() - baseline,
+        "cards": len(result[1].get("cards", {}))
+    }))
+
+
+def main():
+    filename = get_expanded_database_file()
+    print(f"database: {filename}")
+    write_snapshot(filename)
+    for loader in LOADERS:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_card_loading",
+             loader, filename],
+            capture_output=True, text=True, check=True
+        ).stdout
+        stats = json.loads(output)
+        print(
+            f"{loader} loader: {stats['time'] * 1e3:.1f} ms, "
+            f"+{stats['rss_mb']:.1f} MB resident"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        measure(sys.argv[1], sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,36 @@
+"""Memory held by the expanded card database, dict cards against Card.
+
+Run with: python -m benchmarks.bench_card_memory
+"""
+import json
+import tracemalloc
+
+from src.core import build_card_database
+from .helpers import get_expanded_database_file, legacy_build
+
+
+def measure(filename: str, build) -> tuple[float, object]:
+    with open(filename, "r") as f:
+        text = f.read()
+    tracemalloc.start()
+    data = json.loads(text)
+    result = build(data)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / 1024 / 1024, (data, result)
+
+
+def main():
+    filename = get_expanded_database_file()
+    old, _ = measure(filename, legacy_build)
+    new, (data, _) = measure(filename, build_card_database)
+    cards = sum(len(cards) for cards in data["cards"].values())
+
+    print(f"database: {filename} ({cards} cards)")
+    print(f"dict cards: {old:.1f} MB")
+    print(f"Card records: {new:.1f} MB")
+    print(f"reduction: {(1 - new / old) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compares the nested-loop event reconciliation with plan_event_sync.
+
+Run with: python -m benchmarks.bench_event_sync
+"""
+import timeit
+from datetime import datetime, timedelta
+
+from src.event_sync import plan_event_sync
+from src.pokemon import PokemonEvent
+
+EVENT_COUNTS = (50, 200, 800)
+ITERATIONS = 20
+NOW = datetime(2025, 1, 1)
+
+
+class GuildEvent():
+    """The fields of a discord.ScheduledEvent the sync reads."""
+
+    def __init__(self, name: str, start_time: datetime, end_time: datetime):
+        self.id = id(self)
+        self.name = name
+        self.start_time = start_time
+        self.end_time = end_time
+        self.location = "Store"
+        self.description = "Cup"
+
+
+def build_events(count: int) -> tuple[list, list]:
+    """count scraped events, 90% already scheduled, and 10% of the
+    scheduled events no longer listed."""
+    scraped = []
+    for i in range(count):
+        day = NOW + timedelta(days=1 + i % 300)
+        date = f"{day:%A %B} {day.day} {day.year}"
+        scraped.append(
+            PokemonEvent(f"Event {i}", "Cup", "Store", date, "logo", False)
+        )
+
+    guild_events = [
+        GuildEvent(e.name, e.start_date, e.end_date)
+        for e in scraped[:count * 9 // 10]
+    ]
+    guild_events += [
+        GuildEvent(
+            f"Gone {i}",
+            NOW + timedelta(days=i + 1),
+            NOW + timedelta(days=i + 2)
+        )
+        for i in range(count // 10)
+    ]
+    return scraped, guild_events
+
+
+def legacy_plan(events: list, bot_events: list, now: datetime) -> tuple:
+    """update_guild_events before plan_event_sync, without discord."""
+    keep_events = []
+    create = []
+    for event in events:
+        if event.start_date < now:
+            continue
+        if event.type.lower().strip().startswith("league"):
+            continue
+
+        already_exists = False
+        for g_event in bot_events:
+            g_start = g_event.start_time.replace(tzinfo=None)
+            g_end = g_event.end_time.replace(tzinfo=None)
+            if (
+                g_event.name == event.name and
+                g_start == event.start_date and
+                g_end == event.end_date
+            ):
+                keep_events.append(g_event)
+                already_exists = True
+                break
+
+        if not already_exists:
+            create.append(event)
+
+    cancel = []
+    for event in bot_events:
+        if event.start_time.replace(tzinfo=None) < now:
+            continue
+        if event in keep_events:
+            continue
+        cancel.append(event)
+    return create, keep_events, cancel
+
+
+def main():
+    for count in EVENT_COUNTS:
+        scraped, guild_events = build_events(count)
+
+        create, keep, cancel = legacy_plan(scraped, guild_events, NOW)
+        plan = plan_event_sync(scraped, guild_events, now=NOW)
+        assert len(create) == len(plan.create)
+        assert len(keep) == len(plan.keep)
+        assert len(cancel) == len(plan.cancel)
+
+        old = timeit.timeit(
+            lambda: legacy_plan(scraped, guild_events, NOW),
+            number=ITERATIONS
+        ) / ITERATIONS
+        new = timeit.timeit(
+            lambda: plan_event_sync(scraped, guild_events, now=NOW),
+            number=ITERATIONS
+        ) / ITERATIONS
+        print(
+            f"{count} events, {len(guild_events)} guild events: "
+            f"nested loop {old * 1000:.2f} ms, "
+            f"plan {new * 1000:.2f} ms ({old / new:.0f}x), {plan}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Counts CDP round trips of the element walks against one evaluated script.
+
+Each scraper used to read pages through CDP elements, where a query costs
+one round trip plus one per element found, and every `.children`, `.text`,
+tag or attribute read on an element is another one. The scripts in the
+scrapers read the same fields in the page and return them in a single
+`sb.cdp.evaluate` call.
+
+Pages are read from data/pages/<name>.html when a recorded copy exists,
+otherwise synthetic pages with the layout the selectors expect are used.
+
+Run with: python -m benchmarks.bench_round_trips
+"""
+import os
+from html.parser import HTMLParser
+
+from src.core import REPLACE_CHARACTERS
+
+PAGES_FOLDER = "data/pages"
+PREMIER_EVENTS = 300
+STORE_EVENTS = 40
+CARD_PAGE_SIZE = 200
+BANNED_CARDS = 12
+VOID_TAGS = {"img", "br", "hr", "input", "meta", "link"}
+
+
+class Element():
+    def __init__(self, tag: str, attrs: dict):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        # text nodes and child elements in document order
+        self.nodes = []
+
+    def text_nodes(self) -> list[str]:
+        texts = []
+        for node in self.nodes:
+            if isinstance(node, Element):
+                texts += node.text_nodes()
+            else:
+                texts.append(node)
+        return texts
+
+    def text(self) -> str:
+        """Like the CDP Element.text, text nodes joined with " "."""
+        return " ".join(self.text_nodes()).strip()
+
+    def iter(self):
+        yield self
+        for child in self.children:
+            yield from child.iter()
+
+    def matches(self, selector: str) -> bool:
+        if selector.startswith("#"):
+            return self.attrs.get("id") == selector[1:]
+        tag, _, cls = selector.partition(".")
+        classes = (self.attrs.get("class") or "").split()
+        return self.tag == tag and (not cls or cls in classes)
+
+
+class PageParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.root = Element("document", {})
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, dict(attrs))
+        self.stack[-1].children.append(element)
+        self.stack[-1].nodes.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_endtag(self, tag):
+        if tag not in VOID_TAGS and len(self.stack) > 1:
+            self.stack.pop()
+
+    def handle_data(self, data):
+        self.stack[-1].nodes.append(data)
+
+
+class CountingElement():
+    """Stands in for a CDP element, every read is one round trip."""
+
+    def __init__(self, element: Element, counter: list):
+        self._element = element
+        self._counter = counter
+
+    def _trip(self):
+        self._counter[0] += 1
+
+    @property
+    def children(self) -> list:
+        self._trip()
+        return [
+            CountingElement(child, self._counter)
+            for child in self._element.children
+        ]
+
+    @property
+    def text(self) -> str:
+        self._trip()
+        return self._element.text()
+
+    @property
+    def tag_name(self) -> str:
+        self._trip()
+        return self._element.tag
+
+    def __getitem__(self, name: str):
+        self._trip()
+        return self._element.attrs.get(name)
+
+
+class CountingPage():
+    def __init__(self, html: str):
+        parser = PageParser()
+        parser.feed(html)
+        self.root = parser.root
+        self.counter = [0]
+
+    def find_visible_elements(self, selector: str) -> list:
+        found = [e for e in self.root.iter() if e.matches(selector)]
+        self.counter[0] += 1 + len(found)
+        return [CountingElement(e, self.counter) for e in found]
+
+
+def event_card_html(i: int, store: bool) -> str:
+    img = '<img src="/logo.png">'
+    if store:
+        img = f"<span>{img}</span>"
+    return (
+        '<div class="map-location-card">'
+        "<div><div><div><div><div>"
+        f"<div><span>League Challenge</span></div>"
+        f"<div><span>Event {i}</span></div>"
+        f"<div><i></i><div><span>Store {i}, Town</span></div></div>"
+        "<div><i></i><div><span>Friday, Oct 10 - Sunday, 12, 2025"
+        "</span></div></div>"
+        "</div></div></div></div></div>"
+        f"<div><div><div><div>{img}</div></div></div></div>"
+        "</div>"
+    )
+
+
+def premier_events_html() -> str:
+    return "".join(
+        event_card_html(i, False) for i in range(PREMIER_EVENTS)
+    )
+
+
+def store_events_html() -> str:
+    events = "".join(
+        f"<div><div><div><div><div>{event_card_html(i, True)}"
+        "</div></div></div></div></div>"
+        for i in range(STORE_EVENTS)
+    )
+    return f'<div id="b10-Content"><div>{events}</div></div>'
+
+
+def card_page_html() -> str:
+    articles = "".join(
+        '<article class="type-pkmn_card"><div><div>'
+        f"<span>Set {i % 7}</span><span>{i:03}</span>"
+        f'<span><a href="https://pkmncards.com/card/{i}/">Card {i}</a>'
+        "</span><span>Pokémon</span><span>Grass</span><span>Rare</span>"
+        "</div></div></article>"
+        for i in range(CARD_PAGE_SIZE)
+    )
+    return (
+        '<li class="results"><span>1 thru 200</span></li>'
+        '<span class="range-current">1 thru 200</span>'
+        '<span class="out-of"><span>/ 2,262</span></span>'
+        f"{articles}"
+    )
+
+
+def decklist_html() -> str:
+    rows = ["<tr><th>Pokemon</th></tr>"]
+    rows += [
+        f"<tr><td>2</td><td>Pokemon {i}</td><td>SET</td><td>{i}</td>"
+        "<td>h</td></tr>"
+        for i in range(10)
+    ]
+    rows.append("<tr><th>Trainer</th></tr>")
+    rows += [f"<tr><td>3</td><td>Trainer {i}</td></tr>" for i in range(10)]
+    rows.append("<tr><th>Energy</th></tr>")
+    rows += [f"<tr><td>5</td><td>Energy {i}</td></tr>" for i in range(2)]
+    return f'<table class="svelte-1sps4x1">{"".join(rows)}</table>'
+
+
+def banned_cards_html() -> str:
+    items = "".join(
+        f"<li><p>Card {i} (XY—BREAKpoint, {i}/122, and {i}a/122)</p></li>"
+        for i in range(BANNED_CARDS)
+    )
+    return (
+        '<ul class="list"><li><p>No cards are currently banned</p></li>'
+        f'</ul><ul class="list">{items}</ul>'
+    )
+
+
+def load_page(name: str, build) -> str:
+    filename = os.path.join(PAGES_FOLDER, f"{name}.html")
+    if os.path.exists(filename):
+        with open(filename, "r") as f:
+            return f.read()
+    return build()
+
+
+def legacy_event_info(div, store: bool = False) -> dict:
+    img = div.children[1].children[0].children[0].children[0]
+    if store:
+        img = img.children[0]
+    base = div.children[0].children[0].children[0].children[0].children[0]
+    return {
+        "logo": img["src"],
+        "type": base.children[0].children[0].text,
+        "name": base.children[1].children[0].text,
+        "location": base.children[2].children[1].children[0].text,
+        "date": base.children[3].children[1].children[0].text
+    }
+
+
+def legacy_premier_events(page: CountingPage) -> list[dict]:
+    return [
+        legacy_event_info(div)
+        for div in page.find_visible_elements("div.map-location-card")
+    ]
+
+
+def legacy_store_events(page: CountingPage) -> list[dict]:
+    events = []
+    content = page.find_visible_elements("#b10-Content")[0]
+    for div in content.children[0].children:
+        for _ in range(5):
+            div = div.children[0]
+        events.append(legacy_event_info(div, store=True))
+    return events
+
+
+def legacy_card_page(page: CountingPage) -> list[dict]:
+    headers = ["set", "number", "name", "type", "color", "rarity"]
+    page.find_visible_elements("li.results")[0].children[0].text
+    page.find_visible_elements("span.range-current")[0].text
+    page.find_visible_elements("span.out-of")[0].children[0].text
+    cards = []
+    for card in page.find_visible_elements("article.type-pkmn_card"):
+        card_details = {}
+        cells = card.children[0].children[0].children
+        for i, header in enumerate(headers):
+            card_details[header] = cells[i].text
+        card_details["link"] = cells[2].children[0]["href"]
+        cards.append(card_details)
+    return cards
+
+
+def legacy_decklist(page: CountingPage) -> list[list]:
+    table = page.find_visible_elements("table.svelte-1sps4x1")[0]
+    rows = []
+    for row in table.children:
+        cells = []
+        for cell in row.children:
+            if cell.tag_name == "th":
+                cells.append(cell.text)
+                break
+            if len(row.children) < 2:
+                break
+            cells.append(cell.text)
+        rows.append(cells)
+    return rows
+
+
+def legacy_banned_cards(page: CountingPage) -> list[list]:
+    lists = page.find_visible_elements("ul.list")
+    texts = []
+    for elements in (lists[0].children, lists[1].children):
+        names = []
+        for li in elements:
+            text = li.children[0].text.strip()
+            for old, new in REPLACE_CHARACTERS.items():
+                text = text.replace(old, new)
+            names.append(text)
+        texts.append(names)
+    return texts
+
+
+PAGES = (
+    ("premier_events", premier_events_html, legacy_premier_events),
+    ("store_events", store_events_html, legacy_store_events),
+    ("card_page", card_page_html, legacy_card_page),
+    ("decklist", decklist_html, legacy_decklist),
+    ("banned_cards", banned_cards_html, legacy_banned_cards),
+)
+
+
+def main():
+    print(f"{'page':<16}{'elements':>10}{'walk':>10}{'script':>8}")
+    for name, build, walk in PAGES:
+        page = CountingPage(load_page(name, build))
+        walk(page)
+        elements = sum(1 for _ in page.root.iter()) - 1
+        print(f"{name:<16}{elements:>10}{page.counter[0]:>10}{1:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Compares deck validation with and without a precompiled CardRuleset.
+
+Run with: python -m benchmarks.bench_validation
+"""
+import json
+import timeit
+
+from src.core import (
+    load_card_database, validate_decklist, validate_decklist_formats,
+    CardRuleset, ENERGY_TYPES
+)
+from .helpers import (
+    get_expanded_database_file, sample_decklist, legacy_build
+)
+
+ITERATIONS = 2000
+
+
+def legacy_validate_decklist(
+    decklist: dict,
+    legal_cards: dict | None = None,
+) -> tuple[bool, str]:
+    """validate_decklist as it was before CardRuleset, legality part only."""
+    quantities_by_name = {}
+    for card in decklist.get("pokemon", []):
+        quantities_by_name[card["name"].lower()] = quantities_by_name.get(
+            card["name"].lower(), 0
+        ) + card["quantity"]
+
+    for card, data in decklist.get("trainers", {}).items():
+        quantities_by_name[card.lower()] = quantities_by_name.get(
+            card.lower(), 0
+        ) + data["quantity"]
+
+    for card, data in decklist.get("energies", {}).items():
+        quantities_by_name[card.lower()] = quantities_by_name.get(
+            card.lower(), 0
+        ) + data["quantity"]
+
+    exemptions = [f"{t} energy" for t in ENERGY_TYPES]
+    for name, quantity in quantities_by_name.items():
+        if quantity > 4 and name not in exemptions:
+            return False, f"Card {name} exceeds the maximum of 4 copies."
+
+    ace_spec_trainers = [
+        card_name.lower() for
+        card_name, card in legal_cards["trainers"].items()
+        if card["rarity"] == "ACE SPEC Rare"
+    ]
+    ace_spec_energies = [
+        card_name.lower() for
+        card_name, card in legal_cards["energies"].items()
+        if card["rarity"] == "ACE SPEC Rare"
+    ]
+    total_ace_specs = sum(
+        quantities_by_name[card.lower()] for
+        card in quantities_by_name.keys()
+        if card.lower() in ace_spec_trainers
+        or card.lower() in ace_spec_energies
+    )
+    if total_ace_specs > 1:
+        return False, "Decklist can only contain one Ace Spec card."
+
+    basic_pokemon_found = False
+    for card in decklist.get("pokemon", []):
+        card_info = legal_cards["pokemon"].get(
+            card["set"], {}
+        ).get(str(card["number"]), None)
+        if card_info is None:
+            return False, "not legal"
+        if (
+            card_info["type"].startswith("Pkmn")
+            and "Basic" in card_info["type"]
+        ):
+            basic_pokemon_found = True
+
+    if not basic_pokemon_found:
+        return False, "Decklist must contain at least one Basic Pokémon."
+
+    for card_name in decklist.get("trainers", {}):
+        if card_name not in legal_cards["trainers"]:
+            return False, f"Trainer card {card_name} is not legal."
+
+    for card_name in decklist.get("energies", {}):
+        if (
+            card_name not in legal_cards["energies"]
+            and card_name.lower() not in exemptions
+        ):
+            return False, f"Energy card {card_name} is not legal."
+
+    return True, ""
+
+
+def main():
+    filename = get_expanded_database_file()
+    pokemon, trainers, energies, count = load_card_database(filename)
+    legal_cards = {
+        "pokemon": pokemon,
+        "trainers": trainers,
+        "energies": energies,
+        "count": count
+    }
+    decklist = sample_decklist(legal_cards)
+    ruleset = CardRuleset(legal_cards)
+
+    # the old path ran against card dicts
+    with open(filename, "r") as f:
+        legacy_pokemon, legacy_trainers, legacy_energies = legacy_build(
+            json.load(f)
+        )
+    legacy_cards = {
+        "pokemon": legacy_pokemon,
+        "trainers": legacy_trainers,
+        "energies": legacy_energies
+    }
+
+    assert legacy_validate_decklist(decklist, legacy_cards) == (True, "")
+    assert validate_decklist(decklist, ruleset=ruleset) == (True, "")
+
+    old = timeit.timeit(
+        lambda: legacy_validate_decklist(decklist, legacy_cards),
+        number=ITERATIONS
+    )
+    compile_time = timeit.timeit(lambda: CardRuleset(legal_cards), number=1)
+    new = timeit.timeit(
+        lambda: validate_decklist(decklist, ruleset=ruleset),
+        number=ITERATIONS
+    )
+
+    print(f"database: {filename}")
+    print(
+        f"cards: {sum(len(c) for c in pokemon.values())} pokemon, "
+        f"{len(trainers)} trainers, {len(energies)} energies"
+    )
+    print(f"old path: {old / ITERATIONS * 1e6:.1f} us per deck")
+    print(f"new path: {new / ITERATIONS * 1e6:.1f} us per deck")
+    print(f"ruleset compile (once per load): {compile_time * 1e3:.1f} ms")
+    print(f"speedup: {old / new:.1f}x")
+
+    # one validate_decklist call per format against a single walk
+    for format_count in (2, 4):
+        formats = {
+            f"format{i}": (ruleset, None) for i in range(format_count)
+        }
+        separate = timeit.timeit(
+            lambda: [
+                validate_decklist(decklist, ruleset=rules)
+                for rules, _ in formats.values()
+            ],
+            number=ITERATIONS
+        )
+        single = timeit.timeit(
+            lambda: validate_decklist_formats(decklist, formats),
+            number=ITERATIONS
+        )
+        print(
+            f"{format_count} formats: separate "
+            f"{separate / ITERATIONS * 1e6:.1f} us, single pass "
+            f"{single / ITERATIONS * 1e6:.1f} us per deck"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Shared inputs for the benchmark scripts.
+
+Benchmarks run against data/legal_expanded_cards.json when it exists,
+otherwise against a synthetic database of the same shape built from the
+test card list.
+"""
+import json
+import os
+import tempfile
+
+from src.core import remove_types_from_card_name
+
+EXPANDED_FILE = "data/legal_expanded_cards.json"
+TEST_CARDS_FILE = "tests/src/test_legal_cards.json"
+SYNTHETIC_COPIES = 40
+
+
+def get_expanded_database_file(copies: int = SYNTHETIC_COPIES) -> str:
+    if os.path.exists(EXPANDED_FILE):
+        return EXPANDED_FILE
+
+    with open(TEST_CARDS_FILE, "r") as f:
+        data = json.load(f)
+
+    cards = {}
+    for i in range(copies):
+        for set_name, set_cards in data["cards"].items():
+            new_set = {}
+            for card_number, card in set_cards.items():
+                card = card.copy()
+                if not card["type"].startswith("Pkmn") and i % 2:
+                    card["name"] = f"{card['name']} {i}"
+                new_set[card_number] = card
+            cards[f"{set_name}{i}"] = new_set
+
+    filename = os.path.join(
+        tempfile.gettempdir(), "synthetic_expanded_cards.json"
+    )
+    with open(filename, "w") as f:
+        json.dump(
+            {"cards": cards, "count": sum(len(c) for c in cards.values())},
+            f,
+            indent=4
+        )
+    return filename
+
+
+def sample_decklist(legal_cards: dict) -> dict:
+    """A legal 60 card deck: 12 basic pokemon, 32 trainers, 16 energy."""
+    pokemon = []
+    for set_name, cards in legal_cards["pokemon"].items():
+        for card_number, card in cards.items():
+            if "Basic" not in card["type"]:
+                continue
+            pokemon.append({
+                "name": card["name"],
+                "quantity": 4,
+                "set": set_name,
+                "number": card_number
+            })
+            if len(pokemon) == 3:
+                break
+        if len(pokemon) == 3:
+            break
+
+    trainers = {}
+    for card_name, card in legal_cards["trainers"].items():
+        if card["rarity"] == "ACE SPEC Rare":
+            continue
+        trainers[card_name] = {"quantity": 4}
+        if len(trainers) == 8:
+            break
+
+    return {
+        "pokemon": pokemon,
+        "trainers": trainers,
+        "energies": {"Fire Energy": {"quantity": 16}}
+    }
+
+
+def legacy_build(data: dict) -> tuple[dict, dict, dict]:
+    """The loader before Card records: categorized copies of card dicts."""
+    pokemon, trainers, energies = {}, {}, {}
+    for set_name, cards in data["cards"].items():
+        for card_number, card_info in cards.items():
+            card_info["name"] = remove_types_from_card_name(card_info["name"])
+            if card_info["type"].startswith("Pkmn"):
+                if card_number.isdigit():
+                    clean_number = str(int(card_number))
+                else:
+                    clean_number = card_number.strip()
+                pokemon.setdefault(set_name, {})[
+                    clean_number
+                ] = card_info.copy()
+            elif card_info["type"].startswith("Trainer"):
+                trainers[card_info["name"]] = card_info.copy()
+            elif (
+                card_info["type"].startswith("Energy") and
+                not card_info["type"].endswith("Basic")
+            ):
+                energies[card_info["name"]] = card_info.copy()
+    return pokemon, trainers, energies
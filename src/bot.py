@@ -4,10 +4,11 @@ import discord
 from discord.ext import tasks
 
 from .core import DATA_FOLDER
-from .helpers import create_logger, check_dir
-from .bot_decklist import DecklistBot
+from .helpers import create_logger, check_dir, SingleFlight
+from .cache import TTLCache
+from .bot_decklist import DecklistBot, VALIDATION_CACHE_SIZE
 from .bot_legalcards import LegalCardsBot
-from .bot_newsfeed import NewsfeedBot
+from .bot_newsfeed import NewsfeedBot, NEWSFEED_INTERVAL_HOURS
 from .bot_admin import AdminBot
 from .bot_events import EventsBot
 from .bot_tournament import TournamentBot
@@ -25,11 +26,17 @@ class Bot(
         self.maintenance = maintenance_mode
         self.password = password
         self.banned_sets = banned_sets
+        self.decklist_fetches = SingleFlight()
+        self.validation_cache = TTLCache(
+            max_size=VALIDATION_CACHE_SIZE, ttl=None
+        )
+        self.guild_event_index = {}
         self.logger = create_logger("decklist_bot", filename="logs/bot.log")
         check_dir(DATA_FOLDER)
 
         self.load_legal_cards()
         self.load_user_decklists()
+        self.load_decklist_cache()
         self.load_tournament_channels()
         self.load_newsfeed_channels()
         self.load_events_data()
@@ -86,27 +93,35 @@ class Bot(
         time_update_signup_sheet = datetime.time(hour=9)
         time_update_events = datetime.time(hour=11)
         time_update_banned_cards = datetime.time(hour=8)
-        interval_update_newsfeed = {"hours": 6}
+        interval_update_newsfeed = {"hours": NEWSFEED_INTERVAL_HOURS}
 
         @tasks.loop(time=time_update_legal_cards)
         async def update_legal_cards():
-            self.get_legal_cards_task()  # pragma: no cover
+            await self.get_legal_cards_task()  # pragma: no cover
+            self.log_stats()  # pragma: no cover
 
         @tasks.loop(time=time_update_banned_cards)
         async def update_banned_cards():
-            self.get_banned_cards_task()  # pragma: no cover
+            await self.get_banned_cards_task()  # pragma: no cover
+            self.log_stats()  # pragma: no cover
 
         @tasks.loop(time=time_update_signup_sheet)
         async def update_signup_sheet():
-            self.update_signup_sheet_task()  # pragma: no cover
+            await self.update_signup_sheet_task()  # pragma: no cover
+            self.log_stats()  # pragma: no cover
 
         @tasks.loop(**interval_update_newsfeed)
         async def update_newsfeed():
             await self.get_newsfeed_task()  # pragma: no cover
+            update_newsfeed.change_interval(
+                hours=self.newsfeed_interval
+            )  # pragma: no cover
+            self.log_stats()  # pragma: no cover
 
         @tasks.loop(time=time_update_events)
         async def update_events():
             await self.sync_events_task()   # pragma: no cover
+            self.log_stats()  # pragma: no cover
 
         update_legal_cards.start()
         update_signup_sheet.start()
@@ -1,5 +1,10 @@
 import discord
 
+from .driver_pool import DRIVER_POOL
+from .fetch import get_fetch_stats
+from .pokemon import LOGO_CACHE
+from .waits import get_wait_stats
+
 
 class AdminBot:
     def add_admin_commands(self):
@@ -39,3 +44,20 @@ class AdminBot:
 
         status = "on" if self.maintenance else "off"
         await ctx.respond(f"Maintenance mode: {status}", ephemeral=True)
+
+    def collect_stats(self) -> dict:
+        return {
+            "fetch": get_fetch_stats(),
+            "waits": get_wait_stats(),
+            "driver pool": DRIVER_POOL.get_stats(),
+            "decklist cache": self.decklist_cache.get_stats(),
+            "validation cache": self.validation_cache.get_stats(),
+            "logo cache": LOGO_CACHE.get_stats(),
+            "decklist fetches": {
+                "coalesced": self.decklist_fetches.coalesced
+            }
+        }
+
+    def log_stats(self):
+        for group, stats in self.collect_stats().items():
+            self.logger.info(f"Stats {group}: {stats}")
@@ -2,11 +2,17 @@ import json
 import discord
 from datetime import datetime
 
-from .limitless import get_decklist_from_url
-from .core import validate_decklist, DATA_FOLDER
-from .helpers import CustomThread, MAINTENANCE_MODE_MESSAGE
+from .limitless import get_decklist_from_url, canonicalize_limitless_url
+from .core import validate_decklist_formats, deck_hash, DATA_FOLDER
+from .cache import TTLCache
+from .helpers import MAINTENANCE_MODE_MESSAGE
 
 USER_DECKLIST_FILE = f"{DATA_FOLDER}/user_decklists.json"
+DECKLIST_CACHE_FILE = f"{DATA_FOLDER}/decklist_cache.json"
+DECKLIST_CACHE_SIZE = 512
+DECKLIST_CACHE_TTL = 6 * 60 * 60
+DECKLIST_FORMATS = ("standard", "expanded")
+VALIDATION_CACHE_SIZE = 1024
 
 
 class DecklistBot:
@@ -25,6 +31,23 @@ class DecklistBot:
         except Exception as e:
             self.logger.error(f"Error saving {USER_DECKLIST_FILE}: {e}")
 
+    def load_decklist_cache(self):
+        self.decklist_cache = TTLCache(
+            max_size=DECKLIST_CACHE_SIZE,
+            ttl=DECKLIST_CACHE_TTL,
+            filename=DECKLIST_CACHE_FILE
+        )
+        try:
+            self.decklist_cache.load()
+        except Exception as e:
+            self.logger.warning(f"Error loading {DECKLIST_CACHE_FILE}: {e}")
+
+    def save_decklist_cache(self):
+        try:
+            self.decklist_cache.save()
+        except Exception as e:
+            self.logger.error(f"Error saving {DECKLIST_CACHE_FILE}: {e}")
+
     def add_decklist_commands(self):
         decklist = self.bot.create_group(
             "deck", "Manage your decks"
@@ -41,9 +64,12 @@ class DecklistBot:
             limitless_url: discord.Option(
                 str, "Limitless URL of the decklist"
             ),  # type: ignore
+            refresh: discord.Option(
+                bool, "Fetch the decklist again", default=False
+            ),  # type: ignore
         ):
             await self.decklist_check_url(
-                ctx, limitless_url
+                ctx, limitless_url, refresh
             )  # pragma: no cover
 
         @pokemon_decklist.command(
@@ -54,8 +80,13 @@ class DecklistBot:
             name: discord.Option(
                 str, "Deck name"
             ),  # type: ignore
+            refresh: discord.Option(
+                bool, "Fetch the decklist again", default=False
+            ),  # type: ignore
         ):
-            await self.decklist_check(ctx, name)  # pragma: no cover
+            await self.decklist_check(
+                ctx, name, refresh
+            )  # pragma: no cover
 
         @pokemon_decklist.command(description="Create a deck")
         async def create(
@@ -178,12 +209,14 @@ class DecklistBot:
         decks = "\n".join(f"\t{deck}" for deck in sorted(user_decks.keys()))
         await ctx.respond(f"Your decks:\n{decks}", ephemeral=True)
 
-    async def decklist_check(self, ctx, name: str):
+    async def decklist_check(self, ctx, name: str, refresh: bool = False):
         await ctx.defer(ephemeral=True)
         user_id = str(ctx.author.id)
         name = name.strip()
 
-        result, error = self.do_user_decklist_check(user_id, name)
+        result, error = await self.do_user_decklist_check(
+            user_id, name, refresh
+        )
 
         if error is not None:
             await ctx.respond(f"Error checking deck: {error}", ephemeral=True)
@@ -214,7 +247,7 @@ class DecklistBot:
             "url": limitless_url
         }
 
-        result, error = self.do_user_decklist_check(user_id, name)
+        result, error = await self.do_user_decklist_check(user_id, name)
 
         if error is not None:
             await ctx.respond(
@@ -238,14 +271,16 @@ class DecklistBot:
         await ctx.respond(result_text, ephemeral=True)
         self.save_user_decklists()
 
-    async def decklist_check_url(self, ctx, deck_url: str):
+    async def decklist_check_url(
+        self, ctx, deck_url: str, refresh: bool = False
+    ):
         await ctx.defer(ephemeral=True)
 
         if self.maintenance:
             await ctx.respond(MAINTENANCE_MODE_MESSAGE, ephemeral=True)
             return
 
-        result, _, error = self.do_decklist_check(deck_url)
+        result, _, error = await self.do_decklist_check(deck_url, refresh)
         if error is not None:
             await ctx.respond(
                 f"Error checking deck: {error}",
@@ -266,8 +301,8 @@ class DecklistBot:
             result_text += f"not valid! {result['expanded']['error']}"
         await ctx.respond(result_text, ephemeral=True)
 
-    def do_user_decklist_check(
-        self, user_id: str, deck_name: str
+    async def do_user_decklist_check(
+        self, user_id: str, deck_name: str, refresh: bool = False
     ) -> tuple[dict, str]:
         deck_data = self.user_decklists.get(
             user_id, {}
@@ -278,7 +313,9 @@ class DecklistBot:
 
         decklist_url = deck_data["url"]
 
-        valid, deck_data, error = self.do_decklist_check(decklist_url)
+        valid, deck_data, error = await self.do_decklist_check(
+            decklist_url, refresh
+        )
         self.user_decklists[user_id][deck_name].update(
             {
                 "deck": deck_data,
@@ -304,37 +341,49 @@ class DecklistBot:
         self.save_user_decklists()
         return valid, error
 
-    def do_decklist_check(self, limitless_url: str) -> tuple[dict, dict, str]:
+    async def do_decklist_check(
+        self, limitless_url: str, refresh: bool = False
+    ) -> tuple[dict, dict, str]:
         valid = self.check_limitless_url(limitless_url)
         if not valid:
             return {}, {}, "Invalid Limitless URL."
-        t = CustomThread(get_decklist_from_url, args=(limitless_url,))
-        t.start()
-        deck_data, error = t.join()
+        deck_url = canonicalize_limitless_url(limitless_url)
+        deck_data = None
+        if not refresh:
+            deck_data = self.decklist_cache.get(deck_url)
 
-        if error is not None:
-            return {}, {}, str(error)
+        if deck_data is None:
+            deck_data, error = await self.decklist_fetches.run(
+                deck_url, get_decklist_from_url, args=(deck_url,)
+            )
+
+            if error is not None:
+                return {}, {}, str(error)
+
+            self.decklist_cache.set(deck_url, deck_data)
+            self.save_decklist_cache()
 
         valid = self.validate_decklist_all_formats(deck_data)
         return valid, deck_data, None
 
+    def invalidate_validation_cache(self):
+        self.validation_cache.clear()
+
     def validate_decklist_all_formats(self, deck_data):
-        standard_valid, standard_error = validate_decklist(
-            deck_data, self.legal_cards, self.banned_cards["standard"])
-        expanded_valid, expanded_error = validate_decklist(
-            deck_data, self.legal_expanded_cards,
-            self.banned_cards["expanded"])
-        result = {
-            "standard": {
-                "valid": standard_valid,
-                "error": standard_error
-            },
-            "expanded": {
-                "valid": expanded_valid,
-                "error": expanded_error
-            }
-        }
-        return result
+        key = (
+            deck_hash(deck_data),
+            self.legal_cards_version,
+            self.banned_cards_version
+        )
+        result = self.validation_cache.get(key)
+        if result is None:
+            result = validate_decklist_formats(deck_data, {
+                format: (self.rulesets[format], self.banned_cards[format])
+                for format in DECKLIST_FORMATS
+            })
+            self.validation_cache.set(key, result)
+
+        return {format: data.copy() for format, data in result.items()}
 
     def check_limitless_url(self, url: str) -> tuple[bool]:
         clean = url.strip("https://").strip("http://")
@@ -1,15 +1,20 @@
 import json
 import discord
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from .pokemon import (
     get_store_events, get_premier_events,
     PokemonEvent, get_logo
 )
-from .helpers import MAINTENANCE_MODE_MESSAGE, CustomThread
+from .event_sync import plan_event_sync
+from .helpers import MAINTENANCE_MODE_MESSAGE, run_job
 from .core import DATA_FOLDER
 
 EVENTS_FILE = f"{DATA_FOLDER}/events_data.json"
+ENDED_EVENT_STATUSES = (
+    discord.ScheduledEventStatus.completed,
+    discord.ScheduledEventStatus.canceled
+)
 
 
 class EventsBot:
@@ -20,18 +25,21 @@ class EventsBot:
                 self.events_following = data.get("events", {})
                 self.premier_following = data.get("premier", {})
                 self.event_channels = data.get("channels", {})
+                self.scheduled_events = data.get("scheduled", {})
         except Exception as e:
             self.logger.warning(f"Error loading {EVENTS_FILE}: {e}")
             self.events_following = {}
             self.premier_following = {}
             self.event_channels = {}
+            self.scheduled_events = {}
 
     def save_events_data(self):
         try:
             data = {
                 "events": self.events_following,
                 "premier": self.premier_following,
-                "channels": self.event_channels
+                "channels": self.event_channels,
+                "scheduled": self.scheduled_events
             }
             with open(EVENTS_FILE, "w") as f:
                 json.dump(data, f, indent=4)
@@ -103,6 +111,66 @@ class EventsBot:
         async def remove_channel(ctx):
             await self.remove_events_channel(ctx)  # pragma: no cover
 
+        @self.bot.listen()
+        async def on_scheduled_event_create(event):
+            self.cache_guild_event(event.guild.id, event)  # pragma: no cover
+
+        @self.bot.listen()
+        async def on_scheduled_event_update(before, after):
+            self.cache_guild_event(after.guild.id, after)  # pragma: no cover
+
+        @self.bot.listen()
+        async def on_scheduled_event_delete(event):
+            self.drop_guild_event(event.guild.id, event)  # pragma: no cover
+
+        @self.bot.listen()
+        async def on_guild_available(guild):
+            self.seed_guild_events(guild)  # pragma: no cover
+
+        @self.bot.listen()
+        async def on_guild_unavailable(guild):
+            self.guild_event_index.pop(guild.id, None)  # pragma: no cover
+
+    def seed_guild_events(self, guild):
+        """Indexes the scheduled events sent with the guild when the bot
+        connects, so events changed while it was disconnected are not
+        missed."""
+        self.guild_event_index[guild.id] = {
+            event.id: event for event in guild.scheduled_events
+            if event.status not in ENDED_EVENT_STATUSES
+        }
+
+    def cache_guild_event(self, guild_id: int, event):
+        """Keeps the index of a seeded guild current, events that ended or
+        were canceled are dropped from it."""
+        if event.status in ENDED_EVENT_STATUSES:
+            self.drop_guild_event(guild_id, event)
+            return
+        events = self.guild_event_index.get(guild_id, None)
+        if events is not None:
+            events[event.id] = event
+
+    def drop_guild_event(self, guild_id: int, event):
+        events = self.guild_event_index.get(guild_id, None)
+        if events is not None:
+            events.pop(event.id, None)
+
+    async def get_guild(self, guild_id: int):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            guild = await self.bot.fetch_guild(guild_id)
+        return guild
+
+    async def get_guild_events(self, guild) -> list:
+        """The scheduled events of a guild, seeded when it becomes available
+        or fetched once over REST, then kept current by the listeners."""
+        events = self.guild_event_index.get(guild.id, None)
+        if events is None:
+            fetched = await guild.fetch_scheduled_events()
+            events = {event.id: event for event in fetched}
+            self.guild_event_index[guild.id] = events
+        return list(events.values())
+
     async def follow_premier_events(self, ctx):
         guild_id = str(ctx.guild.id)
         self.premier_following[guild_id] = True
@@ -185,29 +253,40 @@ class EventsBot:
             return
 
         events = []
+        store_errors = {}
         if premier:
-            t = CustomThread(get_premier_events)
-            t.start()
-            premier_events, error = t.join()
+            premier_events, error = await run_job(get_premier_events)
             if error is not None:
                 await ctx.respond(f"Error fetching premier events: {error}")
                 return
             events += premier_events
 
         if len(stores) > 0:
-            t = CustomThread(get_store_events, kwargs={"guids": stores})
-            t.start()
-            store_events, error = t.join()
+            result, error = await run_job(
+                get_store_events, kwargs={"guids": stores}
+            )
 
             if error is not None:
                 await ctx.respond(f"Error fetching store events: {error}")
                 return
 
+            store_events, store_errors = result
             for store in stores:
-                for event in store_events[store]:
+                for event in store_events.get(store, []):
                     events.append(event)
 
-        await self.update_guild_events(ctx.guild.id, events)
+        failed = [store for store in stores if store in store_errors]
+        await self.update_guild_events(ctx.guild.id, events, failed)
+
+        if failed:
+            errors = ", ".join(
+                f"{store}: {store_errors[store]}" for store in failed
+            )
+            await ctx.respond(
+                f"Events synced, error fetching store events: {errors}",
+                ephemeral=True
+            )
+            return
 
         await ctx.respond(
             "Events synced successfully!",
@@ -216,15 +295,16 @@ class EventsBot:
 
     async def delete_all_events(self, ctx):
         await ctx.defer(ephemeral=True)
-        guild = await self.bot.fetch_guild(ctx.guild.id)
+        guild = await self.get_guild(ctx.guild.id)
         channel = self.event_channels.get(str(ctx.guild.id), None)
         if channel is not None:
             channel = self.bot.get_channel(int(channel))
 
-        guild_events = await guild.fetch_scheduled_events()
+        guild_events = await self.get_guild_events(guild)
         for event in guild_events:
             if event.creator_id == self.bot.user.id:
                 await event.cancel()
+                self.drop_guild_event(guild.id, event)
 
                 if channel is None:
                     continue
@@ -252,42 +332,47 @@ class EventsBot:
     async def update_guild_events(
         self,
         guild_id: int,
-        events: list[PokemonEvent]
+        events: list[PokemonEvent],
+        failed_stores: list[str] = []
     ):
-        guild = await self.bot.fetch_guild(guild_id)
+        guild = await self.get_guild(guild_id)
         channel = self.event_channels.get(str(guild_id), None)
         if channel is not None:
             channel = self.bot.get_channel(int(channel))
 
-        guild_events = await guild.fetch_scheduled_events()
+        guild_events = await self.get_guild_events(guild)
         bot_events = [
             e for e in guild_events if e.creator_id == self.bot.user.id
         ]
-        keep_events = []
-
-        for event in events:
-            if event.start_date < datetime.now():
-                continue
+        plan = plan_event_sync(
+            events,
+            bot_events,
+            identities=self.scheduled_events.get(str(guild_id), {}),
+            failed_sources=set(failed_stores)
+        )
+        identities = plan.identities
+
+        for event, g_event in plan.edit:
+            updated = await g_event.edit(
+                name=event.name,
+                description=event.type,
+                location=event.location,
+                start_time=event.start_date,
+                end_time=event.end_date
+            )
+            if updated is None:
+                updated = g_event
+            self.cache_guild_event(guild.id, updated)
 
-            if event.type.lower().strip().startswith("league"):
+            if channel is None:
                 continue
 
-            already_exists = False
-            for g_event in bot_events:
-                g_start = g_event.start_time.replace(tzinfo=None)
-                g_end = g_event.end_time.replace(tzinfo=None)
-                if (
-                    g_event.name == event.name and
-                    g_start == event.start_date and
-                    g_end == event.end_date
-                ):
-                    keep_events.append(g_event)
-                    already_exists = True
-                    break
-
-            if already_exists:
-                continue
+            event_text = self.print_event(updated)
+            await channel.send(
+                "An event was updated!\n" + event_text
+            )
 
+        for event in plan.create:
             kwargs = {
                 "name": event.name,
                 "location": event.location,
@@ -297,11 +382,16 @@ class EventsBot:
                 "end_time": event.end_date
             }
 
-            logo_bytes = get_logo(event.logo)
-            if logo_bytes is not None:
+            logo_bytes, error = await run_job(get_logo, [event.logo])
+            if error is not None:
+                self.logger.warning(f"Error fetching {event.logo}: {error}")
+            elif logo_bytes is not None:
                 kwargs["image"] = logo_bytes
 
             new_event = await guild.create_scheduled_event(**kwargs)
+            self.cache_guild_event(guild.id, new_event)
+            if event.uid in plan.unique_uids:
+                identities[event.uid] = new_event.id
 
             if channel is None:
                 continue
@@ -311,18 +401,13 @@ class EventsBot:
                 "An event was created!\n" + event_text
             )
 
-        # Clean all old events:
-        for event in bot_events:
-            # Skip if already started
-            if event.start_time.replace(tzinfo=None) < datetime.now():
-                continue
-
-            # Skip if event still exists
-            if event in keep_events:
-                continue
+        self.scheduled_events[str(guild_id)] = identities
+        self.save_events_data()
 
-            # Delete the event
+        # Clean all old events:
+        for event in plan.cancel:
             await event.cancel()
+            self.drop_guild_event(guild.id, event)
 
             if channel is None:
                 continue
@@ -379,24 +464,30 @@ class EventsBot:
 
         premier_events = []
         if get_premier:
-            t = CustomThread(get_premier_events)
-            t.start()
-            premier_events, error = t.join()
+            premier_events, error = await run_job(get_premier_events)
 
             if error is not None:
                 self.logger.error(f"Error fetching premier events: {error}")
                 return
 
         store_events = {}
+        store_errors = {}
         if len(unique_guids) > 0:
-            t = CustomThread(get_store_events, kwargs={"guids": unique_guids})
-            t.start()
-            store_events, error = t.join()
+            result, error = await run_job(
+                get_store_events, kwargs={"guids": unique_guids}
+            )
 
             if error is not None:
                 self.logger.error(f"Error fetching store events: {error}")
                 return
 
+            store_events, store_errors = result
+
+            for store, store_error in store_errors.items():
+                self.logger.error(
+                    f"Error fetching events for store {store}: {store_error}"
+                )
+
         premier_servers = list(self.premier_following.keys())
         store_servers = list(self.events_following.keys())
         servers = list(set(premier_servers + store_servers))
@@ -405,6 +496,7 @@ class EventsBot:
             s_events = []
             s_premier = self.premier_following.get(server, False)
             s_stores = self.events_following.get(server, [])
+            failed = [store for store in s_stores if store in store_errors]
             if s_premier:
                 s_events += premier_events
             for store in s_stores:
@@ -415,5 +507,10 @@ class EventsBot:
                 self.logger.info(f"Skipping events for {server}.")
                 continue
 
+            if failed:
+                self.logger.info(
+                    f"Keeping the events of {', '.join(failed)} "
+                    f"for {server}, the stores failed."
+                )
             self.logger.info(f"Syncing events for {server}.")
-            await self.update_guild_events(int(server), s_events)
+            await self.update_guild_events(int(server), s_events, failed)
@@ -1,66 +1,90 @@
 import json
+import itertools
 
-from .core import load_card_database, convert_banned_cards, DATA_FOLDER
+from .core import (
+    read_card_file, build_card_database, convert_banned_cards, CardRuleset,
+    load_card_snapshot, save_card_snapshot, DATA_FOLDER
+)
 from .pkmncards import get_legal_cards, get_pokemon_sets
 from .pokemon import get_banned_cards
 
-from .helpers import CustomThread, MAINTENANCE_MODE_MESSAGE
+from .helpers import run_job, MAINTENANCE_MODE_MESSAGE
 
 LEGAL_CARDS_FILE = f"{DATA_FOLDER}/legal_cards.json"
 LEGAL_CARDS_EXPANDED_FILE = f"{DATA_FOLDER}/legal_expanded_cards.json"
+LEGAL_CARDS_SNAPSHOT = f"{DATA_FOLDER}/legal_cards.pickle"
+LEGAL_CARDS_EXPANDED_SNAPSHOT = f"{DATA_FOLDER}/legal_expanded_cards.pickle"
 BANNED_CARDS_FILE = f"{DATA_FOLDER}/banned_cards.json"
 SETS_FILE = f"{DATA_FOLDER}/card_sets.json"
 
+# version stamps handed to each legal/banned cards dataset when it is loaded
+DATA_VERSIONS = itertools.count(1)
+
 
 class LegalCardsBot:
-    def load_legal_cards(self):
+    def load_card_file(
+        self, filename: str, snapshot_filename: str
+    ) -> tuple[dict, dict | None, CardRuleset | None]:
+        snapshot = load_card_snapshot(
+            snapshot_filename, filename, self.banned_sets
+        )
+        if snapshot is not None:
+            return snapshot["raw"], snapshot["legal"], snapshot["ruleset"]
+
         try:
-            pokemon, trainers, energies, count = load_card_database(
-                LEGAL_CARDS_FILE,
-                self.banned_sets
-            )
-            self.legal_cards = {
-                "pokemon": pokemon,
-                "trainers": trainers,
-                "energies": energies,
-                "count": count
-            }
+            raw_cards = read_card_file(filename)
         except Exception as e:
-            self.logger.warning(f"Error loading legal cards database: {e}")
-            self.legal_cards = None
+            self.logger.warning(f"Error loading {filename}: {e}")
+            return {}, None, None
 
         try:
-            pokemon, trainers, energies, count = load_card_database(
-                LEGAL_CARDS_EXPANDED_FILE,
+            pokemon, trainers, energies, count = build_card_database(
+                raw_cards,
                 self.banned_sets
             )
-            self.legal_expanded_cards = {
-                "pokemon": pokemon,
-                "trainers": trainers,
-                "energies": energies,
-                "count": count
-            }
         except Exception as e:
-            self.logger.warning(
-                f"Error loading legal expanded cards database: {e}"
-            )
-            self.legal_expanded_cards = None
-
+            self.logger.warning(f"Error building {filename} database: {e}")
+            return raw_cards, None, None
+
+        legal_cards = {
+            "pokemon": pokemon,
+            "trainers": trainers,
+            "energies": energies,
+            "count": count
+        }
         try:
-            with open(LEGAL_CARDS_FILE, "r") as f:
-                self.raw_standard_cards = json.load(f)
+            ruleset = CardRuleset(legal_cards)
         except Exception as e:
-            self.logger.warning(f"Error loading {LEGAL_CARDS_FILE}: {e}")
-            self.raw_standard_cards = {}
+            self.logger.warning(f"Error compiling {filename} rules: {e}")
+            return raw_cards, legal_cards, None
 
         try:
-            with open(LEGAL_CARDS_EXPANDED_FILE, "r") as f:
-                self.raw_expanded_cards = json.load(f)
-        except Exception as e:
-            self.logger.warning(
-                f"Error loading {LEGAL_CARDS_EXPANDED_FILE}: {e}"
+            save_card_snapshot(
+                snapshot_filename, filename, self.banned_sets,
+                raw_cards, legal_cards, ruleset
             )
-            self.raw_expanded_cards = {}
+        except Exception as e:
+            self.logger.warning(f"Error saving {snapshot_filename}: {e}")
+
+        return raw_cards, legal_cards, ruleset
+
+    def load_legal_cards(self):
+        self.rulesets = {}
+        (
+            self.raw_standard_cards,
+            self.legal_cards,
+            self.rulesets["standard"]
+        ) = self.load_card_file(LEGAL_CARDS_FILE, LEGAL_CARDS_SNAPSHOT)
+        (
+            self.raw_expanded_cards,
+            self.legal_expanded_cards,
+            self.rulesets["expanded"]
+        ) = self.load_card_file(
+            LEGAL_CARDS_EXPANDED_FILE, LEGAL_CARDS_EXPANDED_SNAPSHOT
+        )
+
+        self.legal_cards_version = next(DATA_VERSIONS)
+        self.invalidate_validation_cache()
 
     def load_banned_cards(self):
         try:
@@ -70,6 +94,9 @@ class LegalCardsBot:
             self.logger.warning(f"Error loading {BANNED_CARDS_FILE}: {e}")
             self.banned_cards = {"standard": None, "expanded": None}
 
+        self.banned_cards_version = next(DATA_VERSIONS)
+        self.invalidate_validation_cache()
+
     def save_banned_cards(self):
         try:
             with open(BANNED_CARDS_FILE, "w") as f:
@@ -98,7 +125,7 @@ class LegalCardsBot:
         async def update_banned_cards(ctx):
             await self.get_banned_cards(ctx)  # pragma: no cover
 
-    def get_legal_cards_task(self):
+    async def get_legal_cards_task(self):
         self.logger.info("Updating legal cards...")
         if self.maintenance:
             self.logger.info(
@@ -106,18 +133,18 @@ class LegalCardsBot:
             )
             return
 
-        error = self.do_get_legal_cards()
+        error = await self.do_get_legal_cards()
         if error is not None:
             self.logger.error(f"Legal cards update failed. {error}")
             return
 
-        error = self.do_get_pokemon_sets()
+        error = await self.do_get_pokemon_sets()
         if error is not None:
             self.logger.error(f"Pokemon sets update failed. {error}")
             return
         self.logger.info("Legal cards updated successfully.")
 
-    def get_banned_cards_task(self):
+    async def get_banned_cards_task(self):
         self.logger.info("Updating banned cards...")
         if self.maintenance:
             self.logger.info(
@@ -125,7 +152,7 @@ class LegalCardsBot:
             )
             return
 
-        error = self.do_get_banned_cards()
+        error = await self.do_get_banned_cards()
         if error is not None:
             self.logger.error(f"Banned cards update failed. {error}")
             return
@@ -138,7 +165,7 @@ class LegalCardsBot:
             await ctx.respond(MAINTENANCE_MODE_MESSAGE, ephemeral=True)
             return
 
-        error = self.do_get_legal_cards()
+        error = await self.do_get_legal_cards()
         if error is not None:
             await ctx.respond(
                 f"Legal cards update failed! {error}",
@@ -146,7 +173,7 @@ class LegalCardsBot:
             )
             return
 
-        error = self.do_get_pokemon_sets()
+        error = await self.do_get_pokemon_sets()
         if error is not None:
             await ctx.respond(
                 f"Pokemon sets update failed! {error}",
@@ -163,7 +190,7 @@ class LegalCardsBot:
             await ctx.respond(MAINTENANCE_MODE_MESSAGE, ephemeral=True)
             return
 
-        error = self.do_get_banned_cards()
+        error = await self.do_get_banned_cards()
         if error is not None:
             await ctx.respond(
                 f"Banned cards update failed! {error}",
@@ -174,7 +201,7 @@ class LegalCardsBot:
         await ctx.respond(
             "Banned cards list has been updated!", ephemeral=True)
 
-    def do_get_legal_cards(self) -> Exception | None:
+    async def do_get_legal_cards(self) -> Exception | None:
         standard_count = 0
         expanded_count = 0
         if self.legal_cards is not None:
@@ -182,30 +209,38 @@ class LegalCardsBot:
         if self.legal_expanded_cards is not None:
             expanded_count = self.legal_expanded_cards.get("count", 0)
 
-        t = CustomThread(get_legal_cards, kwargs={
+        report, error = await run_job(get_legal_cards, kwargs={
             "standard_count": standard_count,
             "expanded_count": expanded_count,
             "filename": LEGAL_CARDS_FILE,
             "expanded_filename": LEGAL_CARDS_EXPANDED_FILE,
         })
-        t.start()
-        _, error = t.join()
+        errors = []
+        for format, format_report in (report or {}).items():
+            if "error" in format_report:
+                errors.append(f"{format}: {format_report['error']}")
+                continue
+            self.logger.info(
+                f"{format} cards sync ({format_report['mode']}): "
+                f"{format_report['new_cards']} new cards, "
+                f"{format_report['pages_fetched']} pages fetched, "
+                f"{format_report['pages_skipped']} pages skipped "
+                f"in {format_report['wall_time']:.1f}s"
+            )
         self.load_legal_cards()
+        if error is None and len(errors) > 0:
+            error = Exception(", ".join(errors))
         return error
 
-    def do_get_pokemon_sets(self) -> Exception | None:
-        t = CustomThread(get_pokemon_sets, kwargs={
+    async def do_get_pokemon_sets(self) -> Exception | None:
+        _, error = await run_job(get_pokemon_sets, kwargs={
             "filename": SETS_FILE
         })
-        t.start()
-        _, error = t.join()
         self.load_card_sets()
         return error
 
-    def do_get_banned_cards(self) -> Exception | None:
-        t = CustomThread(get_banned_cards)
-        t.start()
-        banned_cards, error = t.join()
+    async def do_get_banned_cards(self) -> Exception | None:
+        banned_cards, error = await run_job(get_banned_cards)
 
         if error is not None:
             return error
@@ -215,5 +250,7 @@ class LegalCardsBot:
             self.card_sets,
             self.raw_expanded_cards.get("cards", {})
         )
+        self.banned_cards_version = next(DATA_VERSIONS)
+        self.invalidate_validation_cache()
         self.save_banned_cards()
         return None
@@ -1,10 +1,25 @@
+import hashlib
 import json
 
 from .pokebeach import get_newsfeed
-from .helpers import CustomThread, MAINTENANCE_MODE_MESSAGE
+from .helpers import run_job, MAINTENANCE_MODE_MESSAGE
 from .core import DATA_FOLDER
 
 NEWSFEED_CHANNELS_FILE = f"{DATA_FOLDER}/newsfeed_channels.json"
+NEWSFEED_INTERVAL_HOURS = 6
+NEWSFEED_MIN_INTERVAL_HOURS = 1
+NEWSFEED_MAX_INTERVAL_HOURS = 12
+
+
+def hash_posts(posts: list[str]) -> str:
+    return hashlib.sha256("\n".join(posts).encode("utf-8")).hexdigest()
+
+
+def next_newsfeed_interval(hours: float, changed: bool) -> float:
+    """Polls twice as often after new articles, backs off while quiet."""
+    if changed:
+        return max(hours / 2, NEWSFEED_MIN_INTERVAL_HOURS)
+    return min(hours * 1.5, NEWSFEED_MAX_INTERVAL_HOURS)
 
 
 class NewsfeedBot:
@@ -15,6 +30,16 @@ class NewsfeedBot:
         except Exception as e:
             self.logger.warning(f"Error loading {NEWSFEED_CHANNELS_FILE}: {e}")
             self.newsfeed_channels = {}
+        self.newsfeed_interval = NEWSFEED_INTERVAL_HOURS
+        self.reset_newsfeed_poll()
+
+    def reset_newsfeed_poll(self):
+        """Forgets the last poll, so the next one fans out to every
+        channel again."""
+        self.newsfeed_validators = {}
+        self.newsfeed_hash = None
+        self.newsfeed_posts = []
+        self.newsfeed_pending = set()
 
     def save_newsfeed_channels(self):
         try:
@@ -45,6 +70,7 @@ class NewsfeedBot:
             self.newsfeed_channels[str(ctx.guild.id)] = {}
         self.newsfeed_channels[str(ctx.guild.id)]["channel_id"] = channel_id
         self.save_newsfeed_channels()
+        self.reset_newsfeed_poll()
         await ctx.respond(
             f"Newsfeed channel set to {ctx.channel.name}!",
             ephemeral=True
@@ -76,21 +102,60 @@ class NewsfeedBot:
             self.logger.info("Won't get newsfeed, Maintenance mode is active")
             return
 
-        await self.do_get_newsfeed()
-        self.logger.info("Newsfeed posts updated successfully.")
+        first_poll = self.newsfeed_hash is None
+        changed = await self.do_get_newsfeed()
+        if not first_poll:
+            self.newsfeed_interval = next_newsfeed_interval(
+                self.newsfeed_interval, changed
+            )
+        self.logger.info(
+            "Newsfeed posts updated successfully, next check in "
+            f"{self.newsfeed_interval:g} hours."
+        )
+
+    async def do_get_newsfeed(self) -> bool:
+        """Posts new articles, returns whether the article list changed.
 
-    async def do_get_newsfeed(self):
-        t = CustomThread(get_newsfeed)
-        t.start()
-        posts, _ = t.join()
+        The front page is fetched conditionally and the fan-out is skipped
+        when the article list hashes the same as on the last poll.
+        """
+        posts, error = await run_job(
+            get_newsfeed, [self.newsfeed_validators]
+        )
 
-        if not posts:
+        changed = False
+        if error is not None:
+            self.logger.error(f"Error fetching newsfeed posts: {error}")
+        elif posts is None:
+            self.logger.info("Newsfeed page not modified.")
+        elif not posts:
             self.logger.info("No newsfeed posts found.")
+        elif hash_posts(posts) == self.newsfeed_hash:
+            self.logger.info("No new newsfeed posts.")
+        else:
+            self.newsfeed_hash = hash_posts(posts)
+            self.newsfeed_posts = posts
+            self.newsfeed_pending = set(self.newsfeed_channels)
+            changed = True
+
+        await self.post_pending_newsfeed()
+        return changed
+
+    async def post_pending_newsfeed(self):
+        """Posts the last articles to the channels that haven't got them,
+        a channel that is not found is tried again on the next poll."""
+        if not self.newsfeed_pending:
             return
 
-        for guild_id, guild_config in self.newsfeed_channels.items():
-            channel_id = guild_config.get("channel_id")
+        posts = self.newsfeed_posts
+        for guild_id in sorted(self.newsfeed_pending):
+            guild_config = self.newsfeed_channels.get(guild_id, None)
+            if guild_config is None:
+                # newsfeed disabled since
+                self.newsfeed_pending.discard(guild_id)
+                continue
 
+            channel_id = guild_config.get("channel_id")
             latest_post = guild_config.get("latest_post", None)
             channel = self.bot.get_channel(int(channel_id))
 
@@ -111,6 +176,7 @@ class NewsfeedBot:
             for post in should_post[::-1]:
                 await channel.send(post)
 
-            self.newsfeed_channels[guild_id]["latest_post"] = posts[0]
+            guild_config["latest_post"] = posts[0]
+            self.newsfeed_pending.discard(guild_id)
 
         self.save_newsfeed_channels()
@@ -6,7 +6,7 @@ from datetime import datetime
 from .core import fill_sheet, DATA_FOLDER
 from .pokemon import get_decklist_png as get_sign_up_sheet
 
-from .helpers import CustomThread, MAINTENANCE_MODE_MESSAGE
+from .helpers import run_job, MAINTENANCE_MODE_MESSAGE
 
 OUTPUT_CHANNEL_NOT_SET_ERROR = (
     "Tournament output channel is not set for this server."
@@ -350,7 +350,9 @@ class TournamentBot:
             )
             return
 
-        result, deck_data, error = self.do_decklist_check(limitless_url)
+        result, deck_data, error = await self.do_decklist_check(
+            limitless_url
+        )
 
         if error is not None:
             await ctx.respond(
@@ -382,14 +384,14 @@ class TournamentBot:
             await ctx.respond(MAINTENANCE_MODE_MESSAGE, ephemeral=True)
             return
 
-        error = self.do_update_sheet()
+        error = await self.do_update_sheet()
         if error is None:
             msg = "Sheet has been updated!"
         else:
             msg = f"Failed to update sheet {error}"
         await ctx.respond(msg, ephemeral=True)
 
-    def update_signup_sheet_task(self):
+    async def update_signup_sheet_task(self):
         self.logger.info("Updating sign-up sheet...")
 
         if self.maintenance:
@@ -398,18 +400,16 @@ class TournamentBot:
             )
             return
 
-        error = self.do_update_sheet()
+        error = await self.do_update_sheet()
         if error is None:
             self.logger.info("Sign-up sheet updated successfully.")
         else:
             self.logger.error(f"Failed up update sign-up sheet {error}")
 
-    def do_update_sheet(self) -> Exception | None:
-        t = CustomThread(get_sign_up_sheet, kwargs={
+    async def do_update_sheet(self) -> Exception | None:
+        _, error = await run_job(get_sign_up_sheet, kwargs={
             "output_filename": SIGN_UP_SHEET_FILE
         })
-        t.start()
-        _, error = t.join()
         return error
 
     def check_sign_up_sheet(self) -> bool:
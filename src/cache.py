@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class TTLCache():
+    """Bounded LRU cache whose entries expire after `ttl` seconds.
+
+    When a filename is given the entries can be persisted as JSON with
+    load() and save(), so values must be JSON serializable.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl: float | None = 3600,
+        filename: str | None = None
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.filename = filename
+        self._items = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return self._get_entry(key) is not None
+
+    def _get_entry(self, key):
+        entry = self._items.get(key, None)
+        if entry is None:
+            return None
+        expires, _ = entry
+        if expires is not None and expires <= time.time():
+            del self._items[key]
+            return None
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._items.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        expires = None if self.ttl is None else time.time() + self.ttl
+        with self._lock:
+            self._items[key] = (expires, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._items.pop(key, None)
+        if entry is None:
+            return default
+        return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._items)
+        }
+
+    def load(self):
+        if self.filename is None:
+            return
+        with open(self.filename, "r") as f:
+            data = json.load(f)
+        now = time.time()
+        with self._lock:
+            self._items.clear()
+            for key, expires, value in data:
+                if expires is not None and expires <= now:
+                    continue
+                self._items[key] = (expires, value)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def save(self):
+        if self.filename is None:
+            return
+        with self._lock:
+            data = [
+                [key, expires, value]
+                for key, (expires, value) in self._items.items()
+            ]
+        with open(self.filename, "w") as f:
+            json.dump(data, f)
+
+
+class LogoCache():
+    """Size-bounded LRU disk cache of images keyed by url, stored once
+    per content hash, with the most used in memory."""
+
+    def __init__(
+        self,
+        folder: str,
+        max_bytes: int = 50 * 1024 * 1024,
+        memory_size: int = 64
+    ):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.memory = TTLCache(max_size=memory_size, ttl=None)
+        self._index = None
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def index_file(self) -> str:
+        return os.path.join(self.folder, "index.json")
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.folder, digest)
+
+    def _load(self) -> OrderedDict:
+        if self._index is None:
+            self._index = OrderedDict()
+            try:
+                with open(self.index_file, "r") as f:
+                    for url, digest, size in json.load(f):
+                        self._index[url] = (digest, size)
+            except (OSError, ValueError):
+                pass
+        return self._index
+
+    def _save(self):
+        with open(self.index_file, "w") as f:
+            json.dump(
+                [[url, d, size] for url, (d, size) in self._index.items()], f
+            )
+
+    def _read(self, digest: str) -> bytes | None:
+        content = self.memory.get(digest)
+        if content is not None:
+            return content
+        try:
+            with open(self._path(digest), "rb") as f:
+                content = f.read()
+        except OSError:
+            return None
+        self.memory.set(digest, content)
+        return content
+
+    def _total_bytes(self) -> int:
+        return sum(dict(self._index.values()).values())
+
+    def _evict(self):
+        total = self._total_bytes()
+        while total > self.max_bytes and len(self._index) > 1:
+            _, (digest, size) = self._index.popitem(last=False)
+            if any(d == digest for d, _ in self._index.values()):
+                continue
+            total -= size
+            self.memory.pop(digest)
+            try:
+                os.remove(self._path(digest))
+            except OSError:
+                pass
+
+    def get(self, url: str) -> bytes | None:
+        with self._lock:
+            entry = self._load().get(url, None)
+            content = None
+            if entry is not None:
+                content = self._read(entry[0])
+            if content is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._index.move_to_end(url)
+            return content
+
+    def set(self, url: str, content: bytes):
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            index = self._load()
+            os.makedirs(self.folder, exist_ok=True)
+            if not os.path.exists(self._path(digest)):
+                with open(self._path(digest), "wb") as f:
+                    f.write(content)
+            self.memory.set(digest, content)
+            index[url] = (digest, len(content))
+            index.move_to_end(url)
+            self._evict()
+            self._save()
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            index = self._load()
+            files = dict(index.values())
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "urls": len(index),
+            "files": len(files),
+            "bytes": sum(files.values())
+        }
@@ -0,0 +1,83 @@
+import asyncio
+import base64
+import json
+
+import mycdp
+
+from .waits import wait_until
+
+CAPTURE_POLL_INTERVAL = 0.1
+
+
+class JSONResponseCapture():
+    """Collects the JSON bodies of the responses a page receives.
+
+    Only responses whose url contains url_pattern are kept. Use it as a
+    context manager around the actions that trigger the requests, the
+    CDP handlers are removed on exit.
+    """
+
+    def __init__(self, sb, url_pattern: str):
+        self.sb = sb
+        self.url_pattern = url_pattern
+        self.payloads = []
+        self._urls = {}
+        self._finished = []
+
+    def __enter__(self):
+        self.sb.cdp.add_handler(
+            mycdp.network.ResponseReceived, self._on_response
+        )
+        self.sb.cdp.add_handler(
+            mycdp.network.LoadingFinished, self._on_finished
+        )
+        return self
+
+    def __exit__(self, *args):
+        handlers = self.sb.cdp.page.handlers
+        for event, handler in (
+            (mycdp.network.ResponseReceived, self._on_response),
+            (mycdp.network.LoadingFinished, self._on_finished)
+        ):
+            if handler in handlers.get(event, []):
+                handlers[event].remove(handler)
+
+    def _on_response(self, event):
+        if self.url_pattern in event.response.url:
+            self._urls[event.request_id] = event.response.url
+
+    def _on_finished(self, event):
+        if event.request_id in self._urls:
+            self._finished.append(event.request_id)
+
+    def _run(self, coroutine):
+        return self.sb.cdp.loop.run_until_complete(coroutine)
+
+    def collect(self) -> int:
+        """Lets pending CDP events through and reads the bodies of the
+        finished responses, returns how many new payloads were read."""
+        self._run(asyncio.sleep(CAPTURE_POLL_INTERVAL))
+        count = 0
+        while self._finished:
+            request_id = self._finished.pop(0)
+            try:
+                body, encoded = self._run(self.sb.cdp.page.send(
+                    mycdp.network.get_response_body(request_id)
+                ))
+                if encoded:
+                    body = base64.b64decode(body).decode("utf-8")
+                self.payloads.append(json.loads(body))
+                count += 1
+            except Exception:
+                # not json, or the body is no longer available
+                continue
+        return count
+
+    def wait_for_payload(self, name: str, timeout: float) -> bool:
+        """Waits until at least one new payload is read."""
+        return wait_until(
+            lambda: self.collect() > 0,
+            name,
+            timeout=timeout,
+            poll_interval=0
+        )
@@ -1,4 +1,8 @@
+import hashlib
 import json
+import os
+import pickle
+import sys
 
 from PIL import Image
 from PIL import ImageFont
@@ -28,6 +32,11 @@ REPLACE_CHARACTERS = {
     "›": ">",
 }
 
+SNAPSHOT_VERSION = 1
+
+ACE_SPEC_RARITY = "ACE SPEC Rare"
+BASIC_ENERGY_NAMES = frozenset(f"{t} energy" for t in ENERGY_TYPES)
+
 
 def get_offset(card_type: str, amount: int) -> int:
     if card_type == "pokemon":
@@ -158,173 +167,417 @@ def remove_types_from_card_name(card_name: str) -> str:
     return new_name.replace("  ", " ").strip()
 
 
-def load_card_database(
-    filename: str = "legal_cards.json",
-    banned_sets: list[str] = []
-) -> tuple[dict, dict, dict, int]:
+def read_card_file(filename: str) -> dict:
     if not filename.endswith(".json"):
         raise ValueError("Filename must be a JSON file.")
     try:
         with open(filename, "r") as f:
-            data = json.load(f)
+            return json.load(f)
     except Exception:
         raise ValueError("Error loading JSON file.")
 
+
+class Card():
+    """A card database entry.
+
+    Repeated strings are interned so thousands of cards share them, and
+    item access is kept so code written against card dicts still works.
+    """
+    __slots__ = ("name", "type", "color", "rarity", "link", "set_code")
+
+    def __init__(
+        self,
+        name: str,
+        type: str,
+        color: str = "",
+        rarity: str = "",
+        link: str = "",
+        set_code: str = ""
+    ):
+        self.name = sys.intern(name)
+        self.type = sys.intern(type)
+        self.color = sys.intern(color)
+        self.rarity = sys.intern(rarity)
+        self.link = link
+        self.set_code = sys.intern(set_code)
+
+    @classmethod
+    def from_dict(cls, data: dict, set_code: str = "") -> "Card":
+        return cls(
+            remove_types_from_card_name(data["name"]),
+            data["type"],
+            data.get("color", ""),
+            data.get("rarity", ""),
+            data.get("link", ""),
+            set_code
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "color": self.color,
+            "rarity": self.rarity,
+            "link": self.link
+        }
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Card):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot)
+            for slot in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        return f"Card({self.set_code} {self.name!r}, {self.type!r})"
+
+
+def build_card_database(
+    data: dict,
+    banned_sets: list[str] = []
+) -> tuple[dict, dict, dict, int]:
+    """Categorizes the cards of a parsed card file.
+
+    The card dicts in data are replaced by Card records that the
+    categorized view shares, rather than being copied.
+    """
     pokemon = {}
     trainers = {}
     energies = {}
     count = data.get("count", 0)
 
     for set_name, cards in data.get("cards", {}).items():
-        if set_name in banned_sets:
-            continue
+        set_name = sys.intern(set_name)
         for card_number, card_info in cards.items():
-            card_info["name"] = remove_types_from_card_name(card_info["name"])
-            if card_info["type"].startswith("Pkmn"):
+            if not isinstance(card_info, Card):
+                card_info = Card.from_dict(card_info, set_name)
+                cards[card_number] = card_info
+
+            if set_name in banned_sets:
+                continue
+            if card_info.type.startswith("Pkmn"):
                 if card_number.isdigit():
                     clean_number = str(int(card_number))
                 else:
                     clean_number = card_number.strip()
-                pokemon.setdefault(set_name, {})[
-                    clean_number
-                ] = card_info.copy()
-            elif card_info["type"].startswith("Trainer"):
-                trainers[card_info["name"]] = card_info.copy()
+                pokemon.setdefault(set_name, {})[clean_number] = card_info
+            elif card_info.type.startswith("Trainer"):
+                trainers[card_info.name] = card_info
             elif (
-                card_info["type"].startswith("Energy") and
-                not card_info["type"].endswith("Basic")
+                card_info.type.startswith("Energy") and
+                not card_info.type.endswith("Basic")
             ):
-                energies[card_info["name"]] = card_info.copy()
+                energies[card_info.name] = card_info
 
     return pokemon, trainers, energies, count
 
 
-def validate_decklist(
-    decklist: dict,
-    legal_cards: dict | None = None,
-    banned_cards: dict | None = None,
-) -> tuple[bool, str]:
-    # check 60 card deck
-    pokemon_count = sum(
-        card["quantity"] for card in decklist.get("pokemon", [])
-    )
-    trainer_count = sum(
-        card["quantity"] for card in decklist.get("trainers", {}).values()
-    )
-    energy_count = sum(
-        card["quantity"] for card in decklist.get("energies", {}).values()
-    )
-    count = pokemon_count + trainer_count + energy_count
-    if count != 60:
-        return False, "Decklist must contain exactly 60 cards."
+def load_card_database(
+    filename: str = "legal_cards.json",
+    banned_sets: list[str] = []
+) -> tuple[dict, dict, dict, int]:
+    return build_card_database(read_card_file(filename), banned_sets)
 
-    # check if at least 1 pokemon
-    if pokemon_count < 1:
-        return False, "Decklist must contain at least 1 Pokémon."
 
-    # check max 4 copies of each card
-    quantities_by_name = {}
-    for card in decklist.get("pokemon", []):
-        quantities_by_name[card["name"].lower()] = quantities_by_name.get(
-            card["name"].lower(), 0
-        ) + card["quantity"]
-
-    for card, data in decklist.get("trainers", {}).items():
-        quantities_by_name[card.lower()] = quantities_by_name.get(
-            card.lower(), 0
-        ) + data["quantity"]
-
-    for card, data in decklist.get("energies", {}).items():
-        quantities_by_name[card.lower()] = quantities_by_name.get(
-            card.lower(), 0
-        ) + data["quantity"]
-
-    exemptions = [f"{t} energy" for t in ENERGY_TYPES]
-    for name, quantity in quantities_by_name.items():
-        if quantity > 4 and name not in exemptions:
-            return False, f"Card {name} exceeds the maximum of 4 copies."
-
-    if legal_cards is not None:
-        # ace spec cards can only be included once
-        ace_spec_trainers = [
-            card_name.lower() for
-            card_name, card in legal_cards["trainers"].items()
-            if card["rarity"] == "ACE SPEC Rare"
-        ]
-        ace_spec_energies = [
-            card_name.lower() for
-            card_name, card in legal_cards["energies"].items()
-            if card["rarity"] == "ACE SPEC Rare"
-        ]
-        total_ace_specs = sum(
-            quantities_by_name[card.lower()] for
-            card in quantities_by_name.keys()
-            if card.lower() in ace_spec_trainers
-            or card.lower() in ace_spec_energies
+class CardRuleset():
+    """Validation lookups compiled once per loaded card database."""
+
+    def __init__(self, legal_cards: dict):
+        self.pokemon = legal_cards["pokemon"]
+        self.trainer_names = frozenset(legal_cards["trainers"])
+        self.energy_names = frozenset(legal_cards["energies"])
+        self.ace_spec_names = frozenset(
+            card_name.lower()
+            for cards in (legal_cards["trainers"], legal_cards["energies"])
+            for card_name, card in cards.items()
+            if card.rarity == ACE_SPEC_RARITY
+        )
+        self.basic_pokemon = frozenset(
+            (set_name, card_number)
+            for set_name, cards in self.pokemon.items()
+            for card_number, card in cards.items()
+            if card.type.startswith("Pkmn") and "Basic" in card.type
         )
-        if total_ace_specs > 1:
-            return False, "Decklist can only contain one Ace Spec card."
-
-        # check if all pokemon cards are legal and at least 1 basic pokemon
-        basic_pokemon_found = False
-        for card in decklist.get("pokemon", []):
-            card_info = legal_cards["pokemon"].get(
-                card["set"], {}
-            ).get(str(card["number"]), None)
-            if card_info is None:
-                return False, (
-                    f"Card {card['name']} from set {card['set']}"
-                    " is not legal."
-                )
 
-            if (
-                card_info["type"].startswith("Pkmn")
-                and "Basic" in card_info["type"]
-            ):
-                basic_pokemon_found = True
+    def is_legal_pokemon(self, set_name: str, card_number: str) -> bool:
+        return card_number in self.pokemon.get(set_name, {})
+
+    def is_basic_pokemon(self, set_name: str, card_number: str) -> bool:
+        return (set_name, card_number) in self.basic_pokemon
+
+
+def file_sha256(filename: str) -> str:
+    with open(filename, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-        if not basic_pokemon_found:
-            return False, "Decklist must contain at least one Basic Pokémon."
 
-        # check if all trainer cards are legal
-        for card_name, quantity in decklist.get("trainers", {}).items():
-            if card_name not in legal_cards["trainers"]:
-                return False, f"Trainer card {card_name} is not legal."
+def save_card_snapshot(
+    filename: str,
+    source_filename: str,
+    banned_sets: list[str],
+    raw_cards: dict,
+    legal_cards: dict,
+    ruleset: CardRuleset | None
+):
+    """Pickles a parsed card database next to the JSON file it came from.
+
+    The source file's mtime, size and hash are stored so that
+    load_card_snapshot can tell when the snapshot is stale.
+    """
+    stat = os.stat(source_filename)
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "source": {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": file_sha256(source_filename)
+        },
+        "banned_sets": sorted(banned_sets),
+        "raw": raw_cards,
+        "legal": legal_cards,
+        "ruleset": ruleset
+    }
+    temp_filename = f"{filename}.tmp"
+    with open(temp_filename, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_filename, filename)
+
+
+def load_card_snapshot(
+    filename: str,
+    source_filename: str,
+    banned_sets: list[str] = []
+) -> dict | None:
+    """Returns the snapshot of source_filename, or None if it is stale."""
+    try:
+        with open(filename, "rb") as f:
+            snapshot = pickle.load(f)
+        source = snapshot["source"]
+        stat = os.stat(source_filename)
+    except Exception:
+        return None
+
+    if (
+        snapshot.get("version") != SNAPSHOT_VERSION
+        or snapshot["banned_sets"] != sorted(banned_sets)
+        or stat.st_size != source["size"]
+    ):
+        return None
+
+    # a touched but unchanged source file keeps its snapshot
+    if (
+        stat.st_mtime_ns != source["mtime"]
+        and file_sha256(source_filename) != source["sha256"]
+    ):
+        return None
+
+    return snapshot
+
+
+def deck_hash(decklist: dict) -> str:
+    """Hash of the cards in a decklist, ignoring the order they are listed."""
+    canonical = {
+        "pokemon": sorted(
+            [
+                card["name"], str(card.get("set", "")),
+                str(card.get("number", "")), card["quantity"]
+            ]
+            for card in decklist.get("pokemon", [])
+        ),
+        "trainers": sorted(
+            [card_name, data["quantity"]]
+            for card_name, data in decklist.get("trainers", {}).items()
+        ),
+        "energies": sorted(
+            [card_name, data["quantity"]]
+            for card_name, data in decklist.get("energies", {}).items()
+        )
+    }
+    return hashlib.sha256(
+        json.dumps(canonical, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+VALIDATION_STAGES = (
+    "ace_spec",
+    "illegal_pokemon",
+    "basic_pokemon",
+    "illegal_trainer",
+    "illegal_energy",
+    "banned_pokemon",
+    "banned_trainer",
+    "banned_energy"
+)
+
+
+def validate_decklist_formats(
+    decklist: dict,
+    formats: dict[str, tuple[CardRuleset | None, dict | None]]
+) -> dict[str, dict]:
+    """Validates a decklist against several formats in one walk of the deck.
+
+    formats maps a format name to a (ruleset, banned_cards) pair, either
+    can be None to skip those checks. Each format gets the error that
+    validate_decklist would have returned for it on its own.
+    """
+    pokemon_list = decklist.get("pokemon", [])
+    trainers = decklist.get("trainers", {})
+    energies = decklist.get("energies", {})
+
+    # per format: first error of each stage, rules, banned cards and the
+    # running ace spec total
+    checks = [
+        ({}, ruleset, banned_cards, [0])
+        for ruleset, banned_cards in formats.values()
+    ]
+    quantities_by_name = {}
+    pokemon_count = 0
+    count = 0
+
+    for card in pokemon_list:
+        name = card["name"].lower()
+        quantity = card["quantity"]
+        quantities_by_name[name] = quantities_by_name.get(name, 0) + quantity
+        pokemon_count += quantity
+        set_name = card.get("set", None)
+        card_number = str(card.get("number", ""))
+
+        for errors, ruleset, banned_cards, ace_specs in checks:
+            if ruleset is not None:
+                if name in ruleset.ace_spec_names:
+                    ace_specs[0] += quantity
+                if not ruleset.is_legal_pokemon(set_name, card_number):
+                    errors.setdefault("illegal_pokemon", (
+                        f"Card {card['name']} from set {set_name}"
+                        " is not legal."
+                    ))
+                elif ruleset.is_basic_pokemon(set_name, card_number):
+                    errors["basic_found"] = True
+
+            if banned_cards is not None:
+                banned_set = banned_cards["pokemon"].get(set_name, [])
+                if card_number in banned_set:
+                    errors.setdefault("banned_pokemon", (
+                        f"Card {card['name']} from set {set_name}"
+                        " is banned."
+                    ))
+
+    count += pokemon_count
+    for card_name, data in trainers.items():
+        name = card_name.lower()
+        quantity = data["quantity"]
+        quantities_by_name[name] = quantities_by_name.get(name, 0) + quantity
+        count += quantity
+
+        for errors, ruleset, banned_cards, ace_specs in checks:
+            if ruleset is not None:
+                if name in ruleset.ace_spec_names:
+                    ace_specs[0] += quantity
+                if card_name not in ruleset.trainer_names:
+                    errors.setdefault(
+                        "illegal_trainer",
+                        f"Trainer card {card_name} is not legal."
+                    )
 
-        # check if all energy cards are legal
-        for card_name, quantity in decklist.get("energies", {}).items():
             if (
-                card_name not in legal_cards["energies"]
-                and card_name.lower() not in exemptions
+                banned_cards is not None
+                and card_name in banned_cards["trainers"]
             ):
-                return False, f"Energy card {card_name} is not legal."
-
-    if banned_cards is not None:
-        # check if all pokemon cards are not banned
-        for card in decklist.get("pokemon", []):
-            banned_set = banned_cards["pokemon"].get(card["set"], [])
-            if str(card["number"]) in banned_set:
-                return False, (
-                    f"Card {card['name']} from set {card['set']}"
-                    " is banned."
+                errors.setdefault(
+                    "banned_trainer", f"Trainer card {card_name} is banned."
                 )
 
-        # check if all trainer cards are not banned
-        for card_name in decklist.get("trainers", {}):
-            if card_name in banned_cards["trainers"]:
-                return False, (
-                    f"Trainer card {card_name} is banned."
-                )
+    for card_name, data in energies.items():
+        name = card_name.lower()
+        quantity = data["quantity"]
+        quantities_by_name[name] = quantities_by_name.get(name, 0) + quantity
+        count += quantity
+        basic_energy = name in BASIC_ENERGY_NAMES
+
+        for errors, ruleset, banned_cards, ace_specs in checks:
+            if ruleset is not None:
+                if name in ruleset.ace_spec_names:
+                    ace_specs[0] += quantity
+                if card_name not in ruleset.energy_names and not basic_energy:
+                    errors.setdefault(
+                        "illegal_energy",
+                        f"Energy card {card_name} is not legal."
+                    )
 
-        # check if all energy cards are not banned
-        for card_name in decklist.get("energies", {}):
             if (
-                card_name in banned_cards["energies"]
-                and card_name.lower() not in exemptions
+                banned_cards is not None
+                and card_name in banned_cards["energies"]
+                and not basic_energy
             ):
-                return False, f"Energy card {card_name} is banned."
+                errors.setdefault(
+                    "banned_energy", f"Energy card {card_name} is banned."
+                )
+
+    # checks shared by every format
+    shared_error = None
+    if count != 60:
+        shared_error = "Decklist must contain exactly 60 cards."
+    elif pokemon_count < 1:
+        shared_error = "Decklist must contain at least 1 Pokémon."
+    else:
+        for name, quantity in quantities_by_name.items():
+            if quantity > 4 and name not in BASIC_ENERGY_NAMES:
+                shared_error = (
+                    f"Card {name} exceeds the maximum of 4 copies."
+                )
+                break
+
+    results = {}
+    for format, (errors, ruleset, banned_cards, ace_specs) in zip(
+        formats, checks
+    ):
+        if shared_error is not None:
+            results[format] = {"valid": False, "error": shared_error}
+            continue
+
+        if ruleset is not None:
+            if ace_specs[0] > 1:
+                errors["ace_spec"] = (
+                    "Decklist can only contain one Ace Spec card."
+                )
+            if not errors.get("basic_found", False):
+                errors["basic_pokemon"] = (
+                    "Decklist must contain at least one Basic Pokémon."
+                )
+
+        error = next(
+            (errors[stage] for stage in VALIDATION_STAGES if stage in errors),
+            ""
+        )
+        results[format] = {"valid": error == "", "error": error}
+
+    return results
+
+
+def validate_decklist(
+    decklist: dict,
+    legal_cards: dict | None = None,
+    banned_cards: dict | None = None,
+    ruleset: CardRuleset | None = None
+) -> tuple[bool, str]:
+    if ruleset is None and legal_cards is not None:
+        ruleset = CardRuleset(legal_cards)
 
-    return True, ""
+    result = validate_decklist_formats(
+        decklist, {"deck": (ruleset, banned_cards)}
+    )["deck"]
+    return result["valid"], result["error"]
 
 
 def convert_banned_cards(banned_cards: dict, sets: dict, expanded_cards: dict):
@@ -356,16 +609,18 @@ def convert_banned_cards(banned_cards: dict, sets: dict, expanded_cards: dict):
                 )
 
             card_info = expanded_cards[set_code][set_nr]
-            if card_info["type"].startswith("Pkmn"):
+            if not isinstance(card_info, Card):
+                card_info = Card.from_dict(card_info, set_code)
+            if card_info.type.startswith("Pkmn"):
                 category = "pokemon"
-            elif card_info["type"].startswith("Trainer"):
+            elif card_info.type.startswith("Trainer"):
                 category = "trainers"
-            elif card_info["type"].startswith("Energy"):
+            elif card_info.type.startswith("Energy"):
                 category = "energies"
             else:
                 raise Exception(
                     f"Card {set_code}-{set_nr}"
-                    f" has unknown type {card_info['type']}."
+                    f" has unknown type {card_info.type}."
                 )
 
             if category == "pokemon":
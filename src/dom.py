@@ -0,0 +1,24 @@
+import json
+
+# Mirrors the CDP Element.text the scrapers used to read: every text node
+# under the element joined with " ", then trimmed.
+NODE_TEXT_JS = """const nodeText = (element) => {
+    if (!element) {
+        return "";
+    }
+    const walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT);
+    const parts = [];
+    while (walker.nextNode()) {
+        parts.push(walker.currentNode.nodeValue);
+    }
+    return parts.join(" ").trim();
+};"""
+
+
+def evaluate_json(sb, script: str):
+    """Runs script in the page and decodes the JSON string it returns.
+
+    Scripts collect everything a scraper needs in one CDP round trip,
+    instead of one round trip per element, child or text lookup.
+    """
+    return json.loads(sb.cdp.evaluate(script))
@@ -0,0 +1,297 @@
+import atexit
+import logging
+import os
+import time
+from contextlib import contextmanager
+from threading import Condition
+
+import mycdp
+from seleniumbase import Driver
+
+DRIVER_OPTIONS = {"uc": True, "locale_code": "en", "ad_block": True}
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_PAGES = 50
+DEFAULT_MAX_MEMORY_MB = 2048
+BLANK_PAGE = "about:blank"
+PROC_FOLDER = "/proc"
+
+# Network.setBlockedURLs patterns, "*" matches any run of characters
+BLOCKED_EXTENSIONS = (
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp",
+    "mp4", "webm", "mp3", "m4a", "ogg", "wav",
+    "woff", "woff2", "ttf", "otf", "eot"
+)
+BLOCKED_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "facebook.net", "connect.facebook.com",
+    "hotjar.com", "clarity.ms", "scorecardresearch.com", "quantserve.com",
+    "newrelic.com", "nr-data.net", "segment.io", "optimizely.com"
+)
+BLOCKED_URLS = [
+    f"*.{extension}*" for extension in BLOCKED_EXTENSIONS
+] + [f"*{domain}/*" for domain in BLOCKED_DOMAINS]
+
+logger = logging.getLogger("decklist_bot.driver_pool")
+
+
+def read_proc_status(pid) -> dict:
+    status = {}
+    with open(f"{PROC_FOLDER}/{pid}/status", "r") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            status[key] = value.strip()
+    return status
+
+
+def get_process_tree(pid: int) -> list[int]:
+    """pid and all of its descendants, linked by the PPid in /proc."""
+    children = {}
+    for entry in os.listdir(PROC_FOLDER):
+        if not entry.isdigit():
+            continue
+        try:
+            parent = int(read_proc_status(entry).get("PPid", 0))
+        except Exception:
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    tree = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending += children.get(current, [])
+    return tree
+
+
+def get_driver_memory_mb(sb) -> float | None:
+    """Resident memory of the browser and the renderer, GPU and utility
+    processes it started, None if unknown."""
+    pid = getattr(sb, "browser_pid", None)
+    if not isinstance(pid, int):
+        return None
+    try:
+        tree = get_process_tree(pid)
+    except Exception:
+        return None
+
+    total_kb = None
+    for process in tree:
+        try:
+            rss = read_proc_status(process).get("VmRSS", None)
+        except Exception:
+            # exited since the tree was read
+            continue
+        if rss is not None:
+            total_kb = (total_kb or 0) + int(rss.split()[0])
+    if total_kb is None:
+        return None
+    return total_kb / 1024
+
+
+class DriverPool():
+    """Keeps warm browser instances and leases them to the scrapers.
+
+    A driver is recycled (quit and replaced on the next lease) once it has
+    opened `max_pages` pages, its browser processes together use more than
+    `max_memory_mb`, or the scraper holding it raised an exception.
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        max_memory_mb: int | None = DEFAULT_MAX_MEMORY_MB
+    ):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self._condition = Condition()
+        self._idle = []
+        self._pages = {}
+        self._traffic = {}
+        self._block_resources = {}
+        self._total = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "recycled": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "page_loads": {
+                profile: {
+                    "count": 0, "load_time": 0.0, "bytes": 0, "blocked": 0
+                }
+                for profile in ("blocking", "full")
+            }
+        }
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            stats = self.stats.copy()
+            stats["page_loads"] = {
+                profile: loads.copy()
+                for profile, loads in self.stats["page_loads"].items()
+            }
+            stats["idle"] = len(self._idle)
+            stats["total"] = self._total
+        leases = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / leases if leases else 0.0
+        return stats
+
+    def acquire(self):
+        start = time.monotonic()
+        waited = False
+        sb = None
+        with self._condition:
+            while len(self._idle) == 0 and self._total >= self.size:
+                waited = True
+                self._condition.wait()
+
+            if len(self._idle) > 0:
+                sb = self._idle.pop()
+                self.stats["hits"] += 1
+            else:
+                self._total += 1
+                self.stats["misses"] += 1
+
+            if waited:
+                self.stats["waits"] += 1
+                self.stats["wait_time"] += time.monotonic() - start
+
+        if sb is not None:
+            return sb
+
+        try:
+            sb = Driver(**DRIVER_OPTIONS)
+        except Exception:
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._pages[id(sb)] = 0
+        return sb
+
+    def should_recycle(self, sb) -> bool:
+        if self._pages.get(id(sb), 0) >= self.max_pages:
+            return True
+        if self.max_memory_mb is not None:
+            memory = get_driver_memory_mb(sb)
+            if memory is not None and memory > self.max_memory_mb:
+                return True
+        return False
+
+    def release(self, sb, discard: bool = False):
+        if discard or self.should_recycle(sb):
+            try:
+                sb.quit()
+            except Exception:
+                pass
+            with self._condition:
+                self._pages.pop(id(sb), None)
+                self._traffic.pop(id(sb), None)
+                self._block_resources.pop(id(sb), None)
+                self._total -= 1
+                self.stats["recycled"] += 1
+                self._condition.notify()
+            return
+
+        with self._condition:
+            self._idle.append(sb)
+            self._condition.notify()
+
+    @contextmanager
+    def lease(self, block_resources: bool = False):
+        """Leases a driver, pages opened with it skip images, media, fonts
+        and analytics requests when block_resources is set."""
+        sb = self.acquire()
+        with self._condition:
+            self._block_resources[id(sb)] = block_resources
+        try:
+            yield sb
+        except BaseException:
+            self.release(sb, discard=True)
+            raise
+        self.release(sb)
+
+    def _watch_traffic(self, sb) -> dict:
+        traffic = {"bytes": 0, "blocked": 0, "blocking": False}
+
+        def on_finished(event):
+            traffic["bytes"] += int(event.encoded_data_length)
+
+        def on_failed(event):
+            if event.blocked_reason is not None:
+                traffic["blocked"] += 1
+
+        sb.cdp.add_handler(mycdp.network.LoadingFinished, on_finished)
+        sb.cdp.add_handler(mycdp.network.LoadingFailed, on_failed)
+        self._send(sb, mycdp.network.enable())
+        return traffic
+
+    def _send(self, sb, command):
+        sb.cdp.loop.run_until_complete(sb.cdp.page.send(command))
+
+    def open(self, sb, url: str):
+        """Navigate a leased driver, activating CDP mode on first use.
+
+        Logs the load time, bytes transferred and requests blocked, which
+        are also added up per profile in the pool stats.
+        """
+        if self._pages.get(id(sb), 0) == 0:
+            sb.uc_activate_cdp_mode(BLANK_PAGE)
+            self._traffic[id(sb)] = self._watch_traffic(sb)
+
+        traffic = self._traffic[id(sb)]
+        block_resources = self._block_resources.get(id(sb), False)
+        if traffic["blocking"] != block_resources:
+            urls = BLOCKED_URLS if block_resources else []
+            self._send(sb, mycdp.network.set_blocked_urls(urls=urls))
+            traffic["blocking"] = block_resources
+
+        start = time.monotonic()
+        bytes_before, blocked_before = traffic["bytes"], traffic["blocked"]
+        sb.cdp.open(url)
+        load_time = time.monotonic() - start
+        transferred = traffic["bytes"] - bytes_before
+        blocked = traffic["blocked"] - blocked_before
+
+        profile = "blocking" if block_resources else "full"
+        with self._condition:
+            self._pages[id(sb)] = self._pages.get(id(sb), 0) + 1
+            loads = self.stats["page_loads"][profile]
+            loads["count"] += 1
+            loads["load_time"] += load_time
+            loads["bytes"] += transferred
+            loads["blocked"] += blocked
+
+        logger.info(
+            f"Loaded {url} in {load_time:.2f}s, {transferred / 1024:.0f} KiB"
+            f" transferred, {blocked} requests blocked ({profile})"
+        )
+
+    def close(self):
+        with self._condition:
+            idle = self._idle
+            self._idle = []
+            for sb in idle:
+                self._pages.pop(id(sb), None)
+                self._traffic.pop(id(sb), None)
+                self._block_resources.pop(id(sb), None)
+            self._total -= len(idle)
+            self._condition.notify_all()
+
+        for sb in idle:
+            try:
+                sb.quit()
+            except Exception:
+                pass
+
+
+DRIVER_POOL = DriverPool()
+atexit.register(DRIVER_POOL.close)
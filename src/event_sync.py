@@ -0,0 +1,149 @@
+from collections import Counter
+from datetime import datetime
+
+from .pokemon import PokemonEvent
+
+
+def event_key(name: str, start: datetime, end: datetime) -> tuple:
+    return (name, start.replace(tzinfo=None), end.replace(tzinfo=None))
+
+
+def scraped_event_key(event: PokemonEvent) -> tuple:
+    return event_key(event.name, event.start_date, event.end_date)
+
+
+def guild_event_key(event) -> tuple:
+    return event_key(event.name, event.start_time, event.end_time)
+
+
+def should_schedule(event: PokemonEvent, now: datetime) -> bool:
+    """Past events and leagues are not scheduled on discord."""
+    if event.start_date < now:
+        return False
+    return not event.type.lower().strip().startswith("league")
+
+
+def fields_changed(event: PokemonEvent, g_event) -> bool:
+    """Whether the guild event differs from the scraped one."""
+    return (
+        guild_event_key(g_event) != scraped_event_key(event)
+        or str(g_event.location) != event.location
+        or g_event.description != event.type
+    )
+
+
+class EventSyncPlan():
+    """What syncing the scraped events to a guild has to do."""
+
+    def __init__(
+        self,
+        create: list[PokemonEvent],
+        edit: list[tuple],
+        keep: list,
+        cancel: list,
+        identities: dict[str, int],
+        unique_uids: set[str]
+    ):
+        self.create = create
+        self.edit = edit
+        self.keep = keep
+        self.cancel = cancel
+        self.identities = identities
+        self.unique_uids = unique_uids
+
+    def __repr__(self) -> str:
+        return (
+            f"EventSyncPlan(create={len(self.create)}, "
+            f"edit={len(self.edit)}, keep={len(self.keep)}, "
+            f"cancel={len(self.cancel)})"
+        )
+
+
+def plan_event_sync(
+    events: list[PokemonEvent],
+    guild_events: list,
+    now: datetime | None = None,
+    identities: dict[str, int] | None = None,
+    failed_sources: set[str] | None = None
+) -> EventSyncPlan:
+    """Diffs scraped events against the bot's guild events by key, then
+    by the guild event ids stored in identities. The guild events stored
+    for failed_sources, which could not be scraped, are kept."""
+    if now is None:
+        now = datetime.now()
+    if identities is None:
+        identities = {}
+    if failed_sources is None:
+        failed_sources = set()
+
+    index = {}
+    by_id = {}
+    for g_event in guild_events:
+        index.setdefault(guild_event_key(g_event), g_event)
+        by_id[g_event.id] = g_event
+
+    wanted = {}
+    for event in events:
+        if should_schedule(event, now):
+            wanted.setdefault(scraped_event_key(event), event)
+
+    uid_counts = Counter(event.uid for event in wanted.values())
+    unique_uids = {
+        uid for uid, count in uid_counts.items()
+        if uid is not None and count == 1
+    }
+
+    keep = []
+    edit = []
+    create = []
+    matched = {}
+    unmatched = []
+    for key, event in wanted.items():
+        g_event = index.get(key, None)
+        if g_event is not None and id(g_event) not in matched:
+            matched[id(g_event)] = event
+            if fields_changed(event, g_event):
+                edit.append((event, g_event))
+            else:
+                keep.append(g_event)
+        else:
+            unmatched.append(event)
+
+    for event in unmatched:
+        g_event = None
+        if event.uid in unique_uids:
+            g_event = by_id.get(identities.get(event.uid, None), None)
+        if (
+            g_event is not None
+            and id(g_event) not in matched
+            and g_event.start_time.replace(tzinfo=None) >= now
+        ):
+            matched[id(g_event)] = event
+            edit.append((event, g_event))
+        else:
+            create.append(event)
+
+    failed = {
+        uid: g_id for uid, g_id in identities.items()
+        if uid.partition(":")[0] in failed_sources
+        and g_id in by_id and id(by_id[g_id]) not in matched
+    }
+    failed_ids = set(failed.values())
+    keep += [
+        g_event for g_event in guild_events
+        if id(g_event) not in matched and g_event.id in failed_ids
+    ]
+    cancel = [
+        g_event for g_event in guild_events
+        if id(g_event) not in matched and g_event.id not in failed_ids
+        and g_event.start_time.replace(tzinfo=None) >= now
+    ]
+    new_identities = failed | {
+        event.uid: g_event.id
+        for g_event in guild_events
+        for event in [matched.get(id(g_event), None)]
+        if event is not None and event.uid in unique_uids
+    }
+    return EventSyncPlan(
+        create, edit, keep, cancel, new_identities, unique_uids
+    )
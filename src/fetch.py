@@ -0,0 +1,123 @@
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from .helpers import StatsTable
+
+HTTP_FIRST = True
+HTTP_TIMEOUT = 15
+HTTP_POOL_SIZE = 8
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en"
+}
+
+FETCH_STATS = StatsTable({
+    "http": 0,
+    "not_modified": 0,
+    "browser": 0,
+    "last": None,
+    "last_error": None
+})
+
+
+class ParseError(Exception):
+    """The page was fetched but is missing the content a scraper needs."""
+
+
+def create_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update(HTTP_HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = create_session()
+
+
+def record_fetch(name: str, path: str, error: str | None = None):
+    with FETCH_STATS.entry(name) as stats:
+        stats[path] += 1
+        stats["last"] = path
+        if error is not None:
+            stats["last_error"] = error
+
+
+def get_fetch_stats() -> dict:
+    return FETCH_STATS.snapshot()
+
+
+def children(element) -> list:
+    """Child elements of a parsed element, like the DOM `children`."""
+    return element.find_all(recursive=False)
+
+
+def node_text(element) -> str:
+    """Text of a parsed element, like the CDP Element.text the browser
+    path reads: text nodes joined with " ", then stripped."""
+    return element.get_text(" ").strip()
+
+
+def select_one(soup, selector: str):
+    element = soup.select_one(selector)
+    if element is None:
+        raise ParseError(f"{selector} not found")
+    return element
+
+
+def conditional_headers(validators: dict) -> dict:
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def fetch_page(
+    name: str,
+    url: str,
+    parse_html,
+    browser,
+    validators: dict | None = None
+):
+    """Parses url fetched over HTTP, falling back to browser() when the
+    request fails or parse_html raises. Returns None on 304 Not Modified
+    when validators are given."""
+    error = None
+    if HTTP_FIRST:
+        try:
+            headers = {}
+            if validators is not None:
+                headers = conditional_headers(validators)
+            response = SESSION.get(
+                url, headers=headers, timeout=HTTP_TIMEOUT
+            )
+            if validators is not None and response.status_code == 304:
+                record_fetch(name, "not_modified")
+                return None
+            response.raise_for_status()
+            value = parse_html(
+                BeautifulSoup(response.content, "html.parser")
+            )
+            if validators is not None:
+                validators["etag"] = response.headers.get("ETag")
+                validators["last_modified"] = response.headers.get(
+                    "Last-Modified"
+                )
+            record_fetch(name, "http")
+            return value
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+    value = browser()
+    record_fetch(name, "browser", error)
+    return value
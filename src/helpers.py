@@ -1,11 +1,41 @@
 import os
 import sys
+import asyncio
 import logging
 import traceback
 
-from threading import Thread
+from contextlib import contextmanager
+from threading import Thread, Lock
+from concurrent.futures import ThreadPoolExecutor
 
 MAINTENANCE_MODE_MESSAGE = "Maintenance mode is active, try again later"
+JOB_WORKERS = 4
+
+JOB_EXECUTOR = ThreadPoolExecutor(
+    max_workers=JOB_WORKERS, thread_name_prefix="job"
+)
+
+
+class StatsTable():
+    """Thread-safe counters kept per name, each starting from fields."""
+
+    def __init__(self, fields: dict):
+        self.fields = fields
+        self._lock = Lock()
+        self._stats = {}
+
+    @contextmanager
+    def entry(self, name: str):
+        with self._lock:
+            yield self._stats.setdefault(name, self.fields.copy())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: stats.copy() for name, stats in self._stats.items()}
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
 
 
 def check_dir(directory: str):
@@ -50,3 +80,42 @@ class CustomThread(Thread):
     def join(self, *args, **kwargs):
         super().join(*args, **kwargs)
         return self.return_value, self.error
+
+
+async def run_job(target, args=[], kwargs={}):
+    """Runs blocking work in the job executor without blocking the loop.
+
+    Same contract as CustomThread: returns (return_value, error).
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return_value = await loop.run_in_executor(
+            JOB_EXECUTOR, lambda: target(*args, **kwargs)
+        )
+    except Exception as e:
+        print(traceback.format_exc())
+        return None, e
+    return return_value, None
+
+
+class SingleFlight():
+    """Coalesces concurrent jobs with the same key into one run.
+
+    Callers that ask for a key that is already in flight wait for that
+    job and get its (return_value, error) instead of starting a new one.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.coalesced = 0
+
+    async def run(self, key, target, args=[], kwargs={}):
+        future = self._in_flight.get(key, None)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(run_job(target, args, kwargs))
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
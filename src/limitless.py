@@ -1,4 +1,33 @@
-from seleniumbase import Driver
+from urllib.parse import urlparse, parse_qs
+
+from .dom import evaluate_json, NODE_TEXT_JS
+from .driver_pool import DRIVER_POOL
+from .waits import wait_for_selector, wait_until
+
+BLOCK_RESOURCES = True
+DECK_BUTTONS = "button.svelte-c276fa"
+MENU_TIMEOUT = 10
+
+DECKLIST_TABLE_SCRIPT = "JSON.stringify((() => {" + NODE_TEXT_JS + """
+    return Array.from(
+        document.querySelector("table.svelte-1sps4x1").children,
+        (row) => Array.from(row.children, (cell) => ({
+            tag: cell.tagName.toLowerCase(),
+            text: nodeText(cell)
+        }))
+    );
+})())"""
+
+
+def canonicalize_limitless_url(link: str) -> str:
+    """Normalizes a builder link so equivalent links map to one deck."""
+    link = link.strip()
+    if "://" not in link:
+        link = f"https://{link}"
+    parsed = urlparse(link)
+    deck_id = parse_qs(parsed.query).get("i", [""])[0].strip()
+    path = parsed.path.rstrip("/")
+    return f"https://{parsed.netloc.lower()}{path}?i={deck_id}"
 
 
 def get_decklist_from_url(link: str) -> dict:
@@ -6,57 +35,63 @@ def get_decklist_from_url(link: str) -> dict:
     trainers = {}
     energies = {}
 
-    sb = Driver(uc=True, locale_code="en", ad_block=True)
-
-    sb.uc_activate_cdp_mode(link)
-    sb.sleep(1)
-    sb.cdp.find_visible_elements("button.svelte-c276fa")[3].click()
-    sb.sleep(1)
-    sb.cdp.find_visible_elements("button.svelte-c276fa")[4].click()
-    sb.sleep(1)
-    table = sb.cdp.find_visible_elements("table.svelte-1sps4x1")[0]
+    with DRIVER_POOL.lease(BLOCK_RESOURCES) as sb:
+        DRIVER_POOL.open(sb, link)
+        if not wait_for_selector(sb, DECK_BUTTONS):
+            raise TimeoutError(f"{link} did not load")
+        sb.cdp.find_visible_elements(DECK_BUTTONS)[3].click()
+        # the click opens the menu that holds the fifth button
+        if not wait_until(
+            lambda: len(sb.cdp.find_visible_elements(DECK_BUTTONS)) > 4,
+            f"{DECK_BUTTONS} (menu)",
+            timeout=MENU_TIMEOUT
+        ):
+            raise TimeoutError(f"{link} export menu did not open")
+        sb.cdp.find_visible_elements(DECK_BUTTONS)[4].click()
+        wait_for_selector(sb, "table.svelte-1sps4x1")
+        rows = evaluate_json(sb, DECKLIST_TABLE_SCRIPT)
 
     mode = "pokemon"
-    for row in table.children:
+    for row in rows:
         card = {}
 
-        for i, cell in enumerate(row.children):
-            if cell.tag_name == "th":
-                cell_text = cell.text.lower()
+        for i, cell in enumerate(row):
+            if cell["tag"] == "th":
+                cell_text = cell["text"].lower()
                 if cell_text in ["pokemon", "trainer", "energy"]:
                     mode = cell_text
                 break
 
-            if len(row.children) < 2:
+            if len(row) < 2:
                 break
 
             if mode == "pokemon":
                 if i == 0:
-                    card["quantity"] = int(cell.text)
+                    card["quantity"] = int(cell["text"])
                 elif i == 1:
-                    card["name"] = cell.text
+                    card["name"] = cell["text"]
                 elif i == 2:
-                    card["set"] = cell.text
+                    card["set"] = cell["text"]
                 elif i == 3:
-                    card["number"] = int(cell.text)
+                    card["number"] = int(cell["text"])
                 elif i == 4:
-                    card["letter"] = cell.text.upper()
+                    card["letter"] = cell["text"].upper()
                     pokemon.append(card)
             elif mode == "trainer":
                 if i == 0:
-                    card["quantity"] = int(cell.text)
+                    card["quantity"] = int(cell["text"])
                 elif i == 1:
-                    card_name = cell.text
+                    card_name = cell["text"]
                     if card_name not in trainers:
                         trainers[card_name] = {"quantity": 0}
                     trainers[card_name]["quantity"] += card["quantity"]
             elif mode == "energy":
                 if i == 0:
-                    card["quantity"] = int(cell.text)
+                    card["quantity"] = int(cell["text"])
                 elif i == 1:
-                    card_name = cell.text
+                    card_name = cell["text"]
                     if card_name not in energies:
                         energies[card_name] = {"quantity": 0}
                     energies[card_name]["quantity"] += card["quantity"]
-    sb.quit()
+
     return {"pokemon": pokemon, "trainers": trainers, "energies": energies}
@@ -1,78 +1,289 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from seleniumbase import Driver
 import json
-
-from .core import REPLACE_CHARACTERS
+import os
+import shutil
+import time
+
+from .core import REPLACE_CHARACTERS, DATA_FOLDER
+from .helpers import check_dir
+from .dom import evaluate_json, NODE_TEXT_JS
+from .driver_pool import DRIVER_POOL
+from .fetch import (
+    fetch_page, children, select_one, node_text, ParseError
+)
+from .waits import wait_for_selector
 
 CARD_LIST_ULR = (
     "https://pkmncards.com/?s=format%3A{current_format}"
     "&sort=date&ord=auto&display=list"
 )
+CARD_LIST_PAGE_URL = (
+    "https://pkmncards.com/page/{page}/?s=format%3A{current_format}"
+    "&sort=date&ord=auto&display=list"
+)
 SETS_URL = "https://pkmncards.com/sets/"
+PAGE_WORKERS = 2
+PAGE_RETRIES = 2
+CHECKPOINT_FOLDER = f"{DATA_FOLDER}/checkpoints"
+BLOCK_RESOURCES = True
+CARD_HEADERS = ["set", "number", "name", "type", "color", "rarity"]
+
+CARD_PAGE_SCRIPT = "JSON.stringify((() => {" + NODE_TEXT_JS + """
+    const headers = ["set", "number", "name", "type", "color", "rarity"];
+    const results = document.querySelector("li.results");
+    const total = document.querySelector("span.out-of");
+    return {
+        results: results ? nodeText(results.children[0]) : "",
+        range: nodeText(document.querySelector("span.range-current")),
+        total: total ? nodeText(total.children[0]) : "",
+        cards: Array.from(
+            document.querySelectorAll("article.type-pkmn_card"),
+            (card) => {
+                const cells = card.children[0].children[0].children;
+                const details = {};
+                headers.forEach((header, i) => {
+                    details[header] = nodeText(cells[i]);
+                });
+                details.link = cells[2].children[0].getAttribute("href");
+                return details;
+            }
+        )
+    };
+})())"""
 
 
-def get_legal_card_list(
-        current_format: str, previous_count: int
-) -> tuple[list[dict], bool, int]:
-    legal_cards = []
-    valid = True
-    sb = Driver(uc=True, locale_code="en", ad_block=True)
+class PageCheckpoint():
+    """Result pages of one format saved as they complete.
+
+    A later run with the same total and page size picks the saved pages
+    up instead of fetching them again, any change starts over.
+    """
+
+    def __init__(self, current_format: str, total: int, page_size: int):
+        self.folder = os.path.join(CHECKPOINT_FOLDER, current_format)
+        meta = {"total": total, "page_size": page_size}
+        if self._read("meta.json") != meta:
+            self.clear()
+            check_dir(self.folder)
+            self._write("meta.json", meta)
+
+    def _read(self, name: str):
+        try:
+            with open(os.path.join(self.folder, name), "r") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _write(self, name: str, data):
+        filename = os.path.join(self.folder, name)
+        with open(f"{filename}.tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(f"{filename}.tmp", filename)
+
+    def load(self, page: int) -> list[dict] | None:
+        return self._read(f"page_{page}.json")
+
+    def save(self, page: int, cards: list[dict]):
+        self._write(f"page_{page}.json", cards)
+
+    def clear(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+def parse_card_page(sb) -> dict:
+    """Results text, range, total and cards of the open result page."""
+    return evaluate_json(sb, CARD_PAGE_SCRIPT)
+
+
+def parse_card_html(soup) -> dict:
+    """Same payload as CARD_PAGE_SCRIPT, from a page fetched over HTTP."""
+    results = children(select_one(soup, "li.results"))
+    total = children(select_one(soup, "span.out-of"))
+    cards = []
+    for card in soup.select("article.type-pkmn_card"):
+        cells = children(children(children(card)[0])[0])
+        details = {
+            header: node_text(cells[i])
+            for i, header in enumerate(CARD_HEADERS)
+        }
+        details["link"] = children(cells[2])[0].get("href")
+        cards.append(details)
+
+    return {
+        "results": node_text(results[0]) if results else "",
+        "range": node_text(select_one(soup, "span.range-current")),
+        "total": node_text(total[0]) if total else "",
+        "cards": cards
+    }
+
+
+def read_card_page(url: str, selector: str) -> dict:
+    """Reads a result page over HTTP, or in the browser once selector
+    is visible."""
+    def parse_html(soup) -> dict:
+        select_one(soup, selector)
+        return parse_card_html(soup)
+
+    def browser() -> dict:
+        with DRIVER_POOL.lease(BLOCK_RESOURCES) as sb:
+            DRIVER_POOL.open(sb, url)
+            if not wait_for_selector(sb, selector):
+                raise TimeoutError(f"{url} did not load")
+            return parse_card_page(sb)
+
+    return fetch_page("pkmncards cards", url, parse_html, browser)
 
+
+def fetch_card_page(
+    current_format: str, page: int, retries: int = PAGE_RETRIES
+) -> tuple[list[dict], int]:
+    """Fetches one result page, retrying it on its own if it fails.
+
+    Returns the cards and the number of retries it took.
+    """
+    url = CARD_LIST_PAGE_URL.format(current_format=current_format, page=page)
+    for attempt in range(retries + 1):
+        try:
+            cards = read_card_page(url, "article.type-pkmn_card")["cards"]
+            return cards, attempt
+        except Exception:
+            if attempt == retries:
+                raise
+
+
+def fetch_card_pages(
+    current_format: str,
+    page_numbers: list[int],
+    on_page=None
+) -> dict[int, tuple[list[dict], int]]:
+    """Fetches the pages concurrently, calling on_page(page, cards) as
+    each one completes."""
+    results = {}
+    error = None
+    with ThreadPoolExecutor(
+        max_workers=PAGE_WORKERS, thread_name_prefix="pkmncards"
+    ) as executor:
+        futures = {
+            executor.submit(fetch_card_page, current_format, page): page
+            for page in page_numbers
+        }
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                results[page] = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            if on_page is not None:
+                on_page(page, results[page][0])
+
+    if error is not None:
+        raise error
+    return results
+
+
+def get_legal_card_list(
+        current_format: str,
+        previous_count: int,
+        known_cards: set[tuple[str, str]] | None = None
+) -> tuple[list[dict], bool, int, dict]:
+    """Scrapes the cards legal in current_format, newest first, stopping
+    at the first page with one of known_cards when it is given."""
     url = CARD_LIST_ULR.format(current_format=current_format)
+    pages = {"fetched": 0, "resumed": 0, "skipped": 0, "retries": 0}
 
-    sb.uc_activate_cdp_mode(url)
-    sb.sleep(2)
+    page = read_card_page(url, "li.results")
 
-    headers = ["set", "number", "name", "type", "color", "rarity"]
-    clean_total = 0
+    if page["results"].lower() == "no results":
+        return [], False, 0, pages
 
-    while True:
-        results = sb.cdp.find_visible_elements("li.results")[0].children[0]
+    range_max = page["range"].replace(",", "").strip()
+    if "thru" in range_max:
+        range_max = range_max.split("thru")[1].strip()
 
-        if results.text.lower().strip() == "no results":
-            valid = False
-            break
+    clean_total = page["total"].replace(",", "")
+    clean_total = int(clean_total.replace("/", "").strip())
 
-        current_range = sb.cdp.find_visible_elements("span.range-current")[0]
-        total = sb.cdp.find_visible_elements("span.out-of")[0]
+    if clean_total == previous_count:
+        # Is up to date
+        return [], True, clean_total, pages
 
-        range_max = current_range.text.replace(",", "").strip()
-        if "thru" in range_max:
-            range_max = range_max.split("thru")[1].strip()
+    first_page = page["cards"]
 
-        clean_total = total.children[0].text.replace(",", "")
-        clean_total = clean_total.replace("/", "").strip()
+    pages["fetched"] = 1
+    page_size = max(int(range_max), 1)
+    total_pages = -(-clean_total // page_size)
+    batch_size = total_pages if known_cards is None else PAGE_WORKERS
+    checkpoint = PageCheckpoint(current_format, clean_total, page_size)
 
-        if int(clean_total) == previous_count:
-            # Is up to date
+    legal_cards = []
+    page_cards = {1: (first_page, 0)}
+    next_page = 2
+    while True:
+        reached_known = False
+        for page in sorted(page_cards):
+            cards, retries = page_cards[page]
+            pages["retries"] += retries
+            for card in cards:
+                if known_cards is not None and (
+                    card["set"], card["number"]
+                ) in known_cards:
+                    reached_known = True
+                    continue
+                legal_cards.append(card)
+            if reached_known:
+                break
+
+        if reached_known or next_page > total_pages:
             break
 
-        card_elements = sb.cdp.find_visible_elements("article.type-pkmn_card")
-        for card in card_elements:
-            card_details = {}
-            card_base = card.children[0].children[0].children
-            for i, header in enumerate(headers):
-                card_details[header] = card_base[i].text.strip()
-            card_details["link"] = card_base[2].children[0]["href"]
-            legal_cards.append(card_details)
-
-        # check if last page
-        if range_max == clean_total:
-            break
+        batch = list(range(
+            next_page, min(next_page + batch_size, total_pages + 1)
+        ))
+        page_cards = {}
+        for page in batch:
+            cards = checkpoint.load(page)
+            if cards is not None:
+                page_cards[page] = (cards, 0)
+        missing = [page for page in batch if page not in page_cards]
+        pages["resumed"] += len(page_cards)
+
+        page_cards.update(
+            fetch_card_pages(current_format, missing, checkpoint.save)
+        )
+        pages["fetched"] += len(missing)
+        next_page += len(batch)
+
+    checkpoint.clear()
+    pages["skipped"] = max(
+        total_pages - pages["fetched"] - pages["resumed"], 0
+    )
+    return legal_cards, True, clean_total, pages
 
-        # trigger next page
-        next_link_element = sb.cdp.find_visible_elements("li.next-link a")
-        next_link_element[0].click()
-        sb.sleep(3)
 
-    sb.quit()
-    return legal_cards, valid, int(clean_total)
+def load_saved_cards(filename: str) -> dict | None:
+    try:
+        with open(filename, "r") as f:
+            return json.load(f)
+    except Exception:
+        return None
 
 
 def save_cards_to_file(
-        cards: list[dict], count: int, filename: str = "legal_cards.json"
+        cards: list[dict],
+        count: int,
+        filename: str = "legal_cards.json",
+        saved_cards: dict | None = None
 ):
+    """Writes the cards to filename, merged into saved_cards if given."""
     final_cards = {}
+    if saved_cards is not None:
+        final_cards = {
+            set_code: set_cards.copy()
+            for set_code, set_cards in saved_cards.get("cards", {}).items()
+        }
+
     for card in cards:
         for k in card.keys():
             if k == "link":
@@ -106,46 +317,124 @@ def get_extended_format() -> str:
     return "blw-on-expanded-current"
 
 
+def sync_legal_cards(
+    formats: list[str],
+    filename: str,
+    previous_count: int = 0
+) -> dict:
+    """Brings filename up to date with the first format that has results,
+    fetching only the cards added since the stored count."""
+    saved_cards = load_saved_cards(filename)
+    known_cards = None
+    if saved_cards is not None:
+        previous_count = saved_cards.get("count", previous_count)
+        known_cards = {
+            (set_code, card_number)
+            for set_code, set_cards in saved_cards.get("cards", {}).items()
+            for card_number in set_cards
+        }
+
+    for current_format in formats:
+        legal_cards, valid, count, pages = get_legal_card_list(
+            current_format, previous_count, known_cards
+        )
+        if valid:
+            break
+
+    report = {
+        "format": current_format,
+        "valid": valid,
+        "count": count,
+        "mode": "delta" if known_cards is not None else "full",
+        "new_cards": len(legal_cards),
+        "pages_fetched": pages["fetched"],
+        "pages_skipped": pages["skipped"],
+        "pages_resumed": pages["resumed"],
+        "pages_retried": pages["retries"],
+        "saved": False
+    }
+    if not valid:
+        return report
+    if count == previous_count:
+        report["mode"] = "up to date"
+        return report
+
+    if (
+        known_cards is not None
+        and count != previous_count + len(legal_cards)
+    ):
+        # reconciliation failed, refetch everything
+        legal_cards, valid, count, full_pages = get_legal_card_list(
+            current_format, 0
+        )
+        saved_cards = None
+        report.update({
+            "valid": valid,
+            "count": count,
+            "mode": "full",
+            "new_cards": len(legal_cards),
+            "pages_fetched": pages["fetched"] + full_pages["fetched"],
+            "pages_skipped": 0,
+            "pages_resumed": pages["resumed"] + full_pages["resumed"],
+            "pages_retried": pages["retries"] + full_pages["retries"]
+        })
+
+    if len(legal_cards) > 0 and valid:
+        save_cards_to_file(legal_cards, count, filename, saved_cards)
+        report["saved"] = True
+
+    return report
+
+
+def timed_sync(formats: list[str], filename: str, previous_count: int):
+    """sync_legal_cards that reports its wall time and never raises."""
+    start = time.monotonic()
+    try:
+        report = sync_legal_cards(formats, filename, previous_count)
+    except Exception as e:
+        report = {"format": formats[0], "valid": False, "error": str(e)}
+    report["wall_time"] = time.monotonic() - start
+    return report
+
+
 def get_legal_cards(
     filename: str = "legal_cards.json",
     expanded_filename: str = "legal_expanded_cards.json",
     standard_count: int = 0,
     expanded_count: int = 0
-):
+) -> dict:
+    """Syncs the standard and expanded cards at the same time.
+
+    Each format writes its own file when it finishes, a failure in one is
+    reported under its "error" key and doesn't stop the other.
+    """
     current_date = datetime.now().date()
     previous_date = current_date.replace(month=1)
 
-    standard_format = get_standard_format_from_date(current_date)
-    legal_cards, valid, count = get_legal_card_list(
-        standard_format, standard_count
-    )
-
+    standard_formats = [get_standard_format_from_date(current_date)]
     # new format could be not ready yet
-    if not valid and current_date.month == 4:
-        standard_format = get_standard_format_from_date(previous_date)
-        legal_cards, valid, count = get_legal_card_list(
-            standard_format, standard_count
+    if current_date.month == 4:
+        standard_formats.append(get_standard_format_from_date(previous_date))
+
+    with ThreadPoolExecutor(
+        max_workers=2, thread_name_prefix="legal_cards"
+    ) as executor:
+        standard = executor.submit(
+            timed_sync, standard_formats, filename, standard_count
         )
-
-    if len(legal_cards) > 0 and valid:
-        save_cards_to_file(legal_cards, count, filename)
-
-    expanded_format = get_extended_format()
-    legal_cards, valid, count = get_legal_card_list(
-        expanded_format, expanded_count
-    )
-
-    if len(legal_cards) > 0 and valid:
-        save_cards_to_file(legal_cards, count, expanded_filename)
+        expanded = executor.submit(
+            timed_sync, [get_extended_format()], expanded_filename,
+            expanded_count
+        )
+        return {"standard": standard.result(), "expanded": expanded.result()}
 
 
 def get_card_text(card_link: str) -> str:
-    sb = Driver(uc=True, locale_code="en", ad_block=True)
-    sb.uc_activate_cdp_mode(card_link)
-    sb.sleep(1)
     query = "div.card-text-area div.card-tabs div.tab div.text"
-    card_text = sb.cdp.find_visible_elements(query)[0].text.strip()
-    sb.quit()
+    with DRIVER_POOL.lease(BLOCK_RESOURCES) as sb:
+        DRIVER_POOL.open(sb, card_link)
+        wait_for_selector(sb, query)
+        card_text = sb.cdp.find_visible_elements(query)[0].text.strip()
     return card_text.strip()
 
 
@@ -171,16 +460,28 @@ def check_should_skip_set(set_text: str) -> tuple[bool, bool]:
 def get_pokemon_sets(
     filename: str = "card_sets.json",
 ):
-    sb = Driver(uc=True, locale_code="en", ad_block=True)
-    sb.uc_activate_cdp_mode(SETS_URL)
-    sb.sleep(1)
     query = "div.entry-content li a"
-    set_elements = sb.cdp.find_visible_elements(query)
+
+    def parse_html(soup) -> list[str]:
+        set_texts = [node_text(a) for a in soup.select(query)]
+        if not set_texts:
+            raise ParseError(f"{query} not found")
+        return set_texts
+
+    def browser() -> list[str]:
+        with DRIVER_POOL.lease(BLOCK_RESOURCES) as sb:
+            DRIVER_POOL.open(sb, SETS_URL)
+            wait_for_selector(sb, query)
+            return [
+                element.text.strip()
+                for element in sb.cdp.find_visible_elements(query)
+            ]
+
+    set_texts = fetch_page("pkmncards sets", SETS_URL, parse_html, browser)
 
     pokemon_sets = {"black star promo": "SMP"}
 
-    for element in set_elements:
-        element_text = element.text.strip()
+    for element_text in set_texts:
         should_skip, parse_deeper = check_should_skip_set(element_text)
         if should_skip:
             continue
@@ -192,5 +493,4 @@ def get_pokemon_sets(
             set_code = element_text
         pokemon_sets[set_name] = set_code
 
-    sb.quit()
     json.dump(pokemon_sets, open(filename, "w"), indent=4)
@@ -1,26 +1,64 @@
-from seleniumbase import Driver
+from .driver_pool import DRIVER_POOL
+from .fetch import fetch_page, children, select_one
+from .waits import wait_for_selector
 
+BLOCK_RESOURCES = True
+POKEBEACH_URL = "https://www.pokebeach.com/"
 
-def get_newsfeed() -> list[str]:
+
+def parse_newsfeed_html(soup) -> list[str]:
     posts = []
-    sb = Driver(uc=True, locale_code="en", ad_block=True)
-    sb.uc_activate_cdp_mode("https://www.pokebeach.com/")
-    sb.sleep(10)
-    post_div = sb.cdp.find_visible_elements("div.xpress_articleList")[0]
-    for post in post_div.children:
+    for post in children(select_one(soup, "div.xpress_articleList")):
         a_element = post
         empty_post = False
         for _ in range(6):
-            if len(a_element.children) == 0:
+            if len(children(a_element)) == 0:
                 empty_post = True
                 break
-            a_element = a_element.children[0]
+            a_element = children(a_element)[0]
 
         if empty_post:
             continue
 
-        post_url = a_element["href"]
-        posts.append(post_url)
+        posts.append(a_element.get("href"))
 
-    sb.quit()
     return posts
+
+
+def get_newsfeed_from_browser() -> list[str]:
+    posts = []
+    with DRIVER_POOL.lease(BLOCK_RESOURCES) as sb:
+        DRIVER_POOL.open(sb, POKEBEACH_URL)
+        wait_for_selector(sb, "div.xpress_articleList")
+        post_div = sb.cdp.find_visible_elements("div.xpress_articleList")[0]
+        for post in post_div.children:
+            a_element = post
+            empty_post = False
+            for _ in range(6):
+                if len(a_element.children) == 0:
+                    empty_post = True
+                    break
+                a_element = a_element.children[0]
+
+            if empty_post:
+                continue
+
+            post_url = a_element["href"]
+            posts.append(post_url)
+
+    return posts
+
+
+def get_newsfeed(validators: dict | None = None) -> list[str] | None:
+    """Article links on the front page, newest first.
+
+    When validators are given the request is conditional and None is
+    returned if the page has not been modified since.
+    """
+    return fetch_page(
+        "pokebeach newsfeed",
+        POKEBEACH_URL,
+        parse_newsfeed_html,
+        get_newsfeed_from_browser,
+        validators=validators
+    )
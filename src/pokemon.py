@@ -1,11 +1,23 @@
+import base64
 import fitz  # PyMuPDF
+from concurrent.futures import (
+    ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+)
 import os
 from seleniumbase import Driver
 from datetime import datetime, timedelta
 import shutil
-from urllib.request import urlretrieve
-import requests
+import time
+from urllib.parse import urlparse, parse_qs
+from .cache import LogoCache
+from .capture import JSONResponseCapture
 from .core import DATA_FOLDER, REPLACE_CHARACTERS
+from .dom import evaluate_json, NODE_TEXT_JS
+from .driver_pool import DRIVER_POOL
+from .fetch import (
+    fetch_page, children, node_text, ParseError, SESSION, HTTP_TIMEOUT
+)
+from .waits import wait_for_selector, wait_until
 
 POKEMON_EVENTS_BASE_URL = "https://events.pokemon.com"
 POKEMON_RULES_URL = (
@@ -20,6 +32,73 @@ POKEMON_BANNED_CARDS_URL = (
 )
 EVENT_DATE_FORMAT = "%b %d %Y"
 TMP_FILE = f"{DATA_FOLDER}/tmp.pdf"
+DOWNLOAD_FOLDER = "downloaded_files"
+DECKLIST_LINK_TEXT = "Play! Pokémon Deck List (A4)"
+DECKLIST_TIMEOUT = 20
+BLOCK_RESOURCES = True
+STORE_TIMEOUT = 20
+LOGO_CACHE = LogoCache(f"{DATA_FOLDER}/logos")
+# the event locator loads its data through OutSystems screen services
+EVENTS_API_PATTERN = "/screenservices/"
+PREMIER_PAYLOAD_TIMEOUT = 15
+PREMIER_PAGE_TIMEOUT = 5
+# lowercased keys tried, in order, for each field of an event record
+EVENT_RECORD_FIELDS = {
+    "name": ("name", "eventname", "title"),
+    "type": ("eventtype", "type", "category", "eventcategory"),
+    "location": ("location", "venuename", "venue", "address", "city"),
+    "start": ("startdate", "startdatetime", "start", "date"),
+    "end": ("enddate", "enddatetime", "end"),
+    "logo": ("logo", "logourl", "imageurl", "image"),
+    "id": ("eventid", "eventguid", "id", "guid")
+}
+PREMIER_SOURCE = "premier"
+
+# Mirrors the layout of an event card, see extract_event_info
+EVENT_INFO_JS = NODE_TEXT_JS + """
+const eventInfo = (div, store) => {
+    let img = div.children[1].children[0].children[0].children[0];
+    if (store) {
+        img = img.children[0];
+    }
+    const base = div.children[0].children[0].children[0].children[0]
+        .children[0];
+    return {
+        logo: img.getAttribute("src"),
+        type: nodeText(base.children[0].children[0]),
+        name: nodeText(base.children[1].children[0]),
+        location: nodeText(base.children[2].children[1].children[0]),
+        date: nodeText(base.children[3].children[1].children[0])
+    };
+};"""
+PREMIER_EVENTS_SCRIPT = "JSON.stringify((() => {" + EVENT_INFO_JS + """
+    return Array.from(
+        document.querySelectorAll("div.map-location-card"),
+        (div) => eventInfo(div, false)
+    );
+})())"""
+STORE_EVENTS_SCRIPT = "JSON.stringify((() => {" + EVENT_INFO_JS + """
+    const content = document.querySelector("#b10-Content");
+    return Array.from(content.children[0].children, (event) => {
+        let div = event;
+        for (let i = 0; i < 5; i++) {
+            div = div.children[0];
+        }
+        const link = event.querySelector("a[href]");
+        return Object.assign(eventInfo(div, true), {
+            link: link ? link.getAttribute("href") : ""
+        });
+    });
+})())"""
+SCROLL_TO_LAST_EVENT_SCRIPT = """Array.from(
+    document.querySelectorAll("div.map-location-card")
+).pop().scrollIntoView()"""
+BANNED_CARDS_SCRIPT = "JSON.stringify((() => {" + NODE_TEXT_JS + """
+    return Array.from(
+        document.querySelectorAll("ul.list"),
+        (list) => Array.from(list.children, (li) => nodeText(li.children[0]))
+    );
+})())"""
 
 
 class PokemonEvent():
@@ -28,17 +107,21 @@ class PokemonEvent():
         name: str,
         type: str,
         location: str,
-        date: str,
+        date: str | None,
         logo: str,
-        premier: bool
+        premier: bool,
+        uid: str | None = None
     ):
         self.name = name
         self.type = type
         self.location = location
         self.logo = logo
         self.premier = premier
+        self.uid = uid
 
-        self._parse_date(date)
+        # without a card date the caller sets start_date and end_date
+        if date is not None:
+            self._parse_date(date)
 
     def _parse_date(self, date: str):
         e_date = date.replace(", ", ",").replace(",", " ")
@@ -86,39 +169,49 @@ def convert_pdf_to_png(in_file: str, out_file: str):
         pix.save(out_file)
 
 
-def get_decklist_pdf(output_filename: str):
-    sb = Driver(uc=True, locale_code="en", ad_block=True, external_pdf=True)
-    sb.uc_activate_cdp_mode(POKEMON_RULES_URL)
-    sb.sleep(10)
-    a_elements = sb.cdp.find_visible_elements("a")
+def find_decklist_link(sb):
+    for a in sb.cdp.find_visible_elements("a"):
+        if a.get_attribute("innerHTML").strip() == DECKLIST_LINK_TEXT:
+            return a
+    return None
 
-    for a in a_elements:
-        if (
-            a.get_attribute("innerHTML").strip()
-            == "Play! Pokémon Deck List (A4)"
-        ):
-            a.click()
-            sb.sleep(5)
-            break
-    else:
-        raise Exception("Couldn't find sheet in page")
 
-    for file in os.listdir("downloaded_files"):
+def find_downloaded_pdf() -> str | None:
+    if not os.path.isdir(DOWNLOAD_FOLDER):
+        return None
+    for file in os.listdir(DOWNLOAD_FOLDER):
+        # partial downloads end in .crdownload until they complete
         if file.endswith(".pdf"):
-            pdf_path = os.path.join("downloaded_files", file)
-            if os.path.exists(pdf_path):
-                if os.path.exists(output_filename):
-                    os.remove(
-                        output_filename
-                    )  # Remove existing file if it exists
-                os.rename(pdf_path, output_filename)
-            break
-    else:
-        raise Exception("No pdf in downloaded files")
+            return os.path.join(DOWNLOAD_FOLDER, file)
+    return None
+
+
+def get_decklist_pdf(output_filename: str):
+    sb = Driver(uc=True, locale_code="en", ad_block=True, external_pdf=True)
+    try:
+        sb.uc_activate_cdp_mode(POKEMON_RULES_URL)
+        if not wait_until(
+            lambda: find_decklist_link(sb) is not None,
+            "deck list link",
+            timeout=DECKLIST_TIMEOUT
+        ):
+            raise Exception("Couldn't find sheet in page")
+        find_decklist_link(sb).click()
 
-    sb.quit()
-    # Clean up the directory
-    shutil.rmtree("downloaded_files", ignore_errors=True)
+        if not wait_until(
+            lambda: find_downloaded_pdf() is not None,
+            "deck list download",
+            timeout=DECKLIST_TIMEOUT
+        ):
+            raise Exception("No pdf in downloaded files")
+        pdf_path = find_downloaded_pdf()
+        if os.path.exists(output_filename):
+            os.remove(output_filename)  # Remove existing file if it exists
+        os.rename(pdf_path, output_filename)
+    finally:
+        sb.quit()
+        # Clean up the directory
+        shutil.rmtree(DOWNLOAD_FOLDER, ignore_errors=True)
 
 
 def get_decklist_png(output_filename: str = "sign_up_sheet.png"):
@@ -128,127 +221,298 @@ def get_decklist_png(output_filename: str = "sign_up_sheet.png"):
     os.remove(TMP_FILE)
 
 
-def get_premier_events() -> list[PokemonEvent]:
-    sb = Driver(uc=True, locale_code="en", ad_block=True)
-    sb.uc_activate_cdp_mode(POKEMON_PREMIER_EVENTS_URL)
-    sb.sleep(10)
-
-    tabs = sb.cdp.find_visible_elements("button.osui-tabs__header-item")
-
-    if len(tabs) < 2:
-        raise Exception("Failed to load events page")
+def find_event_records(payload) -> list[dict]:
+    """Dicts anywhere in a JSON payload that have a name and a start."""
+    records = []
+    if isinstance(payload, list):
+        for item in payload:
+            records += find_event_records(item)
+    elif isinstance(payload, dict):
+        keys = {key.lower() for key in payload}
+        if (
+            keys.intersection(EVENT_RECORD_FIELDS["name"])
+            and keys.intersection(EVENT_RECORD_FIELDS["start"])
+        ):
+            return [payload]
+        for value in payload.values():
+            records += find_event_records(value)
+    return records
+
+
+def get_record_field(record: dict, field: str) -> str:
+    values = {key.lower(): value for key, value in record.items()}
+    for key in EVENT_RECORD_FIELDS[field]:
+        value = values.get(key, None)
+        if isinstance(value, dict):
+            value = ", ".join(
+                str(v) for v in value.values()
+                if isinstance(v, (str, int)) and str(v).strip()
+            )
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def parse_record_date(value: str) -> datetime:
+    """Midnight of the day a payload timestamp falls on, in the offset
+    it is given in, like the dates read from the event cards."""
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def time_left(deadline: float) -> float:
+    return max(0.0, deadline - time.monotonic())
+
+
+def event_uid(source: str, event: PokemonEvent, event_id: str = "") -> str:
+    """Stable identity of a listed event: where it is listed and its
+    locator id, or its name and location when there is no id."""
+    if event_id:
+        return f"{source}:{event_id}"
+    return f"{source}:{event.name}|{event.location}"
+
+
+def link_event_id(link: str) -> str:
+    """The event id in the query of an event detail link, "" if none."""
+    query = parse_qs(urlparse(link).query)
+    values = {key.lower(): value for key, value in query.items()}
+    for key in EVENT_RECORD_FIELDS["id"]:
+        if values.get(key, None):
+            return values[key][0]
+    return ""
+
+
+def event_from_record(record: dict, premier: bool = True) -> PokemonEvent:
+    start = parse_record_date(get_record_field(record, "start"))
+    end = get_record_field(record, "end")
+    end = parse_record_date(end) if end else start
+    event = PokemonEvent(
+        get_record_field(record, "name"),
+        get_record_field(record, "type"),
+        get_record_field(record, "location"),
+        None,
+        get_record_field(record, "logo"),
+        premier
+    )
+    event.start_date = start
+    event.end_date = end + timedelta(days=1)
+    event.uid = event_uid(
+        PREMIER_SOURCE, event, get_record_field(record, "id")
+    )
+    return event
 
-    tabs[1].click()
-    sb.sleep(2)
 
-    # scroll to end of page to let more events load
-    prev_event = None
+def collect_premier_events(sb, capture) -> list[PokemonEvent] | None:
+    """Builds the events from the captured payloads, None when none had
+    events."""
+    events = {}
+    read = 0
+    deadline = time.monotonic() + PREMIER_PAYLOAD_TIMEOUT
+    # other screen service responses arrive too, only new events extend
+    # the wait for the next page
+    while capture.wait_for_payload(
+        "premier events page" if events else "premier events payload",
+        time_left(deadline)
+    ):
+        new_events = 0
+        for payload in capture.payloads[read:]:
+            for record in find_event_records(payload):
+                try:
+                    event = event_from_record(record)
+                except Exception:
+                    continue
+                key = (event.uid, event.start_date)
+                if key not in events:
+                    events[key] = event
+                    new_events += 1
+        read = len(capture.payloads)
+
+        if new_events > 0:
+            sb.cdp.evaluate(SCROLL_TO_LAST_EVENT_SCRIPT)
+            deadline = time.monotonic() + PREMIER_PAGE_TIMEOUT
+
+    if len(events) == 0:
+        return None
+    return list(events.values())
+
+
+def scroll_premier_events(sb) -> list[PokemonEvent]:
+    """Reads the event cards, scrolling until no more load."""
+    prev_name = None
     while True:
-        events = sb.cdp.find_visible_elements("div.map-location-card")
-        last_event = events[-1]
-        event_info = extract_event_info(last_event)
-        if prev_event is not None and event_info.name == prev_event.name:
+        infos = evaluate_json(sb, PREMIER_EVENTS_SCRIPT)
+        last_name = infos[-1]["name"]
+        if prev_name is not None and last_name == prev_name:
             break
-        prev_event = event_info
-        last_event.scroll_into_view()
+        prev_name = last_name
+        sb.cdp.evaluate(SCROLL_TO_LAST_EVENT_SCRIPT)
         sb.sleep(1)
         sb.cdp.scroll_up(amount=25)
         sb.sleep(1)
         sb.cdp.scroll_down(amount=25)
         sb.sleep(5)
 
-    events = []
+    events = [extract_event_info(info) for info in infos]
+    for event in events:
+        event.uid = event_uid(PREMIER_SOURCE, event)
+    return events
 
-    event_divs = sb.cdp.find_visible_elements("div.map-location-card")
-    for div in event_divs:
-        event_info = extract_event_info(div)
-        events.append(event_info)
 
-    sb.quit()
-    return events
+def get_premier_events() -> list[PokemonEvent]:
+    with DRIVER_POOL.lease(BLOCK_RESOURCES) as sb:
+        DRIVER_POOL.open(sb, POKEMON_PREMIER_EVENTS_URL)
+        wait_for_selector(sb, "button.osui-tabs__header-item")
 
+        tabs = sb.cdp.find_visible_elements(
+            "button.osui-tabs__header-item"
+        )
 
-def get_store_events(guids: list[str] = []) -> list[PokemonEvent]:
-    if len(guids) == 0:
-        return []
+        if len(tabs) < 2:
+            raise Exception("Failed to load events page")
 
-    events = {}
-    sb = Driver(uc=True, locale_code="en", ad_block=True)
+        with JSONResponseCapture(sb, EVENTS_API_PATTERN) as capture:
+            tabs[1].click()
+            wait_for_selector(sb, "div.map-location-card")
+            events = collect_premier_events(sb, capture)
 
-    for guid in guids:
-        sb.uc_activate_cdp_mode(f"{POKEMON_EVENTS_URL}?guid={guid}")
-        sb.sleep(10)
+        if events is None:
+            events = scroll_premier_events(sb)
 
-        events[guid] = []
+    return events
 
-        events_div = sb.cdp.find_visible_elements(
-            "#b10-Content"
-        )[0].children[0].children
-        for event in events_div:
-            div = event
-            for _ in range(5):
-                div = div.children[0]
-            event_info = extract_event_info(div, store=True)
-            events[guid].append(event_info)
 
-    sb.quit()
+def get_store_event_page(guid: str) -> list[PokemonEvent]:
+    """Reads the events of one store, the page load and the waits share
+    a deadline of STORE_TIMEOUT from the moment a driver is leased."""
+    with DRIVER_POOL.lease(BLOCK_RESOURCES) as sb:
+        deadline = time.monotonic() + STORE_TIMEOUT
+        DRIVER_POOL.open(sb, f"{POKEMON_EVENTS_URL}?guid={guid}")
+        if not wait_for_selector(
+            sb, "#b10-Content", timeout=time_left(deadline)
+        ):
+            raise TimeoutError(f"Store {guid} did not load")
+        # a store without events never shows a card
+        wait_for_selector(
+            sb, "div.map-location-card", timeout=time_left(deadline)
+        )
+        infos = evaluate_json(sb, STORE_EVENTS_SCRIPT)
+        events = [extract_event_info(info, store=True) for info in infos]
+    for info, event in zip(infos, events):
+        # the events of a store share its address, without a detail link
+        # they are told apart by date so that a rename is edited in place
+        event_id = link_event_id(info.get("link", ""))
+        event.uid = event_uid(
+            guid, event, event_id or f"{event.start_date:%Y-%m-%d}"
+        )
     return events
 
 
-def extract_event_info(div, store: bool = False) -> PokemonEvent:
-    img = div.children[1].children[0].children[0].children[0]
-    if store:
-        img = img.children[0]
+def get_store_events(
+    guids: list[str] = []
+) -> tuple[dict[str, list[PokemonEvent]], dict[str, str]]:
+    """Fetches the event pages of the stores concurrently, failed or hung
+    stores are reported in the errors. A hung page load keeps its worker
+    thread and driver lease until the browser gives up on it."""
+    events = {}
+    errors = {}
+    if len(guids) == 0:
+        return events, errors
 
-    logo = img["src"]
-    base = div.children[0].children[0].children[0].children[0].children[0]
-    event_type = base.children[0].children[0].text
-    event_name = base.children[1].children[0].text
-    event_loca = base.children[2].children[1].children[0].text
-    event_date = base.children[3].children[1].children[0].text
-    premier = not store
+    workers = min(DRIVER_POOL.size, len(guids))
+    batches = -(-len(guids) // workers)
+    executor = ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="store-events"
+    )
+    futures = {
+        executor.submit(get_store_event_page, guid): guid for guid in guids
+    }
+    try:
+        for future in as_completed(
+            futures, timeout=STORE_TIMEOUT * (batches + 1)
+        ):
+            guid = futures[future]
+            try:
+                events[guid] = future.result()
+            except Exception as e:
+                errors[guid] = str(e) or type(e).__name__
+    except FuturesTimeoutError:
+        for guid in guids:
+            if guid not in events and guid not in errors:
+                errors[guid] = "timed out"
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return events, errors
+
+
+def extract_event_info(info: dict, store: bool = False) -> PokemonEvent:
+    """Builds an event from the fields read by EVENT_INFO_JS."""
     return PokemonEvent(
-        event_name,
-        event_type,
-        event_loca,
-        event_date,
-        logo,
-        premier
+        info["name"],
+        info["type"],
+        info["location"],
+        info["date"],
+        info["logo"],
+        not store
     )
 
 
-def get_logo(url: str) -> bytes:
+def decode_data_url(url: str) -> bytes:
+    _, data = url.split(",", 1)
+    return base64.b64decode(data)
+
+
+def get_logo(url: str) -> bytes | None:
     if ";base64," in url:
-        filename, _ = urlretrieve(url)
-        f = open(filename, "rb")
-        return f.read()
+        return decode_data_url(url)
+
+    logo = LOGO_CACHE.get(url)
+    if logo is not None:
+        return logo
 
     full_url = f"{POKEMON_EVENTS_BASE_URL}{url}"
-    response = requests.get(full_url)
+    response = SESSION.get(full_url, timeout=HTTP_TIMEOUT)
 
-    if response.status_code == 200:
-        return response.content
+    if response.status_code != 200:
+        return None
+    LOGO_CACHE.set(url, response.content)
+    return response.content
 
 
-def get_banned_cards() -> dict[str, list]:
-    sb = Driver(uc=True, locale_code="en", ad_block=True)
-    sb.uc_activate_cdp_mode(POKEMON_BANNED_CARDS_URL)
-    sb.sleep(10)
+def parse_banned_cards_html(soup) -> list[list[str]]:
+    """Same payload as BANNED_CARDS_SCRIPT, from a page fetched over HTTP."""
+    card_lists = [
+        [node_text(children(li)[0]) for li in children(card_list)]
+        for card_list in soup.select("ul.list")
+    ]
+    if len(card_lists) < 2:
+        raise ParseError("Banned card lists not found")
+    return card_lists
+
+
+def get_banned_card_lists_from_browser() -> list[list[str]]:
+    with DRIVER_POOL.lease(BLOCK_RESOURCES) as sb:
+        DRIVER_POOL.open(sb, POKEMON_BANNED_CARDS_URL)
+        wait_for_selector(sb, "ul.list")
+        return evaluate_json(sb, BANNED_CARDS_SCRIPT)
 
-    card_elements = sb.cdp.find_visible_elements("ul.list")
-    standard_elms = card_elements[0].children
-    expanded_elms = card_elements[1].children
+
+def get_banned_cards() -> dict[str, list]:
+    card_lists = fetch_page(
+        "pokemon banned cards",
+        POKEMON_BANNED_CARDS_URL,
+        parse_banned_cards_html,
+        get_banned_card_lists_from_browser
+    )
 
     standard_cards = []
     expanded_cards = []
 
-    for cards, elms in (
-        (standard_cards, standard_elms),
-        (expanded_cards, expanded_elms)
+    for cards, texts in (
+        (standard_cards, card_lists[0]),
+        (expanded_cards, card_lists[1])
     ):
-        for li in elms:
-            p = li.children[0]
-            p_text = p.text.strip()
+        for p_text in texts:
             if p_text.startswith("No cards are currently banned"):
                 break
 
@@ -277,7 +541,6 @@ def get_banned_cards() -> dict[str, list]:
                         set_nr = set_nr.split("/")[0].strip()
                     cards.append((card_name, set_name, set_nr))
 
-    sb.quit()
     return {
         "standard": standard_cards,
         "expanded": expanded_cards
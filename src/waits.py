@@ -0,0 +1,68 @@
+import time
+
+from .helpers import StatsTable
+
+DEFAULT_TIMEOUT = 15
+POLL_INTERVAL = 0.25
+
+WAIT_STATS = StatsTable({
+    "count": 0,
+    "timeouts": 0,
+    "total": 0.0,
+    "max": 0.0,
+    "last": 0.0
+})
+
+
+def record_wait(name: str, elapsed: float, success: bool):
+    with WAIT_STATS.entry(name) as stats:
+        stats["count"] += 1
+        stats["total"] += elapsed
+        stats["max"] = max(stats["max"], elapsed)
+        stats["last"] = elapsed
+        if not success:
+            stats["timeouts"] += 1
+
+
+def get_wait_stats() -> dict:
+    return WAIT_STATS.snapshot()
+
+
+def wait_until(
+    condition,
+    name: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    poll_interval: float = POLL_INTERVAL
+) -> bool:
+    """Polls condition until it is truthy or the timeout runs out.
+
+    Returns whether the condition was met, the time it took is recorded
+    under name in WAIT_STATS.
+    """
+    start = time.monotonic()
+    while True:
+        try:
+            success = bool(condition())
+        except Exception:
+            success = False
+
+        elapsed = time.monotonic() - start
+        if success or elapsed >= timeout:
+            record_wait(name, elapsed, success)
+            return success
+
+        time.sleep(poll_interval)
+
+
+def wait_for_selector(
+    sb,
+    selector: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    poll_interval: float = POLL_INTERVAL
+) -> bool:
+    return wait_until(
+        lambda: sb.cdp.is_element_visible(selector),
+        selector,
+        timeout=timeout,
+        poll_interval=poll_interval
+    )
@@ -0,0 +1,61 @@
+import os
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+from src.cache import LogoCache
+from src.driver_pool import DRIVER_POOL
+from src.fetch import FETCH_STATS
+
+HTML_FOLDER = os.path.join(os.path.dirname(__file__), "src", "html")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def reset_driver_pool():
+    DRIVER_POOL.close()
+    DRIVER_POOL.reset_stats()
+    yield
+    DRIVER_POOL.close()
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "src.pkmncards.CHECKPOINT_FOLDER", str(tmp_path / "checkpoints")
+    )
+
+
+@pytest.fixture(autouse=True)
+def logo_cache(tmp_path, monkeypatch):
+    cache = LogoCache(str(tmp_path / "logos"))
+    monkeypatch.setattr("src.pokemon.LOGO_CACHE", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def browser_only(monkeypatch):
+    """Scrapers go straight to the mocked browser unless html_server
+    is used."""
+    FETCH_STATS.clear()
+    monkeypatch.setattr("src.fetch.HTTP_FIRST", False)
+
+
+@pytest.fixture
+def html_server(monkeypatch):
+    """Serves the saved pages in tests/src/html, returns the base url."""
+    monkeypatch.setattr("src.fetch.HTTP_FIRST", True)
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(QuietHandler, directory=HTML_FOLDER)
+    )
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
@@ -47,3 +47,37 @@ class TestBotAdmin(unittest.IsolatedAsyncioTestCase):
         await b.toggle_maintenance(mock_ctx, b.password)
         assert mock_ctx.last_response == "Maintenance mode: off"
         assert b.maintenance is False
+
+    @patch("src.bot_admin.LOGO_CACHE")
+    @patch("src.bot.create_logger")
+    @patch("src.bot.discord")
+    @patch("builtins.open")
+    async def test_bot_stats(
+        self,
+        mock_open,
+        mock_discord,
+        mock_logger,
+        mock_logo_cache
+    ):
+        mock_logo_cache.get_stats.return_value = {"hits": 3}
+        b = Bot("faketoken", False, "123")
+
+        stats = b.collect_stats()
+        assert stats["fetch"] == {}
+        assert isinstance(stats["waits"], dict)
+        assert stats["driver pool"]["total"] == 0
+        assert stats["decklist fetches"] == {"coalesced": 0}
+        assert stats["decklist cache"]["size"] == 0
+        assert stats["validation cache"]["size"] == 0
+        assert stats["logo cache"] == {"hits": 3}
+        assert set(stats) == {
+            "fetch", "waits", "driver pool", "decklist cache",
+            "validation cache", "logo cache", "decklist fetches"
+        }
+
+        logger = mock_logger.return_value
+        logger.reset_mock()
+        b.log_stats()
+        assert logger.info.call_count == len(stats)
+        logger.info.assert_any_call("Stats fetch: {}")
+        logger.info.assert_any_call("Stats logo cache: {'hits': 3}")
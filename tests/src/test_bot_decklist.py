@@ -1,9 +1,17 @@
+import asyncio
+import threading
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from src.bot import Bot
 from src.helpers import MAINTENANCE_MODE_MESSAGE
 
 
+def format_results(valid, error):
+    def validate(deck, formats):
+        return {f: {"valid": valid, "error": error} for f in formats}
+    return validate
+
+
 class MockCtx():
     def __init__(self):
         self.channel = MagicMock()
@@ -24,7 +32,7 @@ class MockCtx():
 
 class TestBotDecklist(unittest.IsolatedAsyncioTestCase):
 
-    @patch("src.bot_decklist.validate_decklist")
+    @patch("src.bot_decklist.validate_decklist_formats")
     @patch("src.bot_decklist.get_decklist_from_url")
     @patch("src.bot.create_logger")
     @patch("src.bot.discord")
@@ -63,7 +71,7 @@ class TestBotDecklist(unittest.IsolatedAsyncioTestCase):
         ) is False
 
         mock_decklist.return_value = {}
-        mock_validate.return_value = (True, "")
+        mock_validate.side_effect = format_results(True, "")
         await b.decklist_check_url(
             mock_ctx, "https://my.com/builder?i=abc123abc"
         )
@@ -79,7 +87,14 @@ class TestBotDecklist(unittest.IsolatedAsyncioTestCase):
             "Deck check complete:\n- standard valid!\n- expanded valid!"
         )
 
-        mock_validate.return_value = (False, "err")
+        await b.decklist_check_url(
+            mock_ctx,
+            "https://my.limitlesstcg.com/builder?i=abc123abc"
+        )
+        mock_validate.assert_called_once()
+
+        mock_validate.side_effect = format_results(False, "err")
+        b.load_banned_cards()
         await b.decklist_check_url(
             mock_ctx,
             "https://my.limitlesstcg.com/builder?i=abc123abc"
@@ -90,9 +105,13 @@ class TestBotDecklist(unittest.IsolatedAsyncioTestCase):
             "- expanded not valid! err"
         )
 
+        # the later checks were served by the decklist cache
+        mock_decklist.assert_called_once()
+        assert b.decklist_cache.get_stats()["hits"] == 2
+
         mock_decklist.side_effect = Exception("failed")
-        valid, deck, error = b.do_decklist_check(
-            "https://my.limitlesstcg.com/builder?i=abc123abc"
+        valid, deck, error = await b.do_decklist_check(
+            "https://my.limitlesstcg.com/builder?i=abc123abc", refresh=True
         )
         assert valid == {}
         assert deck == {}
@@ -104,7 +123,7 @@ class TestBotDecklist(unittest.IsolatedAsyncioTestCase):
         )
         assert mock_ctx.last_response == MAINTENANCE_MODE_MESSAGE
 
-    @patch("src.bot_decklist.validate_decklist")
+    @patch("src.bot_decklist.validate_decklist_formats")
     @patch("src.bot_decklist.get_decklist_from_url")
     @patch("src.bot.create_logger")
     @patch("src.bot.discord")
@@ -128,7 +147,7 @@ class TestBotDecklist(unittest.IsolatedAsyncioTestCase):
         b = Bot("faketoken", False, "123")
         assert b.user_decklists == {}
 
-        valid, error = b.do_user_decklist_check("123", "noname")
+        valid, error = await b.do_user_decklist_check("123", "noname")
         assert valid is None
         assert error == "Deck not found"
 
@@ -140,9 +159,9 @@ class TestBotDecklist(unittest.IsolatedAsyncioTestCase):
             }
         }
         mock_decklist.return_value = {}
-        mock_validate.return_value = (True, "")
+        mock_validate.side_effect = format_results(True, "")
 
-        valid, error = b.do_user_decklist_check("123", "deckname")
+        valid, error = await b.do_user_decklist_check("123", "deckname")
         assert valid is not None
         assert error is None
         for format in ("standard", "expanded"):
@@ -158,7 +177,7 @@ class TestBotDecklist(unittest.IsolatedAsyncioTestCase):
                 }
             }
         }
-        valid, error = b.do_user_decklist_check("123", "deckname")
+        valid, error = await b.do_user_decklist_check("123", "deckname")
         assert valid == {}
         assert error == "Invalid Limitless URL."
         for format in ("standard", "expanded"):
@@ -167,7 +186,7 @@ class TestBotDecklist(unittest.IsolatedAsyncioTestCase):
             assert deck_data["error"] == "Invalid Limitless URL."
 
         b.user_decklists = {}
-        b.do_user_decklist_check = MagicMock()
+        b.do_user_decklist_check = AsyncMock()
         b.do_user_decklist_check.return_value = ({
             "standard": {
                 "valid": True,
@@ -336,3 +355,98 @@ class TestBotDecklist(unittest.IsolatedAsyncioTestCase):
         )
         await b.decklist_info(mock_ctx, "deckname")
         assert mock_ctx.last_response == expected_deck
+
+    @patch("src.bot_decklist.validate_decklist_formats")
+    @patch("src.bot_decklist.get_decklist_from_url")
+    @patch("src.bot.create_logger")
+    @patch("src.bot.discord")
+    @patch("src.bot_decklist.json")
+    @patch("builtins.open")
+    async def test_bot_decklist_concurrent_checks(
+        self,
+        mock_open,
+        mock_dl_json,
+        mock_discord,
+        mock_logger,
+        mock_decklist,
+        mock_validate,
+    ):
+        mock_bot = MagicMock()
+        mock_discord.Bot.return_value = mock_bot
+        mock_dl_json.load.side_effect = Exception("failed")
+        b = Bot("faketoken", False, "123")
+
+        # both scrapes have to be in flight at the same time to get past
+        # the barrier, running them one after the other breaks it
+        barrier = threading.Barrier(2, timeout=5)
+
+        def scrape(url):
+            barrier.wait()
+            return {}
+
+        mock_decklist.side_effect = scrape
+        mock_validate.side_effect = format_results(True, "")
+
+        ctx_1 = MockCtx()
+        ctx_2 = MockCtx()
+        await asyncio.gather(
+            b.decklist_check_url(
+                ctx_1, "https://my.limitlesstcg.com/builder?i=abc123abc"
+            ),
+            b.decklist_check_url(
+                ctx_2, "https://my.limitlesstcg.com/builder?i=xyz789xyz"
+            )
+        )
+        for ctx in (ctx_1, ctx_2):
+            assert ctx.last_response == (
+                "Deck check complete:\n- standard valid!\n- expanded valid!"
+            )
+
+    @patch("src.bot_decklist.validate_decklist_formats")
+    @patch("src.bot_decklist.get_decklist_from_url")
+    @patch("src.bot.create_logger")
+    @patch("src.bot.discord")
+    @patch("src.bot_decklist.json")
+    @patch("builtins.open")
+    async def test_bot_decklist_coalesced_checks(
+        self,
+        mock_open,
+        mock_dl_json,
+        mock_discord,
+        mock_logger,
+        mock_decklist,
+        mock_validate,
+    ):
+        mock_bot = MagicMock()
+        mock_discord.Bot.return_value = mock_bot
+        mock_dl_json.load.side_effect = Exception("failed")
+        b = Bot("faketoken", False, "123")
+
+        release = threading.Event()
+
+        def scrape(url):
+            release.wait(5)
+            return {"pokemon": [], "trainers": {}, "energies": {}}
+
+        mock_decklist.side_effect = scrape
+        mock_validate.side_effect = format_results(True, "")
+
+        checks = [
+            asyncio.create_task(b.do_decklist_check(url))
+            for url in (
+                "https://my.limitlesstcg.com/builder?i=abc123abc",
+                "http://my.limitlesstcg.com/builder?i=abc123abc",
+                "my.limitlesstcg.com/builder?i=abc123abc",
+            )
+        ]
+        await asyncio.sleep(0.05)
+        release.set()
+        results = await asyncio.gather(*checks)
+
+        mock_decklist.assert_called_once_with(
+            "https://my.limitlesstcg.com/builder?i=abc123abc"
+        )
+        assert b.decklist_fetches.coalesced == 2
+        for valid, deck, error in results:
+            assert error is None
+            assert deck == {"pokemon": [], "trainers": {}, "energies": {}}
@@ -1,5 +1,6 @@
 import unittest
 from datetime import datetime
+from discord import ScheduledEventStatus
 from unittest.mock import patch, MagicMock, AsyncMock
 from src.bot import Bot
 from src.helpers import MAINTENANCE_MODE_MESSAGE
@@ -36,9 +37,11 @@ class MockCtx():
 
 
 class MockEvent():
-    def __init__(self, name="test event", old=True):
+    def __init__(self, name="test event", old=True, id=None):
+        self.id = id
         self.name = name
         self.location = "hell"
+        self.description = "friendly"
 
         if old:
             mock_date = get_mock_event_date(14, 16, 2025)
@@ -52,26 +55,35 @@ class MockEvent():
 
         self.url = "www.test.com"
         self.creator_id = "im_a_bot"
+        self.status = ScheduledEventStatus.scheduled
         self.canceled = False
+        self.edited = None
 
     async def cancel(self):
         self.canceled = True
 
+    async def edit(self, **kwargs):
+        self.edited = kwargs
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        return self
+
 
 class MockUpdateGuildEvent():
     def __init__(self):
         self.calls = []
 
-    async def update(self, guild_id, events):
+    async def update(self, guild_id, events, failed_stores=[]):
         self.calls.append({
             "guild_id": guild_id,
-            "events": events
+            "events": events,
+            "failed_stores": failed_stores
         })
 
 
 class TestBotEvents(unittest.IsolatedAsyncioTestCase):
 
-    @patch("src.pokemon.requests")
+    @patch("src.bot_events.get_logo")
     @patch("src.bot_events.get_store_events")
     @patch("src.bot_events.get_premier_events")
     @patch("src.bot_events.json")
@@ -86,7 +98,7 @@ class TestBotEvents(unittest.IsolatedAsyncioTestCase):
         mock_json,
         mock_premier_events,
         mock_store_events,
-        mock_requests
+        mock_get_logo
     ):
         mock_premier_events.return_value = [
             PokemonEvent(
@@ -99,7 +111,7 @@ class TestBotEvents(unittest.IsolatedAsyncioTestCase):
             )
             for e_name in ["e1", "e2", "e3"]
         ]
-        mock_store_events.return_value = {
+        mock_store_events.return_value = ({
             "abc-123": [
                 PokemonEvent(
                     "event1",
@@ -120,11 +132,8 @@ class TestBotEvents(unittest.IsolatedAsyncioTestCase):
                     False
                 )
             ]
-        }
-        mock_requests.get.return_value = MagicMock(
-            status_code=200,
-            content="content"
-        )
+        }, {})
+        mock_get_logo.return_value = b"content"
         mock_logger_instance = mock_logger.return_value
         mock_json.load.return_value = {}
         mock_bot = MagicMock(user=MagicMock(id="im_a_bot"))
@@ -194,17 +203,28 @@ class TestBotEvents(unittest.IsolatedAsyncioTestCase):
         assert mock_ctx.last_response == "Events channel removed successfully!"
 
         guildevents = [
-            MockEvent("event1"),
-            MockEvent("event2", old=False),
-            MockEvent("event3", old=False)
+            MockEvent("event1", id=1),
+            MockEvent("event2", old=False, id=2),
+            MockEvent("event3", old=False, id=3)
         ]
         b.event_channels["123"] = 1234
         mock_guild = MagicMock()
-        mock_guild.create_scheduled_event = AsyncMock()
+        created = []
+
+        async def create_event(**kwargs):
+            event = MockEvent(kwargs["name"], id=10 + len(created))
+            event.start_time = kwargs["start_time"]
+            event.end_time = kwargs["end_time"]
+            event.description = kwargs["description"]
+            created.append(event)
+            return event
+
+        mock_guild.create_scheduled_event = create_event
         send_mock = AsyncMock()
         mock_bot.get_channel.return_value = MagicMock(
             send=send_mock
         )
+        mock_bot.get_guild.return_value = None
         mock_bot.fetch_guild = AsyncMock()
         mock_bot.fetch_guild.return_value = mock_guild
         mock_guild.fetch_scheduled_events = AsyncMock()
@@ -256,9 +276,14 @@ class TestBotEvents(unittest.IsolatedAsyncioTestCase):
         assert guildevents[2].canceled
         assert send_mock.call_count == 3
 
+        assert len(created) == 2
+
+        # served from the index, nothing left to create, edit or cancel
         b.event_channels = {}
         await b.update_guild_events(123, eventlist)
         assert send_mock.call_count == 3
+        assert len(created) == 2
+        mock_guild.fetch_scheduled_events.assert_called_once()
 
         mock_updater = MockUpdateGuildEvent()
         b.update_guild_events = mock_updater.update
@@ -301,8 +326,11 @@ class TestBotEvents(unittest.IsolatedAsyncioTestCase):
         b.event_channels["123"] = 1234
         await b.delete_all_events(mock_ctx)
         assert mock_ctx.last_response == "Events deleted successfully!"
-        for event in guildevents:
+        # event3 was canceled by the sync and left the index
+        assert guildevents[2].canceled is False
+        for event in guildevents[:2] + created:
             assert event.canceled
+        assert b.guild_event_index[mock_guild.id] == {}
 
         send_calls = send_mock.call_count
         b.event_channels = {}
@@ -339,3 +367,169 @@ class TestBotEvents(unittest.IsolatedAsyncioTestCase):
         await b.sync_events_task()
         assert len(mock_updater.calls) == 0
         mock_logger_instance.error.assert_called_once()
+
+        # the servers following a store that fails still sync the rest
+        mock_store_events.side_effect = None
+        mock_store_events.return_value = (
+            {"abc-123": []}, {"not-found": "store did not load"}
+        )
+        b.events_following["234"] = ["abc-123", "not-found"]
+        mock_logger_instance.reset_mock()
+        await b.sync_events_task()
+        calls = sorted(mock_updater.calls, key=lambda c: c["guild_id"])
+        assert [c["guild_id"] for c in calls] == [123, 234]
+        assert [c["failed_stores"] for c in calls] == [[], ["not-found"]]
+        mock_logger_instance.error.assert_called_once()
+
+        mock_updater.calls = []
+        b.events_following["123"] = ["not-found"]
+        mock_ctx.guild.id = 123
+        await b.sync_events(mock_ctx)
+        assert mock_ctx.last_response == (
+            "Events synced, error fetching store events: "
+            "not-found: store did not load"
+        )
+        assert mock_updater.calls[0]["failed_stores"] == ["not-found"]
+
+    @patch("src.bot_events.get_logo")
+    @patch("src.bot_events.json")
+    @patch("src.bot.create_logger")
+    @patch("src.bot.discord")
+    @patch("builtins.open")
+    async def test_update_guild_events_edit(
+        self,
+        mock_open,
+        mock_discord,
+        mock_logger,
+        mock_json,
+        mock_get_logo
+    ):
+        mock_get_logo.side_effect = Exception("offline")
+        mock_json.load.return_value = {
+            "scheduled": {"123": {"store:moved": 1}}
+        }
+        mock_bot = MagicMock(user=MagicMock(id="im_a_bot"))
+        mock_discord.Bot.return_value = mock_bot
+        b = Bot("faketoken", False, "123")
+        assert b.scheduled_events == {"123": {"store:moved": 1}}
+
+        guildevents = [
+            MockEvent("moved", old=False, id=1),
+            MockEvent("renamed", old=False, id=2),
+            MockEvent("kept", old=False, id=3)
+        ]
+        mock_guild = MagicMock()
+        mock_guild.create_scheduled_event = AsyncMock(
+            return_value=MagicMock(id=4)
+        )
+        mock_guild.fetch_scheduled_events = AsyncMock(
+            return_value=guildevents
+        )
+        mock_bot.get_guild.return_value = mock_guild
+        send_mock = AsyncMock()
+        mock_bot.get_channel.return_value = MagicMock(send=send_mock)
+        b.event_channels["123"] = 1234
+        b.print_event = MagicMock(return_value="printed")
+
+        year = datetime.now().year + 1
+        events = [
+            PokemonEvent(
+                name, "friendly", location, date, "logo.png", False,
+                uid=uid
+            )
+            for name, location, date, uid in [
+                (
+                    "moved", "hell",
+                    get_mock_one_day_event_date(20, year), "store:moved"
+                ),
+                (
+                    "renamed", "heaven",
+                    get_mock_event_date(14, 16, year), "store:renamed"
+                ),
+                (
+                    "kept", "hell",
+                    get_mock_event_date(14, 16, year), "store:kept"
+                ),
+                (
+                    "new", "hell",
+                    get_mock_event_date(14, 16, year), "store:new"
+                )
+            ]
+        ]
+        await b.update_guild_events(123, events)
+
+        # moved by its uid, relocated by its key, kept without a call
+        assert guildevents[0].edited["start_time"] == datetime(year, 1, 20)
+        assert guildevents[1].edited["location"] == "heaven"
+        assert guildevents[2].edited is None
+        assert not any(event.canceled for event in guildevents)
+        # the event is created without the logo that failed
+        mock_guild.create_scheduled_event.assert_called_once()
+        assert "image" not in mock_guild.create_scheduled_event.call_args[1]
+        mock_get_logo.assert_called_once_with("logo.png")
+        b.logger.warning.assert_called_with("Error fetching logo.png: offline")
+        assert send_mock.call_count == 3
+        send_mock.assert_any_call("An event was updated!\nprinted")
+        assert b.scheduled_events["123"] == {
+            "store:moved": 1,
+            "store:renamed": 2,
+            "store:kept": 3,
+            "store:new": 4
+        }
+        mock_json.dump.assert_called_once()
+
+        # without an events channel the edits still reach the index
+        b.event_channels = {}
+        relocated = MockEvent("renamed", old=False, id=2)
+        guildevents[1].edit = AsyncMock(return_value=relocated)
+        events[1].location = "purgatory"
+        await b.update_guild_events(123, events)
+        guildevents[1].edit.assert_called_once()
+        assert b.guild_event_index[mock_guild.id][2] is relocated
+        assert send_mock.call_count == 3
+
+    @patch("src.bot_events.json")
+    @patch("src.bot.create_logger")
+    @patch("src.bot.discord")
+    @patch("builtins.open")
+    async def test_guild_event_index(
+        self,
+        mock_open,
+        mock_discord,
+        mock_logger,
+        mock_json
+    ):
+        mock_json.load.return_value = {}
+        b = Bot("faketoken", False, "123")
+        mock_guild = MagicMock(id=123)
+        mock_guild.fetch_scheduled_events = AsyncMock(
+            return_value=[MockEvent("event1", id=1)]
+        )
+
+        # events of guilds that were never synced are not kept
+        b.cache_guild_event(123, MockEvent("event2", id=2))
+        assert b.guild_event_index == {}
+
+        events = await b.get_guild_events(mock_guild)
+        assert [event.id for event in events] == [1]
+
+        added = MockEvent("event2", id=2)
+        b.cache_guild_event(123, added)
+        updated = MockEvent("renamed", id=1)
+        b.cache_guild_event(123, updated)
+        assert await b.get_guild_events(mock_guild) == [updated, added]
+
+        added.status = ScheduledEventStatus.canceled
+        b.cache_guild_event(123, added)
+        b.drop_guild_event(123, updated)
+        assert await b.get_guild_events(mock_guild) == []
+        mock_guild.fetch_scheduled_events.assert_called_once()
+
+        # reconnecting replaces the index with what the gateway sent
+        ended = MockEvent("ended", id=4)
+        ended.status = ScheduledEventStatus.completed
+        mock_guild.scheduled_events = [MockEvent("event3", id=3), ended]
+        b.seed_guild_events(mock_guild)
+        events = await b.get_guild_events(mock_guild)
+        assert [event.id for event in events] == [3]
+        mock_guild.fetch_scheduled_events.assert_called_once()
@@ -2,6 +2,10 @@ import unittest
 from unittest.mock import patch, MagicMock
 from src.bot import Bot
 from src.helpers import MAINTENANCE_MODE_MESSAGE
+from src.bot_legalcards import (
+    LEGAL_CARDS_FILE, LEGAL_CARDS_EXPANDED_FILE, LEGAL_CARDS_SNAPSHOT,
+    LEGAL_CARDS_EXPANDED_SNAPSHOT
+)
 
 
 class MockCtx():
@@ -24,7 +28,7 @@ class TestBotLegalCards(unittest.IsolatedAsyncioTestCase):
     @patch("src.bot_legalcards.json.dump")
     @patch("src.bot_legalcards.get_pokemon_sets")
     @patch("src.bot_legalcards.get_banned_cards")
-    @patch("src.bot_legalcards.load_card_database")
+    @patch("src.bot_legalcards.build_card_database")
     @patch("src.bot_legalcards.get_legal_cards")
     @patch("src.bot.create_logger")
     @patch("src.bot.discord")
@@ -53,8 +57,31 @@ class TestBotLegalCards(unittest.IsolatedAsyncioTestCase):
         b = Bot("faketoken", False, "123")
 
         mock_logger_instance.reset_mock()
-        b.get_legal_cards_task()
-        assert mock_logger_instance.info.call_count == 2
+        mock_legal_cards.return_value = {
+            "expanded": {
+                "mode": "delta",
+                "new_cards": 3,
+                "pages_fetched": 1,
+                "pages_skipped": 40,
+                "wall_time": 12.34
+            }
+        }
+        await b.get_legal_cards_task()
+        assert mock_logger_instance.info.call_count == 3
+        mock_logger_instance.info.assert_any_call(
+            "expanded cards sync (delta): 3 new cards, "
+            "1 pages fetched, 40 pages skipped in 12.3s"
+        )
+
+        mock_logger_instance.reset_mock()
+        mock_legal_cards.return_value["standard"] = {
+            "format": "f", "valid": False, "error": "browser died"
+        }
+        await b.get_legal_cards_task()
+        mock_logger_instance.error.assert_called_once_with(
+            "Legal cards update failed. standard: browser died"
+        )
+        mock_legal_cards.return_value = None
 
         mock_ctx = MockCtx()
         await b.get_legal_cards(mock_ctx)
@@ -70,7 +97,7 @@ class TestBotLegalCards(unittest.IsolatedAsyncioTestCase):
         b.legal_cards = {}
         b.legal_expanded_cards = {}
         mock_legal_cards.side_effect = Exception("legal fail")
-        b.get_legal_cards_task()
+        await b.get_legal_cards_task()
         mock_logger_instance.info.assert_called_once()
         mock_logger_instance.error.assert_called_once()
 
@@ -79,15 +106,19 @@ class TestBotLegalCards(unittest.IsolatedAsyncioTestCase):
             "Legal cards update failed! legal fail"
         )
 
+        b.validation_cache.set("deck", {})
+        banned_version = b.banned_cards_version
         await b.get_banned_cards(mock_ctx)
         assert mock_ctx.last_response == (
             "Banned cards list has been updated!"
         )
+        assert b.banned_cards_version > banned_version
+        assert len(b.validation_cache) == 0
 
         mock_logger_instance.reset_mock()
         mock_legal_cards.side_effect = None
         mock_banned_cards.side_effect = Exception("ban fail")
-        b.get_legal_cards_task()
+        await b.get_legal_cards_task()
         mock_logger_instance.info.assert_called_once()
         mock_logger_instance.error.assert_called_once()
 
@@ -97,13 +128,13 @@ class TestBotLegalCards(unittest.IsolatedAsyncioTestCase):
         )
 
         mock_logger_instance.reset_mock()
-        b.get_banned_cards_task()
+        await b.get_banned_cards_task()
         mock_logger_instance.info.assert_called_once()
         mock_logger_instance.error.assert_called_once()
 
         mock_logger_instance.reset_mock()
         mock_banned_cards.side_effect = None
-        b.get_banned_cards_task()
+        await b.get_banned_cards_task()
         assert mock_logger_instance.info.call_count == 2
 
     @patch("src.bot_legalcards.get_legal_cards")
@@ -126,7 +157,7 @@ class TestBotLegalCards(unittest.IsolatedAsyncioTestCase):
         assert mock_legal_cards.call_count == 0
 
         mock_logger_instance.reset_mock()
-        b.get_legal_cards_task()
+        await b.get_legal_cards_task()
         assert mock_logger_instance.info.call_count == 2
         assert mock_legal_cards.call_count == 0
 
@@ -135,7 +166,7 @@ class TestBotLegalCards(unittest.IsolatedAsyncioTestCase):
         assert mock_ctx.last_response == MAINTENANCE_MODE_MESSAGE
 
         mock_logger_instance.reset_mock()
-        b.get_banned_cards_task()
+        await b.get_banned_cards_task()
         assert mock_logger_instance.info.call_count == 2
         mock_logger_instance.info.assert_called_with(
             "Won't update banned cards, Maintenance mode is active"
@@ -145,7 +176,7 @@ class TestBotLegalCards(unittest.IsolatedAsyncioTestCase):
         assert mock_ctx.last_response == MAINTENANCE_MODE_MESSAGE
 
     @patch("src.bot.create_logger")
-    @patch("src.bot_legalcards.load_card_database")
+    @patch("src.bot_legalcards.read_card_file")
     @patch("src.bot.discord")
     @patch("src.bot_legalcards.json")
     @patch("builtins.open")
@@ -154,22 +185,101 @@ class TestBotLegalCards(unittest.IsolatedAsyncioTestCase):
         mock_open,
         mock_json,
         mock_discord,
-        mock_card_db,
+        mock_read,
         mock_logger
     ):
         mock_logger_instance = mock_logger.return_value
         mock_json.dump.side_effect = Exception("test")
-        mock_card_db.return_value = ({}, {}, {}, 0)
+        mock_read.side_effect = lambda filename: {
+            "cards": {
+                "WHT": {
+                    "87": {
+                        "name": "Sewaddle",
+                        "type": "Pkmn Basic",
+                        "rarity": "Common"
+                    }
+                }
+            },
+            "count": 1
+        }
         mock_bot = MagicMock()
         mock_discord.Bot.return_value = mock_bot
 
         b = Bot("faketoken", True, "123")
 
+        b.validation_cache.set("deck", {})
+        legal_version = b.legal_cards_version
         b.load_legal_cards()
+        assert b.legal_cards_version > legal_version
+        assert len(b.validation_cache) == 0
         assert b.legal_cards is not None
         assert b.legal_expanded_cards is not None
         assert b.raw_standard_cards != {}
         assert b.raw_expanded_cards != {}
+        mock_read.assert_any_call(LEGAL_CARDS_FILE)
+        mock_read.assert_any_call(LEGAL_CARDS_EXPANDED_FILE)
+        assert mock_read.call_count == 4
+
+        # both views share the same card objects
+        assert b.legal_expanded_cards["pokemon"]["WHT"]["87"] is (
+            b.raw_expanded_cards["cards"]["WHT"]["87"]
+        )
+
+        mock_read.side_effect = None
+        mock_read.return_value = {"cards": {"WHT": {"87": {}}}}
+        b.load_legal_cards()
+        assert b.legal_cards is None
+        assert b.raw_standard_cards == {"cards": {"WHT": {"87": {}}}}
 
         b.save_banned_cards()
         mock_logger_instance.error.assert_called_once()
+
+    @patch("src.bot.create_logger")
+    @patch("src.bot_legalcards.save_card_snapshot")
+    @patch("src.bot_legalcards.load_card_snapshot")
+    @patch("src.bot_legalcards.read_card_file")
+    @patch("src.bot.discord")
+    @patch("builtins.open")
+    async def test_load_snapshot(
+        self,
+        mock_open,
+        mock_discord,
+        mock_read,
+        mock_load_snapshot,
+        mock_save_snapshot,
+        mock_logger
+    ):
+        mock_logger_instance = mock_logger.return_value
+        ruleset = MagicMock()
+        mock_load_snapshot.return_value = {
+            "raw": {"cards": {}},
+            "legal": {"count": 5},
+            "ruleset": ruleset
+        }
+
+        b = Bot("faketoken", True, "123")
+
+        mock_read.assert_not_called()
+        mock_save_snapshot.assert_not_called()
+        mock_load_snapshot.assert_any_call(
+            LEGAL_CARDS_SNAPSHOT, LEGAL_CARDS_FILE, []
+        )
+        assert b.legal_cards == {"count": 5}
+        assert b.rulesets == {"standard": ruleset, "expanded": ruleset}
+
+        # a stale snapshot falls back to the json file and is rewritten
+        mock_load_snapshot.return_value = None
+        mock_read.side_effect = lambda filename: {"cards": {}, "count": 2}
+        mock_save_snapshot.side_effect = Exception("disk full")
+        b.load_legal_cards()
+
+        assert b.legal_expanded_cards["count"] == 2
+        assert mock_save_snapshot.call_count == 2
+        mock_save_snapshot.assert_called_with(
+            LEGAL_CARDS_EXPANDED_SNAPSHOT, LEGAL_CARDS_EXPANDED_FILE, [],
+            b.raw_expanded_cards, b.legal_expanded_cards,
+            b.rulesets["expanded"]
+        )
+        mock_logger_instance.warning.assert_called_with(
+            f"Error saving {LEGAL_CARDS_EXPANDED_SNAPSHOT}: disk full"
+        )
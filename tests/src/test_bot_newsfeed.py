@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from src.bot import Bot
+from src.bot_newsfeed import next_newsfeed_interval
 from src.helpers import MAINTENANCE_MODE_MESSAGE
 
 
@@ -111,16 +112,36 @@ class TestBotNewsfeed(unittest.IsolatedAsyncioTestCase):
         b.newsfeed_channels = {"1234": {"channel_id": "2345"}}
         mock_bot.get_channel.return_value = None
 
+        def fetch(validators):
+            validators["etag"] = "abc"
+            return ["this is a post"]
+
+        mock_newsfeed.side_effect = fetch
         mock_logger_instance.reset_mock()
-        await b.do_get_newsfeed()
+        assert await b.do_get_newsfeed()
         mock_logger_instance.warning.assert_called_once()
-
+        # the poll is recorded, only the channel is retried
+        assert b.newsfeed_validators == {"etag": "abc"}
+        assert b.newsfeed_hash is not None
+        assert b.newsfeed_pending == {"1234"}
+
+        # the retry is served even when the page is not modified
+        mock_newsfeed.side_effect = None
+        mock_newsfeed.return_value = None
         mock_ctx = MockCtx()
         mock_bot.get_channel.return_value = mock_ctx
-        await b.do_get_newsfeed()
+        assert not await b.do_get_newsfeed()
 
         assert mock_ctx.last_response == "this is a post"
         assert b.newsfeed_channels["1234"]["latest_post"] == "this is a post"
+        assert b.newsfeed_pending == set()
+
+        # a guild that disabled the newsfeed is no longer retried
+        b.newsfeed_pending = {"999"}
+        await b.do_get_newsfeed()
+        assert b.newsfeed_pending == set()
+
+        mock_newsfeed.return_value = ["this is a post"]
 
         mock_ctx.last_response = "nothing"
         await b.do_get_newsfeed()
@@ -147,3 +168,64 @@ class TestBotNewsfeed(unittest.IsolatedAsyncioTestCase):
 
         await b.get_newsfeed_task()
         assert mock_logger_instance.info.call_count == 2
+
+    @patch("src.bot_newsfeed.get_newsfeed")
+    @patch("src.bot.create_logger")
+    @patch("src.bot.discord")
+    @patch("builtins.open")
+    async def test_bot_newsfeed_unchanged(
+        self,
+        mock_open,
+        mock_discord,
+        mock_logger,
+        mock_newsfeed
+    ):
+        mock_bot = MagicMock()
+        mock_discord.Bot.return_value = mock_bot
+        mock_ctx = MockCtx()
+        mock_ctx.send = MagicMock(side_effect=mock_ctx.send)
+        mock_bot.get_channel.return_value = mock_ctx
+
+        b = Bot("faketoken", False, "123")
+        b.newsfeed_channels = {"1234": {"channel_id": "2345"}}
+
+        mock_newsfeed.return_value = ["post 2", "post 1"]
+        await b.get_newsfeed_task()
+        mock_newsfeed.assert_called_with(b.newsfeed_validators)
+        assert mock_ctx.send.call_count == 2
+        # no history yet, the interval stays as it is
+        assert b.newsfeed_interval == 6
+
+        # same article list, no fan-out
+        mock_bot.get_channel.reset_mock()
+        await b.get_newsfeed_task()
+        mock_bot.get_channel.assert_not_called()
+        assert b.newsfeed_interval == 9
+
+        # page not modified
+        mock_newsfeed.return_value = None
+        await b.get_newsfeed_task()
+        mock_bot.get_channel.assert_not_called()
+        assert b.newsfeed_interval == 12
+
+        mock_newsfeed.return_value = ["post 3", "post 2", "post 1"]
+        await b.get_newsfeed_task()
+        assert mock_ctx.send.call_count == 3
+        assert mock_ctx.last_response == "post 3"
+        assert b.newsfeed_interval == 6
+
+        # a new channel gets the current posts on the next poll
+        await b.set_newsfeed_channel(mock_ctx)
+        assert b.newsfeed_hash is None
+        await b.do_get_newsfeed()
+        assert mock_ctx.send.call_count == 6
+
+        mock_newsfeed.side_effect = Exception("offline")
+        assert not await b.do_get_newsfeed()
+        mock_logger.return_value.error.assert_called_once()
+
+    def test_next_newsfeed_interval(self):
+        assert next_newsfeed_interval(6, True) == 3
+        assert next_newsfeed_interval(1.5, True) == 1
+        assert next_newsfeed_interval(6, False) == 9
+        assert next_newsfeed_interval(10, False) == 12
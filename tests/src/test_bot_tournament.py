@@ -11,6 +11,12 @@ from src.bot_tournament import (
 )
 
 
+def format_results(valid, error):
+    def validate(deck, formats):
+        return {f: {"valid": valid, "error": error} for f in formats}
+    return validate
+
+
 class MockCtx():
     def __init__(self):
         self.channel = MagicMock()
@@ -36,7 +42,7 @@ class TestBotTournament(unittest.IsolatedAsyncioTestCase):
 
     @patch("src.bot_tournament.os.remove")
     @patch("src.bot_tournament.fill_sheet")
-    @patch("src.bot_decklist.validate_decklist")
+    @patch("src.bot_decklist.validate_decklist_formats")
     @patch("src.bot_decklist.get_decklist_from_url")
     @patch("src.bot_tournament.get_sign_up_sheet")
     @patch("src.bot.create_logger")
@@ -92,7 +98,7 @@ class TestBotTournament(unittest.IsolatedAsyncioTestCase):
         assert b.check_sign_up_sheet() in [True, False]
 
         mock_logger_instance.reset_mokc()
-        b.update_signup_sheet_task()
+        await b.update_signup_sheet_task()
         assert mock_logger_instance.info.call_count == 2
 
         await b.update_signup_sheet(mock_ctx)
@@ -137,7 +143,7 @@ class TestBotTournament(unittest.IsolatedAsyncioTestCase):
         assert mock_ctx.last_response == SIGN_UP_SHEET_MISSING_ERROR
 
         mock_sign_up_sheet.return_value = True
-        mock_validate.return_value = (True, "")
+        mock_validate.side_effect = format_results(True, "")
         await b.tournament_signup_url(
             mock_ctx,
             "test person",
@@ -171,7 +177,8 @@ class TestBotTournament(unittest.IsolatedAsyncioTestCase):
         )
         mock_remove.assert_called_once()
 
-        mock_validate.return_value = (False, "err")
+        mock_validate.side_effect = format_results(False, "err")
+        b.invalidate_validation_cache()
         await b.tournament_signup_url(
             mock_ctx,
             "test person",
@@ -201,7 +208,7 @@ class TestBotTournament(unittest.IsolatedAsyncioTestCase):
 
         mock_sign_sheet.side_effect = Exception("failed")
 
-        def mock_do_update_sheet():
+        async def mock_do_update_sheet():
             return Exception("Test")
 
         b = Bot("faketoken", False, "123")
@@ -211,7 +218,7 @@ class TestBotTournament(unittest.IsolatedAsyncioTestCase):
         await b.update_signup_sheet(mock_ctx)
         assert mock_ctx.last_response.startswith("Failed")
 
-        b.update_signup_sheet_task()
+        await b.update_signup_sheet_task()
         mock_logger_instance.error.assert_called_once()
 
     @patch("src.bot.create_logger")
@@ -245,12 +252,12 @@ class TestBotTournament(unittest.IsolatedAsyncioTestCase):
         assert mock_ctx.last_response == MAINTENANCE_MODE_MESSAGE
 
         mock_logger_instance.reset_mock()
-        b.update_signup_sheet_task()
+        await b.update_signup_sheet_task()
         assert mock_logger_instance.info.call_count == 2
 
     @patch("src.bot_tournament.os.remove")
     @patch("src.bot_tournament.fill_sheet")
-    @patch("src.bot_decklist.validate_decklist")
+    @patch("src.bot_decklist.validate_decklist_formats")
     @patch("src.bot_decklist.get_decklist_from_url")
     @patch("src.bot_tournament.get_sign_up_sheet")
     @patch("src.bot.create_logger")
@@ -278,7 +285,7 @@ class TestBotTournament(unittest.IsolatedAsyncioTestCase):
         b = Bot("faketoken", False, "123")
 
         mock_decklist.return_value = {}
-        mock_validate.return_value = (True, "")
+        mock_validate.side_effect = format_results(True, "")
         b.user_decklists = {
             "303": {
                 "deckname": {
@@ -352,7 +359,8 @@ class TestBotTournament(unittest.IsolatedAsyncioTestCase):
 
         mock_sign_up_sheet.return_value = True
         b.tournament_signup_response = AsyncMock()
-        mock_validate.return_value = (False, "the error")
+        mock_validate.side_effect = format_results(False, "the error")
+        b.invalidate_validation_cache()
         await b.tournament_signup(
             mock_ctx, "first last", 12, 2000, "deckname", "standard"
         )
@@ -365,7 +373,8 @@ class TestBotTournament(unittest.IsolatedAsyncioTestCase):
         )
         assert b.tournament_signup_response.call_count == 0
 
-        mock_validate.return_value = (True, "")
+        mock_validate.side_effect = format_results(True, "")
+        b.invalidate_validation_cache()
         await b.tournament_signup(
             mock_ctx, "first last", 12, 2000, "deckname", "standard"
         )
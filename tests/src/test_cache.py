@@ -0,0 +1,111 @@
+import json
+import os
+from unittest.mock import patch, mock_open
+from src.cache import TTLCache, LogoCache
+
+
+def test_ttl_cache():
+    cache = TTLCache(max_size=2, ttl=60)
+
+    assert cache.get("a") is None
+    cache.set("a", {"pokemon": []})
+    assert cache.get("a") == {"pokemon": []}
+    assert "a" in cache
+    assert len(cache) == 1
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["size"] == 1
+
+    assert cache.pop("a") == {"pokemon": []}
+    assert cache.pop("a") is None
+    cache.set("a", 1)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(max_size=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+@patch("src.cache.time.time")
+def test_ttl_cache_expiry(mock_time):
+    mock_time.return_value = 1000
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1)
+
+    mock_time.return_value = 1059
+    assert cache.get("a") == 1
+
+    mock_time.return_value = 1060
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@patch("src.cache.time.time")
+def test_ttl_cache_persistence(mock_time):
+    mock_time.return_value = 1000
+    cache = TTLCache(ttl=60, filename="cache.json")
+    cache.set("a", {"pokemon": []})
+    cache.set("b", 2)
+
+    m = mock_open()
+    with patch("builtins.open", m):
+        cache.save()
+    m.assert_called_once_with("cache.json", "w")
+    saved = "".join(c.args[0] for c in m().write.call_args_list)
+    data = json.loads(saved)
+    assert data == [["a", 1060, {"pokemon": []}], ["b", 1060, 2]]
+
+    data[1][1] = 900
+    loaded = TTLCache(ttl=60, filename="cache.json")
+    with patch("builtins.open", mock_open(read_data=json.dumps(data))):
+        loaded.load()
+    assert loaded.get("a") == {"pokemon": []}
+    assert loaded.get("b") is None
+
+    no_file = TTLCache()
+    no_file.save()
+    no_file.load()
+    assert len(no_file) == 0
+
+
+def test_logo_cache(tmp_path):
+    folder = str(tmp_path / "logos")
+    cache = LogoCache(folder, max_bytes=10)
+
+    assert cache.get("a.png") is None
+    cache.set("a.png", b"logo")
+    cache.set("b.png", b"logo")
+    assert cache.get("a.png") == b"logo"
+    assert cache.get_stats()["files"] == 1
+
+    # survives a restart
+    cache = LogoCache(folder, max_bytes=10)
+    assert cache.get("b.png") == b"logo"
+    stats = cache.get_stats()
+    assert stats["urls"] == 2
+    assert stats["bytes"] == 4
+    assert stats["hits"] == 1
+
+    # a.png is the least recently used, its file is kept for b.png
+    cache.set("c.png", b"banner")
+    assert cache.get_stats()["urls"] == 3
+    cache.set("d.png", b"big")
+    assert cache.get("a.png") is None
+    assert cache.get("b.png") is None
+    assert cache.get("c.png") == b"banner"
+    assert cache.get("d.png") == b"big"
+    stats = cache.get_stats()
+    assert stats["files"] == 2
+    assert len(os.listdir(folder)) == 3
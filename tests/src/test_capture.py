@@ -0,0 +1,83 @@
+import asyncio
+import base64
+import json
+from collections import defaultdict
+from unittest.mock import MagicMock
+import mycdp
+from src.capture import JSONResponseCapture
+
+
+class MockPage:
+    def __init__(self, bodies: dict):
+        self.handlers = defaultdict(list)
+        self.bodies = bodies
+
+    def fire(self, event):
+        for handler in self.handlers[type(event)]:
+            handler(event)
+
+    async def send(self, command):
+        request_id = next(command)["params"]["requestId"]
+        return self.bodies[request_id]
+
+
+def mock_driver(bodies: dict):
+    sb = MagicMock()
+    sb.cdp.page = MockPage(bodies)
+    sb.cdp.loop = asyncio.new_event_loop()
+    sb.cdp.add_handler.side_effect = (
+        lambda event, handler: sb.cdp.page.handlers[event].append(handler)
+    )
+    return sb
+
+
+def response(request_id: str, url: str):
+    return mycdp.network.ResponseReceived(
+        request_id=mycdp.network.RequestId(request_id),
+        loader_id=None,
+        timestamp=None,
+        type_=None,
+        response=MagicMock(url=url),
+        has_extra_info=False,
+        frame_id=None
+    )
+
+
+def finished(request_id: str):
+    return mycdp.network.LoadingFinished(
+        request_id=mycdp.network.RequestId(request_id),
+        timestamp=None,
+        encoded_data_length=0
+    )
+
+
+def test_json_response_capture():
+    encoded = base64.b64encode(json.dumps({"page": 2}).encode()).decode()
+    sb = mock_driver({
+        "1": (json.dumps({"page": 1}), False),
+        "3": (encoded, True),
+        "4": ("<html></html>", False)
+    })
+    page = sb.cdp.page
+
+    with JSONResponseCapture(sb, "/screenservices/") as capture:
+        page.fire(response("1", "https://x/screenservices/GetEvents"))
+        page.fire(response("2", "https://x/logo.png"))
+        page.fire(response("3", "https://x/screenservices/GetEvents"))
+        page.fire(response("4", "https://x/screenservices/Broken"))
+        for request_id in ("1", "2", "4"):
+            page.fire(finished(request_id))
+
+        assert capture.wait_for_payload("test", timeout=1)
+        assert capture.payloads == [{"page": 1}]
+
+        assert capture.collect() == 0
+        page.fire(finished("3"))
+        assert capture.collect() == 1
+        assert capture.payloads == [{"page": 1}, {"page": 2}]
+
+        assert not capture.wait_for_payload("test", timeout=0)
+
+    assert page.handlers[mycdp.network.ResponseReceived] == []
+    assert page.handlers[mycdp.network.LoadingFinished] == []
+    sb.cdp.loop.close()
@@ -1,8 +1,12 @@
 import json
+import os
+import pickle
 from unittest.mock import patch, MagicMock
 from src.core import (
-    validate_decklist, fill_sheet, load_card_database,
-    get_offset, convert_banned_cards
+    validate_decklist, validate_decklist_formats, deck_hash, fill_sheet,
+    load_card_database, get_offset, convert_banned_cards, CardRuleset, Card,
+    read_card_file, build_card_database, save_card_snapshot,
+    load_card_snapshot
 )
 
 
@@ -33,6 +37,33 @@ def test_load_card_database():
     assert len(trainers.keys()) == 14
     assert len(energies.keys()) == 2
     assert count == 123
+    assert isinstance(trainers["Tool Scrapper"], Card)
+
+
+def test_card():
+    data = {
+        "name": "Reshiram { R }",
+        "type": "Pkmn  > Basic",
+        "color": "{ R }",
+        "rarity": "Rare",
+        "link": "https://pkmncards.com/card/reshiram/"
+    }
+    card = Card.from_dict(data, "WHT")
+    other = Card.from_dict(data.copy(), "".join(["W", "HT"]))
+
+    assert card.name == "Reshiram Fire"
+    assert card == other
+    assert card.set_code is other.set_code
+    assert card.type is other.type
+    assert card["rarity"] == "Rare"
+    assert card.get("link") == data["link"]
+    assert card.get("missing", 1) == 1
+    assert card.to_dict() == dict(data, name="Reshiram Fire")
+    assert pickle.loads(pickle.dumps(card)) == card
+    try:
+        card["missing"]
+    except KeyError as e:
+        assert str(e) == "'missing'"
 
 
 def test_load_card_database_with_banned_sets():
@@ -47,6 +78,47 @@ def test_load_card_database_with_banned_sets():
     assert count == 123
 
 
+def test_card_snapshot(tmp_path):
+    source = tmp_path / "legal_cards.json"
+    snapshot_file = str(tmp_path / "legal_cards.pickle")
+    with open("tests/src/test_legal_cards.json", "r") as f:
+        source.write_text(f.read())
+
+    assert load_card_snapshot(snapshot_file, str(source)) is None
+
+    raw_cards = read_card_file(str(source))
+    pokemon, trainers, energies, count = build_card_database(
+        raw_cards, ["BLK"]
+    )
+    legal_cards = {
+        "pokemon": pokemon,
+        "trainers": trainers,
+        "energies": energies,
+        "count": count
+    }
+    ruleset = CardRuleset(legal_cards)
+    save_card_snapshot(
+        snapshot_file, str(source), ["BLK"], raw_cards, legal_cards, ruleset
+    )
+
+    snapshot = load_card_snapshot(snapshot_file, str(source), ["BLK"])
+    assert snapshot["legal"]["count"] == 123
+    assert snapshot["legal"]["trainers"] == trainers
+    assert snapshot["ruleset"].is_basic_pokemon("WHT", "87")
+    assert snapshot["legal"]["pokemon"]["WHT"]["87"] is (
+        snapshot["raw"]["cards"]["WHT"]["087"]
+    )
+    assert load_card_snapshot(snapshot_file, str(source)) is None
+
+    # touching the source keeps the snapshot, changing it does not
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert load_card_snapshot(snapshot_file, str(source), ["BLK"])
+
+    source.write_text(source.read_text().replace("Sewaddle", "Sewaddla"))
+    assert load_card_snapshot(snapshot_file, str(source), ["BLK"]) is None
+
+
 def test_validate_decklist_60_cards():
     decklist = {}
     valid, error = validate_decklist(decklist)
@@ -300,6 +372,155 @@ def test_validate_decklist():
     assert error == ""
 
 
+def test_card_ruleset():
+    pokemon, trainers, energies, count = load_card_database(
+        filename="tests/src/test_legal_cards.json"
+    )
+    ruleset = CardRuleset({
+        "pokemon": pokemon,
+        "trainers": trainers,
+        "energies": energies,
+        "count": count
+    })
+    assert isinstance(ruleset.ace_spec_names, frozenset)
+    assert "ignition energy" in ruleset.ace_spec_names
+    assert "Tool Scrapper" in ruleset.trainer_names
+    assert "Prism Energy" in ruleset.energy_names
+    assert ruleset.is_legal_pokemon("WHT", "87")
+    assert not ruleset.is_legal_pokemon("WHT", "999")
+    assert ruleset.is_basic_pokemon("WHT", "87")
+    assert not ruleset.is_basic_pokemon("WHT", "88")
+
+
+def test_validate_decklist_with_ruleset():
+    decklist = {
+        "pokemon": [
+            {"name": "Sewaddle", "quantity": 1, "set": "WHT", "number": "87"}
+        ],
+        "energies": {
+            "fire energy": {"quantity": 57},
+            "Ignition Energy": {"quantity": 1}
+        },
+        "trainers": {
+            "Tool Scrapper": {"quantity": 1}
+        }
+    }
+    pokemon, trainers, energies, count = load_card_database(
+        filename="tests/src/test_legal_cards.json"
+    )
+    ruleset = CardRuleset({
+        "pokemon": pokemon,
+        "trainers": trainers,
+        "energies": energies,
+        "count": count
+    })
+    valid, error = validate_decklist(decklist, ruleset=ruleset)
+    assert valid
+    assert error == ""
+
+    decklist["energies"]["Ignition Energy"]["quantity"] = 2
+    decklist["energies"]["fire energy"]["quantity"] = 56
+    valid, error = validate_decklist(decklist, ruleset=ruleset)
+    assert valid is False
+    assert error == "Decklist can only contain one Ace Spec card."
+
+
+def test_validate_decklist_formats():
+    decklist = {
+        "pokemon": [
+            {"name": "Sewaddle", "quantity": 1, "set": "WHT", "number": "87"}
+        ],
+        "energies": {
+            "fire energy": {"quantity": 57},
+            "Prism Energy": {"quantity": 1}
+        },
+        "trainers": {
+            "Tool Scrapper": {"quantity": 1}
+        }
+    }
+    pokemon, trainers, energies, count = load_card_database(
+        filename="tests/src/test_legal_cards.json"
+    )
+    ruleset = CardRuleset({
+        "pokemon": pokemon,
+        "trainers": trainers,
+        "energies": energies,
+        "count": count
+    })
+    banned_cards = {
+        "pokemon": {},
+        "trainers": ["Tool Scrapper"],
+        "energies": ["Prism Energy"]
+    }
+    formats = {
+        "standard": (ruleset, banned_cards),
+        "expanded": (ruleset, None),
+        "unlimited": (None, None)
+    }
+
+    results = validate_decklist_formats(decklist, formats)
+    assert results == {
+        "standard": {
+            "valid": False,
+            "error": "Trainer card Tool Scrapper is banned."
+        },
+        "expanded": {"valid": True, "error": ""},
+        "unlimited": {"valid": True, "error": ""}
+    }
+    for format, (ruleset, banned) in formats.items():
+        valid, error = validate_decklist(
+            decklist, banned_cards=banned, ruleset=ruleset
+        )
+        assert results[format] == {"valid": valid, "error": error}
+
+    decklist["pokemon"][0]["number"] = "999"
+    results = validate_decklist_formats(decklist, formats)
+    assert results["standard"]["error"] == (
+        "Card Sewaddle from set WHT is not legal."
+    )
+    assert results["expanded"]["error"] == (
+        "Card Sewaddle from set WHT is not legal."
+    )
+    assert results["unlimited"]["valid"]
+
+    decklist["energies"]["fire energy"]["quantity"] = 1
+    results = validate_decklist_formats(decklist, formats)
+    for result in results.values():
+        assert result == {
+            "valid": False,
+            "error": "Decklist must contain exactly 60 cards."
+        }
+
+
+def test_deck_hash():
+    decklist = {
+        "pokemon": [
+            {"name": "Sewaddle", "quantity": 1, "set": "WHT", "number": "87"},
+            {"name": "Pikachu", "quantity": 2, "set": "SVI", "number": 5}
+        ],
+        "trainers": {
+            "Tool Scrapper": {"quantity": 1},
+            "Boss's Orders": {"quantity": 2}
+        },
+        "energies": {"fire energy": {"quantity": 54}}
+    }
+    reordered = {
+        "energies": {"fire energy": {"quantity": 54}},
+        "trainers": {
+            "Boss's Orders": {"quantity": 2},
+            "Tool Scrapper": {"quantity": 1}
+        },
+        "pokemon": [
+            {"name": "Pikachu", "quantity": 2, "set": "SVI", "number": "5"},
+            {"name": "Sewaddle", "quantity": 1, "set": "WHT", "number": "87"}
+        ]
+    }
+    assert deck_hash(decklist) == deck_hash(reordered)
+
+    reordered["trainers"]["Tool Scrapper"]["quantity"] = 2
+    assert deck_hash(decklist) != deck_hash(reordered)
+
+
 def test_get_offset():
     assert get_offset("pokemon", 14) == 19
     assert get_offset("pokemon", 13) == 23
@@ -421,6 +642,7 @@ def test_convert_banned_cards():
     try:
         convert_banned_cards(
             banned_cards, sets, {"WHT": {"087": {
+                "name": "Sewaddle",
                 "type": "dunno"
             }}}
         )
@@ -0,0 +1,191 @@
+from threading import Thread
+from unittest.mock import patch, call, MagicMock
+import mycdp
+from src.driver_pool import DriverPool, get_driver_memory_mb, BLOCKED_URLS
+
+
+@patch("src.driver_pool.Driver")
+def test_driver_pool_reuse(mock_driver):
+    mock_driver.side_effect = lambda **kwargs: MagicMock()
+    pool = DriverPool(size=2)
+
+    with pool.lease() as sb:
+        first = sb
+        pool.open(sb, "https://example.com/1")
+    with pool.lease() as sb:
+        assert sb is first
+        pool.open(sb, "https://example.com/2")
+
+    mock_driver.assert_called_once_with(
+        uc=True, locale_code="en", ad_block=True
+    )
+    first.uc_activate_cdp_mode.assert_called_once_with("about:blank")
+    first.cdp.open.assert_has_calls([
+        call("https://example.com/1"), call("https://example.com/2")
+    ])
+
+    stats = pool.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["idle"] == 1
+    assert stats["total"] == 1
+
+    pool.close()
+    first.quit.assert_called_once()
+    assert pool.get_stats()["total"] == 0
+
+
+class MockTrafficDriver(MagicMock):
+    """Fires network events for each page it opens."""
+
+    def setup(self, transferred: int, blocked: int):
+        handlers = {}
+        self.cdp.add_handler.side_effect = (
+            lambda event, handler: handlers.setdefault(event, handler)
+        )
+
+        def open_page(url):
+            handlers[mycdp.network.LoadingFinished](
+                MagicMock(encoded_data_length=transferred)
+            )
+            for _ in range(blocked):
+                handlers[mycdp.network.LoadingFailed](
+                    MagicMock(blocked_reason="inspector")
+                )
+
+        self.cdp.open.side_effect = open_page
+        return self
+
+
+@patch("src.driver_pool.mycdp.network.set_blocked_urls")
+@patch("src.driver_pool.Driver")
+def test_driver_pool_block_resources(mock_driver, mock_set_blocked):
+    sb = MockTrafficDriver().setup(transferred=2048, blocked=3)
+    mock_driver.return_value = sb
+    pool = DriverPool(size=1)
+
+    with pool.lease(block_resources=True) as leased:
+        pool.open(leased, "https://example.com/1")
+        pool.open(leased, "https://example.com/2")
+    mock_set_blocked.assert_called_once_with(urls=BLOCKED_URLS)
+
+    with pool.lease() as leased:
+        pool.open(leased, "https://example.com/3")
+    mock_set_blocked.assert_called_with(urls=[])
+    assert mock_set_blocked.call_count == 2
+
+    loads = pool.get_stats()["page_loads"]
+    assert loads["blocking"]["count"] == 2
+    assert loads["blocking"]["bytes"] == 4096
+    assert loads["blocking"]["blocked"] == 6
+    assert loads["full"]["count"] == 1
+    assert loads["full"]["bytes"] == 2048
+
+
+@patch("src.driver_pool.Driver")
+def test_driver_pool_recycle(mock_driver):
+    mock_driver.side_effect = lambda **kwargs: MagicMock()
+    pool = DriverPool(size=1, max_pages=2)
+
+    with pool.lease() as sb:
+        first = sb
+        pool.open(sb, "https://example.com/1")
+        pool.open(sb, "https://example.com/2")
+
+    first.quit.assert_called_once()
+
+    with pool.lease() as sb:
+        assert sb is not first
+
+    try:
+        with pool.lease() as sb:
+            second = sb
+            raise Exception("browser crashed")
+    except Exception as e:
+        assert str(e) == "browser crashed"
+
+    second.quit.assert_called_once()
+    stats = pool.get_stats()
+    assert stats["recycled"] == 2
+    assert stats["total"] == 0
+
+
+@patch("src.driver_pool.get_driver_memory_mb")
+@patch("src.driver_pool.Driver")
+def test_driver_pool_memory_ceiling(mock_driver, mock_memory):
+    mock_driver.side_effect = lambda **kwargs: MagicMock()
+    mock_memory.return_value = 2048
+    pool = DriverPool(size=1, max_memory_mb=1024)
+
+    with pool.lease() as sb:
+        first = sb
+
+    first.quit.assert_called_once()
+
+    mock_memory.return_value = 512
+    with pool.lease() as sb:
+        second = sb
+    second.quit.assert_not_called()
+
+
+@patch("src.driver_pool.Driver")
+def test_driver_pool_wait(mock_driver):
+    mock_driver.side_effect = lambda **kwargs: MagicMock()
+    pool = DriverPool(size=1)
+    leased = []
+
+    def lease_driver():
+        with pool.lease() as sb:
+            leased.append(sb)
+
+    sb = pool.acquire()
+    t = Thread(target=lease_driver)
+    t.start()
+    t.join(0.1)
+    assert leased == []
+
+    pool.release(sb)
+    t.join()
+    assert leased == [sb]
+    stats = pool.get_stats()
+    assert stats["waits"] == 1
+    assert stats["wait_time"] > 0
+    mock_driver.assert_called_once()
+
+
+@patch("src.driver_pool.Driver")
+def test_driver_pool_create_error(mock_driver):
+    mock_driver.side_effect = Exception("no chrome")
+    pool = DriverPool(size=1)
+
+    try:
+        pool.acquire()
+    except Exception as e:
+        assert str(e) == "no chrome"
+
+    assert pool.get_stats()["total"] == 0
+
+
+def test_get_driver_memory_mb(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.driver_pool.PROC_FOLDER", str(tmp_path))
+    # browser 1234, zygote 1300 and its renderer 1301, unrelated 999
+    for pid, parent, rss in (
+        (1234, 1, "102400 kB"),
+        (1300, 1234, "51200 kB"),
+        (1301, 1300, "51200 kB"),
+        (999, 1, "409600 kB")
+    ):
+        (tmp_path / str(pid)).mkdir()
+        (tmp_path / str(pid) / "status").write_text(
+            f"Name:\tchrome\nPPid:\t{parent}\nVmRSS:\t  {rss}\n"
+        )
+    (tmp_path / "self").mkdir()
+
+    assert get_driver_memory_mb(MagicMock(browser_pid=1234)) == 200
+    assert get_driver_memory_mb(MagicMock(browser_pid=1301)) == 50
+    assert get_driver_memory_mb(MagicMock(browser_pid=None)) is None
+    assert get_driver_memory_mb(MagicMock(browser_pid=4321)) is None
+
+    monkeypatch.setattr("src.driver_pool.PROC_FOLDER", str(tmp_path / "no"))
+    assert get_driver_memory_mb(MagicMock(browser_pid=1234)) is None
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from src.event_sync import plan_event_sync
+from src.pokemon import PokemonEvent
+
+NOW = datetime(2025, 10, 1)
+
+
+def scraped(
+    name: str,
+    date: str,
+    type: str = "Cup",
+    location: str = "location",
+    uid: str | None = None
+) -> PokemonEvent:
+    return PokemonEvent(name, type, location, date, "logo", False, uid=uid)
+
+
+def guild_event(name: str, start: datetime, days: int = 1, id: int = 0):
+    start = start.replace(tzinfo=timezone.utc)
+    event = MagicMock(
+        id=id,
+        start_time=start,
+        end_time=start + timedelta(days=days),
+        location="location",
+        description="Cup"
+    )
+    event.name = name
+    return event
+
+
+def test_plan_event_sync():
+    kept = guild_event("kept", datetime(2025, 10, 10), days=3)
+    duplicate = guild_event("kept", datetime(2025, 10, 10), days=3)
+    moved = guild_event("moved", datetime(2025, 10, 20))
+    started = guild_event("started", datetime(2025, 9, 30))
+    events = [
+        scraped("kept", "Friday, Oct 10 - Sunday, 12, 2025"),
+        scraped("moved", "Wednesday, October 22, 2025 03:00 PM"),
+        scraped("moved", "Wednesday, October 22, 2025 03:00 PM"),
+        scraped("past", "Wednesday, September 24, 2025 03:00 PM"),
+        scraped("league", "Wednesday, October 22, 2025", type="League Cup")
+    ]
+
+    plan = plan_event_sync(
+        events, [kept, duplicate, moved, started], now=NOW
+    )
+
+    assert plan.keep == [kept]
+    assert [event.name for event in plan.create] == ["moved"]
+    assert plan.create[0].start_date == datetime(2025, 10, 22)
+    assert plan.cancel == [duplicate, moved]
+    assert plan.edit == []
+    assert repr(plan) == (
+        "EventSyncPlan(create=1, edit=0, keep=1, cancel=2)"
+    )
+
+
+def test_plan_event_sync_empty():
+    plan = plan_event_sync([], [guild_event("old", datetime(2025, 9, 1))])
+    assert plan.create == []
+    assert plan.keep == []
+    assert plan.edit == []
+    assert plan.cancel == []
+
+
+def test_plan_event_sync_edit():
+    kept = guild_event("kept", datetime(2025, 10, 10), id=1)
+    relocated = guild_event("relocated", datetime(2025, 10, 10), id=2)
+    moved = guild_event("moved", datetime(2025, 10, 20), id=3)
+    started = guild_event("started", datetime(2025, 9, 30), id=4)
+    weekly = guild_event("weekly", datetime(2025, 10, 6), id=5)
+    events = [
+        scraped("kept", "Friday, October 10, 2025", uid="s:kept"),
+        scraped(
+            "relocated", "Friday, October 10, 2025",
+            location="elsewhere", uid="s:relocated"
+        ),
+        scraped("moved", "Wednesday, October 22, 2025", uid="s:moved"),
+        scraped("started", "Thursday, October 2, 2025", uid="s:started"),
+        scraped("weekly", "Monday, October 13, 2025", uid="s:weekly"),
+        scraped("weekly", "Monday, October 20, 2025", uid="s:weekly")
+    ]
+    identities = {
+        "s:moved": 3, "s:started": 4, "s:weekly": 5, "s:gone": 6
+    }
+
+    plan = plan_event_sync(
+        events,
+        [kept, relocated, moved, started, weekly],
+        now=NOW,
+        identities=identities
+    )
+
+    assert plan.keep == [kept]
+    assert plan.edit == [(events[1], relocated), (events[2], moved)]
+    # a started event is left alone and a shared uid is not matched
+    assert plan.create == events[3:]
+    assert plan.cancel == [weekly]
+    assert plan.identities == {"s:kept": 1, "s:relocated": 2, "s:moved": 3}
+    assert plan.unique_uids == {
+        "s:kept", "s:relocated", "s:moved", "s:started"
+    }
+
+
+def test_plan_event_sync_failed_sources():
+    listed = guild_event("listed", datetime(2025, 10, 10), id=1)
+    unlisted = guild_event("unlisted", datetime(2025, 10, 11), id=2)
+    gone = guild_event("gone", datetime(2025, 10, 12), id=3)
+    events = [
+        scraped("listed", "Friday, October 10, 2025", uid="ok:listed")
+    ]
+    identities = {"ok:listed": 1, "down:unlisted": 2, "ok:gone": 3}
+
+    plan = plan_event_sync(
+        events,
+        [listed, unlisted, gone],
+        now=NOW,
+        identities=identities,
+        failed_sources={"down"}
+    )
+
+    # the events of a store that failed to load are left as they are
+    assert plan.keep == [listed, unlisted]
+    assert plan.cancel == [gone]
+    assert plan.identities == {"ok:listed": 1, "down:unlisted": 2}
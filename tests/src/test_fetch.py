@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock
+from bs4 import BeautifulSoup
+from src.fetch import (
+    fetch_page, get_fetch_stats, children, select_one, node_text
+)
+
+
+def parse_lists(soup) -> list[int]:
+    return [len(children(ul)) for ul in soup.select("ul.list")]
+
+
+def test_fetch_page_http(html_server):
+    browser = MagicMock()
+
+    result = fetch_page(
+        "test", f"{html_server}/banned_cards.html", parse_lists, browser
+    )
+
+    assert result == [1, 2]
+    browser.assert_not_called()
+    stats = get_fetch_stats()["test"]
+    assert stats["http"] == 1
+    assert stats["browser"] == 0
+    assert stats["last"] == "http"
+
+
+def test_fetch_page_fallback(html_server):
+    browser = MagicMock(return_value="from browser")
+
+    # blocked or missing page
+    result = fetch_page(
+        "test", f"{html_server}/missing.html", parse_lists, browser
+    )
+    assert result == "from browser"
+    stats = get_fetch_stats()["test"]
+    assert stats["last"] == "browser"
+    assert stats["last_error"].startswith("HTTPError: 404")
+
+    # page that needs javascript to render
+    result = fetch_page(
+        "test",
+        f"{html_server}/challenge.html",
+        lambda soup: select_one(soup, "ul.list"),
+        browser
+    )
+    assert result == "from browser"
+    stats = get_fetch_stats()["test"]
+    assert stats["browser"] == 2
+    assert stats["http"] == 0
+    assert stats["last_error"] == "ParseError: ul.list not found"
+
+
+def test_fetch_page_browser_only():
+    browser = MagicMock(return_value="from browser")
+    parse_html = MagicMock()
+
+    assert fetch_page("test", "http://x", parse_html, browser) == (
+        "from browser"
+    )
+    parse_html.assert_not_called()
+    assert get_fetch_stats()["test"]["last_error"] is None
+
+
+def test_fetch_page_not_modified(html_server):
+    url = f"{html_server}/banned_cards.html"
+    browser = MagicMock()
+    validators = {}
+
+    assert fetch_page("test", url, parse_lists, browser, validators) == [
+        1, 2
+    ]
+    assert validators["last_modified"] is not None
+
+    parse_html = MagicMock()
+    assert fetch_page("test", url, parse_html, browser, validators) is None
+    parse_html.assert_not_called()
+    browser.assert_not_called()
+    stats = get_fetch_stats()["test"]
+    assert stats["http"] == 1
+    assert stats["not_modified"] == 1
+
+
+def test_node_text():
+    soup = BeautifulSoup(
+        '<span> <a>Pkmn</a> › <a>Basic</a></span><p>{<abbr>R</abbr>}</p>',
+        "html.parser"
+    )
+    assert node_text(soup.span) == "Pkmn  ›  Basic"
+    assert node_text(soup.p) == "{ R }"
@@ -1,6 +1,29 @@
+import asyncio
 import logging
+import threading
+import unittest
 from unittest.mock import patch
-from src.helpers import check_dir, create_logger, CustomThread
+from src.helpers import (
+    check_dir, create_logger, CustomThread, run_job, SingleFlight,
+    StatsTable
+)
+
+
+def test_stats_table():
+    table = StatsTable({"count": 0})
+    with table.entry("a") as stats:
+        stats["count"] += 1
+    with table.entry("a") as stats:
+        stats["count"] += 1
+
+    snapshot = table.snapshot()
+    assert snapshot == {"a": {"count": 2}}
+    snapshot["a"]["count"] = 10
+    assert table.snapshot()["a"]["count"] == 2
+    assert table.fields == {"count": 0}
+
+    table.clear()
+    assert table.snapshot() == {}
 
 
 @patch("os.makedirs")
@@ -40,3 +63,79 @@ def test_CustomThread_error():
     assert result is None
     assert thread.is_alive() is False
     assert error is not None
+
+
+class TestRunJob(unittest.IsolatedAsyncioTestCase):
+
+    async def test_run_job(self):
+        def dummy_function(a, b=0):
+            return a + b
+
+        result, error = await run_job(dummy_function, args=(1,), kwargs={
+            "b": 2
+        })
+        assert result == 3
+        assert error is None
+
+    async def test_run_job_error(self):
+        def dummy_function():
+            raise Exception("Test")
+
+        result, error = await run_job(dummy_function)
+        assert result is None
+        assert str(error) == "Test"
+
+    async def test_run_job_does_not_block_loop(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking_function():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        job = asyncio.create_task(run_job(blocking_function))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+
+        # the loop keeps serving other work while the job is running
+        assert not job.done()
+        release.set()
+        result, error = await job
+        assert result == "done"
+        assert error is None
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def test_single_flight(self):
+        calls = []
+        release = threading.Event()
+
+        def dummy_function(key):
+            calls.append(key)
+            release.wait(5)
+            return f"result {key}"
+
+        flight = SingleFlight()
+        jobs = [
+            asyncio.create_task(flight.run("a", dummy_function, args=("a",)))
+            for _ in range(3)
+        ]
+        jobs.append(
+            asyncio.create_task(flight.run("b", dummy_function, args=("b",)))
+        )
+        while len(calls) < 2:
+            await asyncio.sleep(0.01)
+        release.set()
+
+        results = await asyncio.gather(*jobs)
+        assert results[:3] == [("result a", None)] * 3
+        assert results[3] == ("result b", None)
+        assert sorted(calls) == ["a", "b"]
+        assert flight.coalesced == 2
+
+        # finished jobs are not reused
+        result, error = await flight.run("a", dummy_function, args=("a",))
+        assert result == "result a"
+        assert len(calls) == 3
@@ -1,56 +1,71 @@
+import json
+import pytest
 from unittest.mock import patch, MagicMock
-from src.limitless import get_decklist_from_url
+from src.limitless import (
+    get_decklist_from_url, canonicalize_limitless_url, DECKLIST_TABLE_SCRIPT
+)
 
 
-@patch("src.limitless.Driver")
+@patch("src.driver_pool.Driver")
 def test_get_decklist_from_url(mock_driver):
     mock_driver_instance = MagicMock()
     mock_driver.return_value = mock_driver_instance
-    table_mock = MagicMock()
     mock_driver_instance.cdp.find_visible_elements.return_value = [
-        table_mock, table_mock, table_mock, table_mock, table_mock
+        MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock()
     ]
 
-    table_children = [
-        MagicMock(tag_name="tr", children=[
-            MagicMock(tag_name="th", text="Pokemon"),
-        ]),
-        MagicMock(tag_name="tr", children=[
-            MagicMock(tag_name="td", text="1"),
-            MagicMock(tag_name="td", text="Pikachu"),
-            MagicMock(tag_name="td", text="Base Set"),
-            MagicMock(tag_name="td", text="25"),
-            MagicMock(tag_name="td", text="H"),
-        ]),
-        MagicMock(tag_name="tr", children=[
-            MagicMock(tag_name="th", text="Trainer"),
-        ]),
-        MagicMock(tag_name="tr", children=[
-            MagicMock(tag_name="td", text="2"),
-            MagicMock(tag_name="td", text="Potion"),
-        ]),
-        MagicMock(tag_name="tr", children=[
-            MagicMock(tag_name="th", text="Energy"),
-        ]),
-        MagicMock(tag_name="tr", children=[
-            MagicMock(tag_name="td", text="3"),
-            MagicMock(tag_name="td", text="Fire Energy"),
-        ]),
-        MagicMock(tag_name="tr", children=[
-            MagicMock(tag_name="td", text="3"),
-        ]),
-    ]
-    table_mock.children = table_children
+    def cells(tag, *texts):
+        return [{"tag": tag, "text": text} for text in texts]
+
+    mock_driver_instance.cdp.evaluate.return_value = json.dumps([
+        cells("th", "Pokemon"),
+        cells("td", "1", "Pikachu", "Base Set", "25", "H"),
+        cells("th", "Trainer"),
+        cells("td", "2", "Potion"),
+        cells("th", "Energy"),
+        cells("td", "3", "Fire Energy"),
+        cells("td", "3"),
+    ])
 
     result = get_decklist_from_url("https://example.com/decklist")
 
     mock_driver_instance.uc_activate_cdp_mode.assert_called_once()
-    assert mock_driver_instance.sleep.call_count == 3
+    mock_driver_instance.sleep.assert_not_called()
+    assert mock_driver_instance.cdp.is_element_visible.call_count == 2
     assert mock_driver_instance.cdp.find_visible_elements.call_count == 3
-    mock_driver_instance.quit.assert_called_once()
+    mock_driver_instance.cdp.evaluate.assert_called_once_with(
+        DECKLIST_TABLE_SCRIPT
+    )
+    mock_driver_instance.quit.assert_not_called()
     assert len(result["pokemon"]) == 1
     assert result["pokemon"][0]["name"] == "Pikachu"
     assert len(result["trainers"]) == 1
     assert result["trainers"]["Potion"]["quantity"] == 2
     assert len(result["energies"]) == 1
     assert result["energies"]["Fire Energy"]["quantity"] == 3
+
+
+@patch("src.limitless.MENU_TIMEOUT", 0)
+@patch("src.driver_pool.Driver")
+def test_get_decklist_from_url_menu_closed(mock_driver):
+    mock_driver_instance = mock_driver.return_value
+    mock_driver_instance.cdp.find_visible_elements.return_value = [
+        MagicMock(), MagicMock(), MagicMock(), MagicMock()
+    ]
+
+    with pytest.raises(TimeoutError):
+        get_decklist_from_url("https://example.com/decklist")
+    mock_driver_instance.cdp.evaluate.assert_not_called()
+
+
+def test_canonicalize_limitless_url():
+    expected = "https://my.limitlesstcg.com/builder?i=abc123"
+    assert canonicalize_limitless_url(
+        "https://my.limitlesstcg.com/builder?i=abc123"
+    ) == expected
+    assert canonicalize_limitless_url(
+        " http://MY.limitlesstcg.com/builder/?i=abc123&utm_source=x "
+    ) == expected
+    assert canonicalize_limitless_url(
+        "my.limitlesstcg.com/builder?i=abc123"
+    ) == expected
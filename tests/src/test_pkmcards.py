@@ -1,33 +1,41 @@
+import json
 from datetime import datetime
+from threading import Barrier
 from unittest.mock import patch, MagicMock, ANY
 from src.pkmncards import (
     get_legal_card_list, save_cards_to_file,
-    get_legal_cards, get_card_text, get_pokemon_sets, check_should_skip_set
+    get_legal_cards, get_card_text, get_pokemon_sets, check_should_skip_set,
+    sync_legal_cards, load_saved_cards, CARD_LIST_PAGE_URL
 )
+from src.core import remove_types_from_card_name
+from src.driver_pool import DRIVER_POOL
+from src.fetch import get_fetch_stats
+
+
+def page_report(
+    fetched: int = 0, resumed: int = 0, skipped: int = 0, retries: int = 0
+) -> dict:
+    return {
+        "fetched": fetched,
+        "resumed": resumed,
+        "skipped": skipped,
+        "retries": retries
+    }
 
 
 def pokemon_card_mock():
-    return [
-        MagicMock(children=[
-            MagicMock(children=[
-                MagicMock(children=[
-                    MagicMock(text="Set 1"),
-                    MagicMock(text="001"),
-                    MagicMock(
-                        text="Card 1",
-                        children=[
-                            {"href": "https://example.com/card1"}
-                        ]),
-                    MagicMock(text="Type 1"),
-                    MagicMock(text="Color 1"),
-                    MagicMock(text="Rare")
-                ])
-            ])
-        ])
-    ]
+    return [{
+        "set": "Set 1",
+        "number": "001",
+        "name": "Card 1",
+        "type": "Type 1",
+        "color": "Color 1",
+        "rarity": "Rare",
+        "link": "https://example.com/card1"
+    }]
 
 
-@patch("src.pkmncards.Driver")
+@patch("src.driver_pool.Driver")
 def test_get_card_text(mock_driver):
     mock_driver_instance = mock_driver.return_value
     mock_driver_instance.cdp.find_visible_elements.return_value = [
@@ -40,15 +48,23 @@ def test_get_card_text(mock_driver):
         uc=True, locale_code="en", ad_block=True
     )
     mock_driver_instance.uc_activate_cdp_mode.assert_called_once_with(
+        "about:blank"
+    )
+    mock_driver_instance.cdp.open.assert_called_once_with(
         "https://example.com/card"
     )
-    mock_driver_instance.sleep.assert_called_once_with(1)
+    mock_driver_instance.sleep.assert_not_called()
+    mock_driver_instance.cdp.is_element_visible.assert_called_once_with(
+        "div.card-text-area div.card-tabs div.tab div.text"
+    )
     assert card_text == "Card text here"
 
 
+@patch("src.pkmncards.load_saved_cards")
 @patch("src.pkmncards.get_legal_card_list")
 @patch("src.pkmncards.save_cards_to_file")
-def test_get_legal_cards(mock_save, mock_get):
+def test_get_legal_cards(mock_save, mock_get, mock_load):
+    mock_load.return_value = None
     mock_get.return_value = ([
         {
             "set": "Set 1",
@@ -59,21 +75,131 @@ def test_get_legal_cards(mock_save, mock_get):
             "rarity": "Rare",
             "link": "https://example.com/card1"
         }
-    ], True, 1)
-    get_legal_cards("test.json")
+    ], True, 1, page_report(fetched=1))
+    report = get_legal_cards("test.json")
     assert mock_get.call_count == 2
     assert mock_save.call_count == 2
+    assert report["standard"] == {
+        "format": ANY,
+        "valid": True,
+        "count": 1,
+        "mode": "full",
+        "new_cards": 1,
+        "pages_fetched": 1,
+        "pages_skipped": 0,
+        "pages_resumed": 0,
+        "pages_retried": 0,
+        "saved": True,
+        "wall_time": ANY
+    }
+    assert report["expanded"]["format"] == "blw-on-expanded-current"
+
+
+@patch("src.pkmncards.sync_legal_cards")
+def test_get_legal_cards_concurrent(mock_sync):
+    barrier = Barrier(2, timeout=5)
+
+    def sync(formats, filename, previous_count):
+        # both formats must be running at the same time to pass
+        barrier.wait()
+        if filename == "standard.json":
+            raise Exception("browser died")
+        return {"format": formats[0], "valid": True}
+
+    mock_sync.side_effect = sync
+    report = get_legal_cards("standard.json", "expanded.json")
+
+    assert report["standard"]["error"] == "browser died"
+    assert report["standard"]["valid"] is False
+    assert report["expanded"]["valid"]
+    assert "error" not in report["expanded"]
+    for format_report in report.values():
+        assert format_report["wall_time"] >= 0
 
 
 @patch("src.pkmncards.datetime")
+@patch("src.pkmncards.load_saved_cards")
 @patch("src.pkmncards.get_legal_card_list")
 @patch("src.pkmncards.save_cards_to_file")
-def test_get_legal_cards_fail(mock_save, mock_get, mock_datetime):
+def test_get_legal_cards_fail(mock_save, mock_get, mock_load, mock_datetime):
     mock_datetime.now.return_value = datetime(2024, 4, 15)
-    mock_get.return_value = ([], False, 0)
-    get_legal_cards("test.json")
+    mock_load.return_value = None
+    mock_get.return_value = (
+        [], False, 0, page_report()
+    )
+    report = get_legal_cards("test.json")
     assert mock_get.call_count == 3
     assert mock_save.call_count == 0
+    assert report["standard"]["valid"] is False
+    assert report["standard"]["format"] == mock_get.call_args_list[1][0][0]
+
+
+def new_card(number: str) -> dict:
+    return {
+        "set": "Set 1",
+        "number": number,
+        "name": f"Card {number}",
+        "type": "Type 1",
+        "color": "Color 1",
+        "rarity": "Rare",
+        "link": f"https://example.com/card{number}"
+    }
+
+
+@patch("src.pkmncards.load_saved_cards")
+@patch("src.pkmncards.get_legal_card_list")
+@patch("src.pkmncards.save_cards_to_file")
+def test_sync_legal_cards(mock_save, mock_get, mock_load):
+    saved = {"cards": {"Set 1": {"001": {}, "002": {}}}, "count": 2}
+    mock_load.return_value = saved
+    mock_get.return_value = (
+        [new_card("003")], True, 3, page_report(fetched=1, skipped=4)
+    )
+
+    report = sync_legal_cards(["format"], "test.json")
+
+    mock_get.assert_called_once_with(
+        "format", 2, {("Set 1", "001"), ("Set 1", "002")}
+    )
+    mock_save.assert_called_once_with(
+        [new_card("003")], 3, "test.json", saved
+    )
+    assert report["mode"] == "delta"
+    assert report["new_cards"] == 1
+    assert report["pages_fetched"] == 1
+    assert report["pages_skipped"] == 4
+
+    # up to date
+    mock_get.reset_mock()
+    mock_save.reset_mock()
+    mock_get.return_value = (
+        [], True, 2, page_report()
+    )
+    report = sync_legal_cards(["format"], "test.json")
+    mock_save.assert_not_called()
+    assert report["mode"] == "up to date"
+
+    # a card was removed, the counts don't reconcile
+    mock_get.reset_mock()
+    mock_get.side_effect = [
+        (
+            [new_card("004"), new_card("003")], True, 3,
+            page_report(fetched=1, skipped=4)
+        ),
+        (
+            [new_card("004"), new_card("003"), new_card("001")], True, 3,
+            page_report(fetched=5)
+        )
+    ]
+    report = sync_legal_cards(["format"], "test.json")
+    mock_get.assert_called_with("format", 0)
+    mock_save.assert_called_once_with(
+        [new_card("004"), new_card("003"), new_card("001")], 3,
+        "test.json", None
+    )
+    assert report["mode"] == "full"
+    assert report["pages_fetched"] == 6
+    assert report["pages_skipped"] == 0
 
 
 @patch("builtins.open")
@@ -105,78 +231,70 @@ def test_save_cards_to_file(mock_dump, mock_open):
     }, mock_open.return_value, indent=4)
 
 
-@patch("src.pkmncards.Driver")
+@patch("builtins.open")
+@patch("src.pkmncards.json.dump")
+def test_save_cards_to_file_merge(mock_dump, mock_open):
+    saved = {
+        "cards": {"Set 1": {"001": {"name": "Card 1"}}},
+        "count": 1
+    }
+    save_cards_to_file([new_card("002")], 2, "test.json", saved)
+
+    saved_cards = mock_dump.call_args[0][0]
+    assert saved_cards["count"] == 2
+    assert list(saved_cards["cards"]["Set 1"]) == ["001", "002"]
+    assert list(saved["cards"]["Set 1"]) == ["001"]
+
+
+@patch("builtins.open")
+@patch("src.pkmncards.json.load")
+def test_load_saved_cards(mock_load, mock_open):
+    mock_load.return_value = {"cards": {}, "count": 0}
+    assert load_saved_cards("test.json") == {"cards": {}, "count": 0}
+
+    mock_load.side_effect = Exception("missing")
+    assert load_saved_cards("test.json") is None
+
+
+class MockCardPages:
+    def __init__(self, total: int, page_size: int = 200):
+        self.total = total
+        self.page_size = page_size
+        self.empty = True
+
+    def __call__(self, script):
+        return json.dumps({
+            "results": "no results" if self.empty else "1 thru 2",
+            "range": f"1 thru {self.page_size}",
+            "total": f"/ {self.total}",
+            "cards": pokemon_card_mock()
+        })
+
+
+@patch("src.driver_pool.Driver")
 def test_get_legal_card_list(mock_driver):
     value_max = 262
-
-    class MockFindVisibleElements:
-        def __init__(self):
-            self.counter = 0
-            self.v_max = value_max
-            self.empty = True
-
-        def __call__(self, selector):
-            if selector == "article.type-pkmn_card":
-                return pokemon_card_mock()
-            elif selector == "li.next-link a":
-                return [MagicMock()]
-            elif selector == "span.range-current":
-                v_from = 200 * self.counter
-                v_to = min(200 * (self.counter + 1), self.v_max)
-                self.counter += 1
-                return [
-                    MagicMock(
-                        text=f"{v_from} thru {v_to}"
-                    )
-                ]
-            elif selector == "span.out-of":
-                return [
-                    MagicMock(
-                        children=[
-                            MagicMock(
-                                text=f"/ {self.v_max}"
-                            )
-                        ]
-                    )
-                ]
-            elif selector == "li.results":
-                if self.empty:
-                    return [
-                        MagicMock(
-                            children=[
-                                MagicMock(
-                                    text="no results"
-                                )
-                            ]
-                        )
-                    ]
-                return [
-                    MagicMock(
-                        children=[
-                            MagicMock(
-                                text="1 thru 2"
-                            )
-                        ]
-                    )
-                ]
-
-    mock_elements = MockFindVisibleElements()
+    mock_elements = MockCardPages(value_max)
     mock_driver_instance = mock_driver.return_value
-    mock_driver_instance.cdp.find_visible_elements = mock_elements
-    cards, valid, count = get_legal_card_list("", 0)
+    mock_driver_instance.cdp.evaluate = mock_elements
+    cards, valid, count, pages = get_legal_card_list("", 0)
 
     assert len(cards) == 0
     assert not valid
     assert count == 0
-    mock_driver_instance.sleep.assert_called_once()
+    assert pages == page_report()
+    mock_driver_instance.sleep.assert_not_called()
+    mock_driver_instance.cdp.is_element_visible.assert_called_once_with(
+        "li.results"
+    )
     mock_driver_instance.uc_activate_cdp_mode.assert_called_once()
-    mock_driver_instance.quit.assert_called_once()
+    mock_driver_instance.quit.assert_not_called()
     mock_driver.assert_called_once_with(
         uc=True, locale_code="en", ad_block=True
     )
 
     mock_elements.empty = False
-    cards, valid, count = get_legal_card_list("", 0)
+    cards, valid, count, pages = get_legal_card_list("test-format", 0)
 
     assert valid
     assert count == value_max
@@ -188,21 +306,136 @@ def test_get_legal_card_list(mock_driver):
     assert cards[0]["color"] == "Color 1"
     assert cards[0]["rarity"] == "Rare"
     assert cards[0]["link"] == "https://example.com/card1"
-    assert mock_driver_instance.uc_activate_cdp_mode.call_count == 2
-    assert mock_driver_instance.sleep.call_count == 3
-    assert mock_driver_instance.quit.call_count == 2
-    assert mock_elements.counter == 2
+    assert pages == page_report(fetched=2)
+    mock_driver.assert_called_once()
+    mock_driver_instance.uc_activate_cdp_mode.assert_called_once()
+    mock_driver_instance.cdp.open.assert_any_call(
+        CARD_LIST_PAGE_URL.format(current_format="test-format", page=2)
+    )
+    mock_driver_instance.cdp.is_element_visible.assert_called_with(
+        "article.type-pkmn_card"
+    )
+    mock_driver_instance.cdp.get_text.assert_not_called()
+    mock_driver_instance.quit.assert_not_called()
 
-    cards, valid, count = get_legal_card_list("", value_max)
+    cards, valid, count, pages = get_legal_card_list("", value_max)
     assert len(cards) == 0
     assert valid
     assert count == value_max
-    assert mock_driver_instance.sleep.call_count == 4
+    assert pages == page_report()
+    mock_driver_instance.sleep.assert_not_called()
+
+    # delta mode stops at the first page with a known card
+    cards, valid, count, pages = get_legal_card_list(
+        "", 0, {("Set 1", "001")}
+    )
+    assert len(cards) == 0
+    assert valid
+    assert pages == page_report(fetched=1, skipped=1)
+
+
+@patch("src.driver_pool.Driver")
+def test_get_legal_card_list_parallel(mock_driver):
+    mock_elements = MockCardPages(total=1000, page_size=100)
+    mock_elements.empty = False
+    drivers = []
+
+    def new_driver(**kwargs):
+        sb = MagicMock()
+        sb.cdp.evaluate = mock_elements
+        drivers.append(sb)
+        return sb
+
+    mock_driver.side_effect = new_driver
+    opened = []
+
+    def open_page(sb, url):
+        opened.append(url)
+        # the page 5 fails once and is retried on its own
+        if url.startswith("https://pkmncards.com/page/5/") and (
+            opened.count(url) == 1
+        ):
+            raise Exception("page crashed")
+
+    with patch("src.pkmncards.DRIVER_POOL.open", side_effect=open_page):
+        cards, valid, count, pages = get_legal_card_list("f", 0)
+
+    assert valid
+    assert count == 1000
+    assert len(cards) == 10
+    assert pages == page_report(fetched=10, retries=1)
+    assert len(drivers) <= DRIVER_POOL.size + 1
+    for page in range(2, 11):
+        assert CARD_LIST_PAGE_URL.format(
+            current_format="f", page=page
+        ) in opened
+
+    # in delta mode pages are fetched a batch at a time
+    def fetch_page(current_format, page):
+        return [new_card(f"{page:03}")], 0
+
+    with patch("src.pkmncards.fetch_card_page", side_effect=fetch_page):
+        cards, valid, count, pages = get_legal_card_list(
+            "f", 0, {("Set 1", "004"), ("Set 1", "005")}
+        )
+    assert [card["number"] for card in cards] == ["001", "002", "003"]
+    assert pages == page_report(fetched=5, skipped=5)
+
+
+@patch("src.pkmncards.fetch_card_page")
+@patch("src.driver_pool.Driver")
+def test_get_legal_card_list_resume(mock_driver, mock_fetch):
+    mock_elements = MockCardPages(total=1000, page_size=100)
+    mock_elements.empty = False
+    mock_driver.return_value.cdp.evaluate = mock_elements
+    fetched = []
+
+    def fetch_page(current_format, page):
+        fetched.append(page)
+        if page == 5 and broken:
+            raise Exception("chrome crashed")
+        return [new_card(f"{page:03}")], 0
+
+    mock_fetch.side_effect = fetch_page
+    broken = True
+    try:
+        get_legal_card_list("f", 0)
+    except Exception as e:
+        assert str(e) == "chrome crashed"
+    assert sorted(fetched) == list(range(2, 11))
+
+    # the next run only fetches the page that failed
+    fetched.clear()
+    broken = False
+    cards, valid, count, pages = get_legal_card_list("f", 0)
+    assert fetched == [5]
+    assert pages == page_report(fetched=2, resumed=8)
+    assert [card["number"] for card in cards] == [
+        "001", *[f"{page:03}" for page in range(2, 11)]
+    ]
+
+    # a completed run leaves nothing to resume
+    fetched.clear()
+    get_legal_card_list("f", 0)
+    assert len(fetched) == 9
+
+    # a changed total starts over
+    broken = True
+    try:
+        get_legal_card_list("f", 0)
+    except Exception:
+        pass
+    fetched.clear()
+    broken = False
+    mock_elements.total = 1001
+    cards, valid, count, pages = get_legal_card_list("f", 0)
+    assert len(fetched) == 10
+    assert pages["resumed"] == 0
 
 
 @patch("builtins.open")
 @patch("src.pkmncards.json.dump")
-@patch("src.pkmncards.Driver")
+@patch("src.driver_pool.Driver")
 def test_get_pokemon_sets(
     mock_driver, mock_dump, mock_open
 ):
@@ -223,11 +456,68 @@ def test_get_pokemon_sets(
         "prismatic evolutions": "PRE",
         "Fake Set": "Fake Set"
     }, ANY, indent=4)
-    mock_driver_instance.quit.assert_called_once()
+    mock_driver_instance.quit.assert_not_called()
 
 
 def test_check_should_skip_set():
     assert check_should_skip_set("Shield & Sword Energy") == (False, False)
     assert check_should_skip_set("Miscellaneous") == (True, False)
     assert check_should_skip_set("Fake Set") == (False, False)
-    assert check_should_skip_set("Destined Rivals (DRI)") == (False, True)
\ No newline at end of file
+    assert check_should_skip_set("Destined Rivals (DRI)") == (False, True)
+
+
+@patch("src.driver_pool.Driver")
+def test_get_legal_card_list_http(mock_driver, html_server, monkeypatch):
+    monkeypatch.setattr(
+        "src.pkmncards.CARD_LIST_ULR",
+        f"{html_server}/pkmncards/page_1.html?s={{current_format}}"
+    )
+    monkeypatch.setattr(
+        "src.pkmncards.CARD_LIST_PAGE_URL",
+        f"{html_server}/pkmncards/page_{{page}}.html?s={{current_format}}"
+    )
+
+    cards, valid, count, pages = get_legal_card_list("standard", 0)
+
+    assert valid
+    assert count == 5
+    assert [card["name"] for card in cards] == [
+        "Card 1", "Card 2", "Card 3 { R }", "Card 4", "Card 5"
+    ]
+    assert cards[0] == {
+        "set": "Set 1",
+        "number": "001",
+        "name": "Card 1",
+        "type": "Pokémon",
+        "color": "Grass",
+        "rarity": "Common",
+        "link": "https://pkmncards.com/card/Card 1/"
+    }
+    # text nodes are joined with " ", like the browser's Element.text
+    assert cards[2]["type"] == "Pkmn  ›  Basic"
+    assert cards[2]["color"] == "{ R }"
+    assert remove_types_from_card_name(cards[2]["name"]) == "Card 3 Fire"
+    assert pages == page_report(fetched=2)
+    mock_driver.assert_not_called()
+    assert get_fetch_stats()["pkmncards cards"]["http"] == 2
+
+
+@patch("src.driver_pool.Driver")
+def test_get_pokemon_sets_http(
+    mock_driver, html_server, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(
+        "src.pkmncards.SETS_URL", f"{html_server}/pkmncards/sets.html"
+    )
+    filename = str(tmp_path / "card_sets.json")
+
+    get_pokemon_sets(filename)
+
+    with open(filename, "r") as f:
+        assert json.load(f) == {
+            "black star promo": "SMP",
+            "destined rivals": "DRI",
+            "journey together": "JTG"
+        }
+    mock_driver.assert_not_called()
+    assert get_fetch_stats()["pkmncards sets"]["last"] == "http"
@@ -1,8 +1,9 @@
 from unittest.mock import patch, MagicMock
+from src.fetch import get_fetch_stats
 from src.pokebeach import get_newsfeed
 
 
-@patch("src.pokebeach.Driver")
+@patch("src.driver_pool.Driver")
 def test_get_newsfeed(mock_driver):
     mock_driver_instance = mock_driver.return_value
 
@@ -27,6 +28,48 @@ def test_get_newsfeed(mock_driver):
     assert posts[0] == "https://www.pokebeach.com/post1"
     mock_driver_instance.cdp.find_visible_elements.assert_called_once()
     mock_driver_instance.uc_activate_cdp_mode.assert_called_once_with(
+        "about:blank"
+    )
+    mock_driver_instance.cdp.open.assert_called_once_with(
         "https://www.pokebeach.com/"
     )
-    mock_driver_instance.sleep.assert_called_once_with(10)
+    mock_driver_instance.sleep.assert_not_called()
+    mock_driver_instance.cdp.is_element_visible.assert_called_once_with(
+        "div.xpress_articleList"
+    )
+    assert get_fetch_stats()["pokebeach newsfeed"]["last"] == "browser"
+
+
+@patch("src.driver_pool.Driver")
+def test_get_newsfeed_http(mock_driver, html_server, monkeypatch):
+    monkeypatch.setattr(
+        "src.pokebeach.POKEBEACH_URL", f"{html_server}/pokebeach.html"
+    )
+
+    assert get_newsfeed() == [
+        "https://www.pokebeach.com/post1",
+        "https://www.pokebeach.com/post2"
+    ]
+    mock_driver.assert_not_called()
+    assert get_fetch_stats()["pokebeach newsfeed"]["http"] == 1
+
+
+@patch("src.driver_pool.Driver")
+def test_get_newsfeed_fallback(mock_driver, html_server, monkeypatch):
+    monkeypatch.setattr(
+        "src.pokebeach.POKEBEACH_URL", f"{html_server}/challenge.html"
+    )
+    mock_driver.return_value.cdp.find_visible_elements.return_value = [
+        MagicMock(children=[])
+    ]
+
+    assert get_newsfeed() == []
+    mock_driver.assert_called_once()
+    mock_driver.return_value.cdp.open.assert_called_once_with(
+        f"{html_server}/challenge.html"
+    )
+    stats = get_fetch_stats()["pokebeach newsfeed"]
+    assert stats["browser"] == 1
+    assert stats["last_error"] == (
+        "ParseError: div.xpress_articleList not found"
+    )
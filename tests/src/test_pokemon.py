@@ -1,10 +1,17 @@
+import json
 import os
+import time
+import pytest
+from datetime import datetime
+from threading import Barrier, Event
 from src.pokemon import (
     get_decklist_png, get_decklist_pdf, convert_pdf_to_png,
     get_premier_events, get_store_events, extract_event_info,
-    PokemonEvent, get_logo, get_banned_cards
+    PokemonEvent, get_logo, get_banned_cards, PREMIER_EVENTS_SCRIPT,
+    STORE_EVENTS_SCRIPT, SCROLL_TO_LAST_EVENT_SCRIPT, parse_record_date
 )
 from src.core import DATA_FOLDER
+from src.fetch import get_fetch_stats
 from unittest.mock import patch, call, MagicMock
 
 
@@ -25,28 +32,29 @@ def test_get_decklist_png(mock_remove, mock_convert, mock_get_pdf):
     mock_remove.assert_called_once_with(pdf_file)
 
 
+@patch("src.pokemon.DECKLIST_TIMEOUT", 0)
 @patch("shutil.rmtree")
 @patch("os.rename")
 @patch("os.remove")
 @patch("os.path.exists")
+@patch("os.path.isdir")
 @patch("os.listdir")
 @patch("src.pokemon.Driver")
 def test_get_decklist_pdf(
     mock_driver,
     mock_listdir,
+    mock_isdir,
     mock_exists,
     mock_remove,
     mock_rename,
     mock_rmtree
 ):
     mock_driver_instance = mock_driver.return_value
-    elm = mock_driver_instance.cdp.find_visible_elements.return_value[0]
-    mock_driver_instance.cdp.find_visible_elements.return_value = [
-        elm
-    ]
+    elm = MagicMock()
+    mock_driver_instance.cdp.find_visible_elements.return_value = [elm]
     elm.get_attribute.return_value = "Play! Pokémon Deck List (A4)"
-    elm.click.return_value = None
 
+    mock_isdir.return_value = True
     mock_listdir.return_value = ["decklist.pdf"]
     mock_exists.return_value = True
 
@@ -64,31 +72,28 @@ def test_get_decklist_pdf(
             "about/tournaments-rules-and-resources"
         )
     )
-    assert mock_driver_instance.sleep.call_count == 2
-    mock_driver_instance.cdp.find_visible_elements.assert_called_once_with("a")
+    mock_driver_instance.sleep.assert_not_called()
+    mock_driver_instance.cdp.find_visible_elements.assert_called_with("a")
     elm.click.assert_called_once()
-    mock_listdir.assert_called_once_with("downloaded_files")
-    mock_exists.assert_has_calls([
-        call(f"downloaded_files{os.sep}decklist.pdf"),
-        call("output.pdf")
-    ])
+    mock_listdir.assert_called_with("downloaded_files")
+    mock_exists.assert_called_once_with("output.pdf")
     mock_remove.assert_called_once_with("output.pdf")
     mock_rename.assert_called_once_with(
         f"downloaded_files{os.sep}decklist.pdf", "output.pdf"
     )
     mock_rmtree.assert_called_once_with("downloaded_files", ignore_errors=True)
+    mock_driver_instance.quit.assert_called_once()
 
-    mock_listdir.return_value = ["fakefile.png"]
-    try:
+    # still downloading
+    mock_listdir.return_value = ["decklist.pdf.crdownload"]
+    with pytest.raises(Exception, match="No pdf in downloaded files"):
         get_decklist_pdf("output.pdf")
-    except Exception as e:
-        assert str(e) == "No pdf in downloaded files"
+    assert mock_driver_instance.quit.call_count == 2
 
     elm.get_attribute.return_value = "Play! Pokémon Deck List (A2)"
-    try:
+    with pytest.raises(Exception, match="Couldn't find sheet in page"):
         get_decklist_pdf("output.pdf")
-    except Exception as e:
-        assert str(e) == "Couldn't find sheet in page"
+    assert mock_driver_instance.quit.call_count == 3
 
 
 @patch("src.pokemon.fitz.open")
@@ -107,44 +112,6 @@ def test_convert_pdf_to_png(mock_fitz_open):
     mock_pix.save.assert_called_once_with("output.png")
 
 
-class MockEventDiv:
-    def __init__(self, data={}, store=False):
-        img_head = MagicMock()
-        base_head = MagicMock()
-        self.children = [base_head, img_head]
-
-        img_children = 2
-        if store:
-            img_children += 1
-
-        for _ in range(img_children):
-            img_head.children = [MagicMock()]
-            img_head = img_head.children[0]
-        img_head.children = [{"src": data.get("logo", "logo")}]
-
-        base_children = 4
-        for _ in range(base_children):
-            base_head.children = [MagicMock()]
-            base_head = base_head.children[0]
-
-        base_head.children = [
-            MagicMock(children=[MagicMock(text=data.get("type", "type"))]),
-            MagicMock(children=[MagicMock(text=data.get("name", "name"))]),
-            MagicMock(children=[
-                None,
-                MagicMock(children=[
-                    MagicMock(text=data.get("location", "location"))
-                ])
-            ]),
-            MagicMock(children=[
-                None,
-                MagicMock(children=[
-                    MagicMock(text=data.get("date", "date"))
-                ])
-            ])
-        ]
-
-
 MOCK_EVENT_DATA = {
     "logo": "test.png",
     "type": "friendly",
@@ -198,8 +165,7 @@ MOCK_BETWEEN_MONTHS_EVENT = PokemonEvent(
 
 
 def test_extract_event_info():
-    mock_e_div = MockEventDiv(MOCK_EVENT_DATA, store=True)
-    event = extract_event_info(mock_e_div, store=True)
+    event = extract_event_info(MOCK_EVENT_DATA, store=True)
     event.logo == MOCK_EVENT_DATA["logo"]
     event.name == MOCK_EVENT_DATA["name"]
     event.type == MOCK_EVENT_DATA["type"]
@@ -213,8 +179,7 @@ def test_extract_event_info():
 
 
 def test_extract_one_day_event_info():
-    mock_e_div = MockEventDiv(MOCK_ONE_DAY_EVENT_DATA, store=True)
-    event = extract_event_info(mock_e_div, store=True)
+    event = extract_event_info(MOCK_ONE_DAY_EVENT_DATA, store=True)
     event.logo == MOCK_ONE_DAY_EVENT_DATA["logo"]
     event.name == MOCK_ONE_DAY_EVENT_DATA["name"]
     event.type == MOCK_ONE_DAY_EVENT_DATA["type"]
@@ -228,8 +193,9 @@ def test_extract_one_day_event_info():
 
 
 def test_extract_between_months_event_info():
-    mock_e_div = MockEventDiv(MOCK_BETWEEN_MONTHS_EVENT_DATA, store=True)
-    event = extract_event_info(mock_e_div, store=True)
+    event = extract_event_info(
+        MOCK_BETWEEN_MONTHS_EVENT_DATA, store=True
+    )
     event.logo == MOCK_BETWEEN_MONTHS_EVENT_DATA["logo"]
     event.name == MOCK_BETWEEN_MONTHS_EVENT_DATA["name"]
     event.type == MOCK_BETWEEN_MONTHS_EVENT_DATA["type"]
@@ -243,36 +209,207 @@ def test_extract_between_months_event_info():
 
 
 @patch("src.pokemon.extract_event_info")
-@patch("src.pokemon.Driver")
+@patch("src.driver_pool.Driver")
 def test_get_store_events(
     mock_driver,
     mock_extract
 ):
-    mock_extract.return_value = MOCK_EVENT_DATA
+    mock_extract.return_value = MOCK_EVENT
 
     result = get_store_events()
-    assert len(result) == 0
+    assert result == ({}, {})
 
     mock_driver_instance = mock_driver.return_value
-    mock = [MagicMock(
-        children=[
-            MagicMock(
-                children=[MagicMock()]
-            )
-        ]
-    )]
-    mock_driver_instance.cdp.find_visible_elements.return_value = mock
+    mock_driver_instance.cdp.evaluate.return_value = json.dumps([
+        MOCK_EVENT_DATA
+    ])
     result = get_store_events(["fake_guid"])
+    assert result == ({"fake_guid": [MOCK_EVENT]}, {})
+    # no detail link, the name is left out so renames keep the uid
+    assert MOCK_EVENT.uid == "fake_guid:2025-10-10"
+    mock_extract.assert_called_once_with(MOCK_EVENT_DATA, store=True)
+    mock_driver_instance.cdp.evaluate.assert_called_once_with(
+        STORE_EVENTS_SCRIPT
+    )
+    mock_driver_instance.cdp.find_visible_elements.assert_not_called()
     mock_driver_instance.uc_activate_cdp_mode.assert_called_once()
-    mock_driver_instance.sleep.assert_called_once()
-    mock_driver_instance.quit.assert_called_once()
+    mock_driver_instance.sleep.assert_not_called()
+    assert mock_driver_instance.cdp.is_element_visible.call_args_list == [
+        call("#b10-Content"), call("div.map-location-card")
+    ]
+    mock_driver_instance.quit.assert_not_called()
+
+    mock_driver_instance.cdp.evaluate.return_value = json.dumps([
+        {**MOCK_EVENT_DATA, "link": "/EventLocator/Detail?EventId=42"}
+    ])
+    result = get_store_events(["fake_guid"])
+    assert MOCK_EVENT.uid == "fake_guid:42"
+    mock_driver.assert_called_once()
+    mock_driver_instance.uc_activate_cdp_mode.assert_called_once()
+    assert mock_driver_instance.cdp.open.call_count == 2
+
+
+@patch("src.pokemon.get_store_event_page")
+def test_get_store_events_parallel(mock_page):
+    barrier = Barrier(2, timeout=5)
+
+    def store_page(guid):
+        if guid == "broken":
+            raise TimeoutError("store did not load")
+        # both stores must be loading at the same time to get past this
+        barrier.wait()
+        return [guid]
+
+    mock_page.side_effect = store_page
+
+    events, errors = get_store_events(["a", "b", "broken"])
+
+    assert events == {"a": ["a"], "b": ["b"]}
+    assert errors == {"broken": "store did not load"}
+
+
+@patch("src.pokemon.wait_for_selector")
+@patch("src.driver_pool.Driver")
+def test_get_store_events_not_loaded(mock_driver, mock_wait):
+    mock_driver_instance = mock_driver.return_value
+    mock_wait.return_value = False
+
+    events, errors = get_store_events(["fake_guid"])
+
+    assert events == {}
+    assert errors == {"fake_guid": "Store fake_guid did not load"}
+    mock_driver_instance.cdp.evaluate.assert_not_called()
+
+
+@patch("src.pokemon.STORE_TIMEOUT", 0.1)
+@patch("src.pokemon.get_store_event_page")
+def test_get_store_events_hung(mock_page):
+    hung = Event()
+
+    def store_page(guid):
+        if guid == "hung":
+            hung.wait(5)
+        return [guid]
+
+    mock_page.side_effect = store_page
+
+    events, errors = get_store_events(["a", "hung"])
+    hung.set()
+
+    assert events == {"a": ["a"]}
+    assert errors == {"hung": "timed out"}
+
+
+class MockCapture:
+    """Hands out one more payload each time one is waited for."""
+
+    def __init__(self, pages: list):
+        self.pages = list(pages)
+        self.payloads = []
+
+    def __call__(self, sb, url_pattern):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def wait_for_payload(self, name, timeout):
+        if not self.pages:
+            return False
+        self.payloads.append(self.pages.pop(0))
+        return True
+
+
+def event_record(
+    name: str, start: str, end: str, venue: str = "Convention Center"
+) -> dict:
+    return {
+        "Name": name,
+        "EventType": "Regional Championship",
+        "Location": {"VenueName": venue, "City": "Lille"},
+        "StartDate": start,
+        "EndDate": end,
+        "LogoUrl": "/logo.png"
+    }
+
+
+@patch("src.pokemon.JSONResponseCapture", new_callable=lambda: MockCapture([
+    {"data": {"Events": {"List": [
+        event_record("Regional 1", "2025-10-10T09:00:00", "2025-10-12"),
+        event_record("Cup 1", "2025-09-24T15:00:00Z", "")
+    ]}}},
+    {"data": {"Events": {"List": [
+        event_record("Regional 2", "2025-10-31", "2025-11-02"),
+        event_record("Cup 1", "2025-09-24T15:00:00Z", ""),
+        event_record("Cup 1", "2025-09-24T15:00:00Z", "", venue="Store")
+    ]}}},
+    # other screen services answer before the next page
+    {"data": {"Events": {"List": []}}},
+    {"data": {"Banner": "unrelated"}},
+    {"data": {"Events": {"List": [
+        event_record("Worlds", "2025-12-31T10:00:00", "2026-01-02")
+    ]}}}
+]))
+@patch("src.driver_pool.Driver")
+def test_get_premier_events_from_payloads(mock_driver, mock_capture):
+    mock_driver_instance = mock_driver.return_value
+    mock_driver_instance.cdp.find_visible_elements.return_value = [
+        MagicMock(), MagicMock()
+    ]
+
+    events = get_premier_events()
+
+    assert [event.name for event in events] == [
+        "Regional 1", "Cup 1", "Regional 2", "Cup 1", "Worlds"
+    ]
+    # same name and date at another venue
+    assert events[3].location == "Store, Lille"
+    assert events[0].type == "Regional Championship"
+    assert events[0].location == "Convention Center, Lille"
+    assert events[0].logo == "/logo.png"
+    assert events[0].premier
+    assert events[0].start_date == datetime(2025, 10, 10)
+    assert events[0].end_date == datetime(2025, 10, 13)
+    assert events[1].start_date == datetime(2025, 9, 24)
+    assert events[1].end_date == datetime(2025, 9, 25)
+    assert events[2].end_date == datetime(2025, 11, 3)
+    assert events[4].start_date == datetime(2025, 12, 31)
+    assert events[4].end_date == datetime(2026, 1, 3)
+    mock_driver_instance.sleep.assert_not_called()
+    assert mock_driver_instance.cdp.evaluate.call_args_list == [
+        call(SCROLL_TO_LAST_EVENT_SCRIPT)
+    ] * 3
+
+
+def test_parse_record_date(monkeypatch):
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    try:
+        # the date as given, whatever the timezone of the host
+        assert parse_record_date("2025-10-10T21:00:00-04:00") == (
+            datetime(2025, 10, 10)
+        )
+        assert parse_record_date("2025-10-11T01:00:00Z") == (
+            datetime(2025, 10, 11)
+        )
+        assert parse_record_date("2025-10-10") == datetime(2025, 10, 10)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
 
 
+@patch("src.pokemon.JSONResponseCapture", new_callable=lambda: MockCapture(
+    [{"unrelated": "payload"}]
+))
 @patch("src.pokemon.extract_event_info")
-@patch("src.pokemon.Driver")
+@patch("src.driver_pool.Driver")
 def test_get_premier_events(
     mock_driver,
-    mock_extract
+    mock_extract,
+    mock_capture
 ):
     mock_extract.return_value = MOCK_EVENT
     mock_driver_instance = mock_driver.return_value
@@ -286,73 +423,92 @@ def test_get_premier_events(
         assert str(e) == "Failed to load events page"
 
     mock_driver_instance.uc_activate_cdp_mode.assert_called_once()
-    mock_driver_instance.sleep.assert_called_once()
+    mock_driver_instance.sleep.assert_not_called()
+    mock_driver_instance.cdp.is_element_visible.assert_called_once_with(
+        "button.osui-tabs__header-item"
+    )
 
     mock_driver_instance.cdp.find_visible_elements.return_value = [
-        MagicMock(), MagicMock(), MagicMock()
+        MagicMock(), MagicMock()
     ]
+    mock_driver_instance.cdp.evaluate.return_value = json.dumps([
+        MOCK_EVENT_DATA, MOCK_EVENT_DATA, MOCK_EVENT_DATA
+    ])
+
+    # the failed lease discards its driver, the next one is a fresh browser
+    mock_driver_instance.quit.assert_called_once()
 
     results = get_premier_events()
 
+    assert mock_driver.call_count == 2
     mock_driver_instance.quit.assert_called_once()
     assert len(results) == 3
     assert results[0].name == MOCK_EVENT.name
+    # one read to scroll, one that finds no new events
+    mock_driver_instance.cdp.evaluate.assert_has_calls([
+        call(PREMIER_EVENTS_SCRIPT),
+        call(SCROLL_TO_LAST_EVENT_SCRIPT),
+        call(PREMIER_EVENTS_SCRIPT)
+    ])
 
 
-@patch("builtins.open")
-@patch("src.pokemon.urlretrieve")
-@patch("src.pokemon.requests.get")
-def test_get_logo(mock_get, mock_retrieve, mock_open):
-    vector_img = "data:image/gif;base64,randomstringofletters"
+@patch("src.pokemon.SESSION")
+def test_get_logo(mock_session, logo_cache):
+    vector_img = "data:image/gif;base64,cmVhZHRlc3Q="
     other_img = "logo.png"
 
-    mock_retrieve.return_value = ("filename", None)
-    mock_get.return_value = MagicMock(
-        content="contenttest",
+    mock_session.get.return_value = MagicMock(
+        content=b"contenttest",
         status_code=200
     )
-    mock_open.return_value = MagicMock(
-        read=MagicMock(return_value="readtest")
-    )
 
     logo = get_logo(vector_img)
-    assert logo == "readtest"
+    assert logo == b"readtest"
+    mock_session.get.assert_not_called()
 
     logo = get_logo(other_img)
-    assert logo == "contenttest"
+    assert logo == b"contenttest"
+    logo = get_logo(other_img)
+    assert logo == b"contenttest"
+    mock_session.get.assert_called_once()
+    assert logo_cache.get_stats()["files"] == 1
 
+    mock_session.get.return_value = MagicMock(status_code=404)
+    assert get_logo("missing.png") is None
 
-@patch("src.pokemon.Driver")
+
+@patch("src.driver_pool.Driver")
 def test_get_banned_cards(mock_driver):
     mock_driver_instance = mock_driver.return_value
-    mock_driver_instance.cdp.find_visible_elements.return_value = [
-        MagicMock(
-            children=[
-                MagicMock(
-                    children=[
-                        MagicMock(
-                            text="No cards are currently banned"
-                        )
-                    ]
-                )
-            ]
-        ),
-        MagicMock(
-            children=[
-                MagicMock(
-                    children=[
-                        MagicMock(
-                            text=(
-                                "Delinquent (XY—BREAKpoint, 98/122,"
-                                " 98a/122, and 98b/122)"
-                            )
-                        )
-                    ]
-                )
-            ]
-        )
-    ]
+    mock_driver_instance.cdp.evaluate.return_value = json.dumps([
+        ["No cards are currently banned"],
+        [
+            "Delinquent (XY—BREAKpoint, 98/122,"
+            " 98a/122, and 98b/122)"
+        ]
+    ])
 
     result = get_banned_cards()
     assert len(result["standard"]) == 0
     assert len(result["expanded"]) == 3
+
+
+@patch("src.driver_pool.Driver")
+def test_get_banned_cards_http(mock_driver, html_server, monkeypatch):
+    monkeypatch.setattr(
+        "src.pokemon.POKEMON_BANNED_CARDS_URL",
+        f"{html_server}/banned_cards.html"
+    )
+
+    result = get_banned_cards()
+
+    assert result["standard"] == []
+    assert result["expanded"] == [
+        ("Delinquent", "BREAKpoint", "98"),
+        ("Delinquent", "BREAKpoint", "98a"),
+        ("Delinquent", "BREAKpoint", "98b"),
+        ("Lysandre's Trump Card", "Phantom Forces", "99"),
+        ("Lysandre's Trump Card", "Phantom Forces", "118")
+    ]
+    mock_driver.assert_not_called()
+    assert get_fetch_stats()["pokemon banned cards"]["last"] == "http"
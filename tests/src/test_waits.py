@@ -0,0 +1,44 @@
+from unittest.mock import patch, MagicMock
+from src.waits import (
+    wait_until, wait_for_selector,
+    get_wait_stats, WAIT_STATS
+)
+
+
+def test_wait_until():
+    WAIT_STATS.clear()
+    calls = []
+
+    def condition():
+        calls.append(1)
+        return len(calls) == 3
+
+    assert wait_until(condition, "test", timeout=5, poll_interval=0)
+    assert len(calls) == 3
+
+    stats = get_wait_stats()["test"]
+    assert stats["count"] == 1
+    assert stats["timeouts"] == 0
+    assert stats["last"] < 5
+
+
+@patch("src.waits.time.sleep")
+def test_wait_until_timeout(mock_sleep):
+    WAIT_STATS.clear()
+
+    def condition():
+        raise Exception("element not found")
+
+    assert wait_until(condition, "test", timeout=0) is False
+    mock_sleep.assert_not_called()
+    assert get_wait_stats()["test"]["timeouts"] == 1
+
+
+def test_wait_for_selector():
+    WAIT_STATS.clear()
+    sb = MagicMock()
+    sb.cdp.is_element_visible.side_effect = [False, True]
+
+    assert wait_for_selector(sb, "ul.list", poll_interval=0)
+    assert sb.cdp.is_element_visible.call_count == 2
+    assert get_wait_stats()["ul.list"]["count"] == 1